@@ -0,0 +1,59 @@
+"""主窗口启动耗时基准测试（首个可交互窗口出现所需时间）
+
+需要图形界面环境。用法: python tests/benchmarks/bench_startup.py [交易条数]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'budget_app'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ledger_gen import generate_ledger  # noqa: E402
+from models import data_manager  # noqa: E402
+
+
+def fill_ledger(count):
+    data_manager.transactions = generate_ledger(count)
+    data_manager.budget_tracker.rebuild(data_manager.transactions)
+
+
+def measure(eager):
+    from main_window import MainWindow
+
+    start = time.perf_counter()
+    matplotlib_loaded = 'matplotlib' in sys.modules
+    app = MainWindow()
+    if eager:
+        # 模拟旧行为：启动时创建并渲染全部页面
+        for key in ("statistics", "budget"):
+            app.get_window(key).show()
+            app.get_window(key).hide()
+        app.show_window("transaction")
+    app.window.update()
+    elapsed = time.perf_counter() - start
+    if not matplotlib_loaded:
+        print(f"  启动后已导入 matplotlib: {'matplotlib' in sys.modules}")
+    app.window.destroy()
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+    except Exception as e:
+        print(f"没有可用的图形界面，跳过: {e}")
+        return
+
+    fill_ledger(count)
+    lazy = measure(eager=False)
+    print(f"延迟创建: {lazy:.3f}s ({count} 条交易)")
+    eager = measure(eager=True)
+    print(f"全部创建: {eager:.3f}s ({count} 条交易)")
+    print(f"首个窗口提前: {eager - lazy:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
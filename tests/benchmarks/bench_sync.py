@@ -0,0 +1,81 @@
+"""账本同步基准测试：两份大账本只相差几条记录时的同步耗时
+
+用法: python tests/benchmarks/bench_sync.py [交易条数] [--json]
+
+生成按月分区的本地账本并复制一份作为远端，先做一次同步建立基准，
+然后在远端新增、删除几条记录，在本地新增几条记录，测量第二次同步的耗时。
+--json 时改用单文件账本（耗时主要是整个文件的解析和写回）。
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'budget_app'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ledger_gen import generate_ledger  # noqa: E402
+from models import Transaction  # noqa: E402
+from storage import PartitionedStorage, partition_key, write_json_atomic  # noqa: E402
+from sync import JsonLedger, sync  # noqa: E402
+
+
+def write_partitioned(directory, rows):
+    rows_by_key = {}
+    for tx in rows:
+        rows_by_key.setdefault(partition_key(tx), []).append(tx)
+    PartitionedStorage(directory).write(rows_by_key, [])
+
+
+def edit_partition(directory, key, add=(), delete=0):
+    storage = PartitionedStorage(directory)
+    storage.read_manifest()
+    rows = [Transaction.from_dict(row) for row in storage.read_partition(key)]
+    storage.write({key: rows[delete:] + list(add)}, storage.manifest['budgets'])
+
+
+def main(argv):
+    size = int(argv[0]) if argv and argv[0].isdigit() else 1000000
+    use_json = "--json" in argv
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"生成 {size} 条交易 ...", flush=True)
+        rows = generate_ledger(size)
+        if use_json:
+            local = os.path.join(workdir, "local.json")
+            remote = os.path.join(workdir, "remote.json")
+            write_json_atomic(local, {'transactions': [tx.to_dict() for tx in rows], 'budgets': []})
+            shutil.copyfile(local, remote)
+        else:
+            local = os.path.join(workdir, "local")
+            remote = os.path.join(workdir, "remote")
+            write_partitioned(local, rows)
+            shutil.copytree(local, remote)
+
+        start = time.perf_counter()
+        sync(local, remote)
+        print(f"首次同步（建立基准）: {time.perf_counter() - start:.3f}s")
+
+        if use_json:
+            data = JsonLedger(remote).data
+            data['transactions'] = data['transactions'][2:] + [
+                Transaction(12, "餐饮", "2024-06-01", "支出", "远端").to_dict()]
+            write_json_atomic(remote, data)
+            data = JsonLedger(local).data
+            data['transactions'].append(Transaction(30, "交通", "2024-07-02", "支出", "本地").to_dict())
+            write_json_atomic(local, data)
+        else:
+            edit_partition(remote, "2024-06", add=[Transaction(12, "餐饮", "2024-06-01", "支出", "远端")])
+            edit_partition(remote, partition_key(rows[0]), delete=2)
+            edit_partition(local, "2024-07", add=[Transaction(30, "交通", "2024-07-02", "支出", "本地")])
+
+        start = time.perf_counter()
+        result = sync(local, remote)
+        print(f"增量同步: {time.perf_counter() - start:.3f}s  {result}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
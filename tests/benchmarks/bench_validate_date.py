@@ -0,0 +1,45 @@
+"""validate_date 吞吐量基准测试
+
+用法: python tests/benchmarks/bench_validate_date.py [次数]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'budget_app'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils import validate_date, validate_dates  # noqa: E402
+from test_utils import reference_validate_date  # noqa: E402
+
+
+def make_inputs(count, distinct=2000, seed=42):
+    """生成带重复的日期输入，模拟批量导入"""
+    rng = random.Random(seed)
+    pool = [(str(rng.randint(1890, 2110)), str(rng.randint(0, 13)), str(rng.randint(0, 32)))
+            for _ in range(distinct)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def timed(label, func, count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24}{elapsed:8.3f}s  {count / elapsed:12,.0f} 次/秒")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    dates = make_inputs(count)
+
+    base = timed("原实现", lambda: [reference_validate_date(*d) for d in dates], count)
+    single = timed("validate_date", lambda: [validate_date(*d) for d in dates], count)
+    batch = timed("validate_dates", lambda: validate_dates(dates), count)
+
+    print(f"加速比: 单个 {base / single:.1f}x, 批量 {base / batch:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
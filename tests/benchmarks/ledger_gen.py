@@ -0,0 +1,87 @@
+"""确定性的合成账本生成器，用于基准测试
+
+相同参数（含 seed）总是生成相同的交易记录。
+"""
+import json
+import os
+import random
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'budget_app'))
+
+from models import Transaction  # noqa: E402
+
+CATEGORIES = ["餐饮", "购物", "交通", "住房", "娱乐", "医疗", "教育", "其他"]
+NOTE_WORDS = ["午饭", "地铁", "超市", "房租", "电影", "药", "书", "咖啡", "打车", "水电", "聚餐", "网购"]
+
+
+def category_weights(count, skew):
+    """Zipf 分布的类别权重，skew 越大越集中在前几个类别"""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def generate_ledger(size, start="2015-01-01", end="2024-12-31", categories=None,
+                    category_skew=1.2, note_length=(0, 12), income_ratio=0.15, seed=0):
+    """生成 size 条交易记录，按日期先后排列（与逐条记账的顺序一致）
+
+    note_length 为备注长度（字符数）的范围
+    """
+    rng = random.Random(seed)
+    categories = categories or CATEGORIES
+    weights = category_weights(len(categories), category_skew)
+    first = date.fromisoformat(start).toordinal()
+    last = date.fromisoformat(end).toordinal()
+
+    ordinals = sorted(rng.randint(first, last) for _ in range(size))
+    chosen = rng.choices(categories, weights=weights, k=size)
+    date_strings = {}
+
+    transactions = []
+    for i, ordinal in enumerate(ordinals):
+        if ordinal not in date_strings:
+            date_strings[ordinal] = date.fromordinal(ordinal).isoformat()
+        if rng.random() < income_ratio:
+            type_, category = "收入", "其他"
+            amount = round(rng.uniform(1000, 20000), 2)
+        else:
+            type_, category = "支出", chosen[i]
+            amount = round(rng.lognormvariate(3.5, 1.0), 2)
+
+        note_chars = []
+        target = rng.randint(*note_length)
+        while len(note_chars) < target:
+            note_chars.extend(rng.choice(NOTE_WORDS))
+        note = "".join(note_chars[:target])
+
+        transaction = Transaction(amount, category, date_strings[ordinal], type_, note)
+        transaction.transaction_id = f"txn_{seed}_{i}"
+        transactions.append(transaction)
+    return transactions
+
+
+def write_ledger(path, transactions, budgets=None):
+    """以 accounting_data.json 的格式写出账本"""
+    data = {
+        'transactions': [tx.to_dict() for tx in transactions],
+        'budgets': budgets or [{'budget_id': 'budget_1', 'amount': 5000, 'period': 'monthly'}]
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="生成合成账本文件")
+    parser.add_argument("output")
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--start", default="2015-01-01")
+    parser.add_argument("--end", default="2024-12-31")
+    parser.add_argument("--skew", type=float, default=1.2)
+    parser.add_argument("--note-max", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_ledger(args.output, generate_ledger(args.size, args.start, args.end, category_skew=args.skew,
+                                              note_length=(0, args.note_max), seed=args.seed))
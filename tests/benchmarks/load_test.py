@@ -0,0 +1,143 @@
+"""本地查询服务压力测试：大量并发客户端下的吞吐量和延迟
+
+用法:
+    python tests/benchmarks/load_test.py --rows 100000 --clients 64 --requests 50
+    python tests/benchmarks/load_test.py --url http://127.0.0.1:8765 --write-ratio 0.1
+
+不指定 --url 时在本进程内用生成的账本启动服务。每个客户端保持一个 keep-alive 连接，
+依次发送请求，最后输出每秒请求数以及 p50/p99 延迟。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'budget_app'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ledger_gen import generate_ledger  # noqa: E402
+
+READ_PATHS = [
+    "/transactions?limit=50",
+    "/transactions?search=" + quote("午饭") + "&limit=50",
+    "/transactions?type=" + quote("支出") + "&category=" + quote("餐饮") + "&limit=50",
+    "/transactions?amount_min=10&amount_max=200&date_start=2020-01-01&date_end=2020-12-31&limit=50",
+    "/aggregate?mode=monthly",
+    "/monthly?month=2024-06",
+]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def send(reader, writer, method, path, host, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                 f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, requests, write_ratio, seed, latencies, errors):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(requests):
+            if rng.random() < write_ratio:
+                method, path = "POST", "/transactions"
+                body = {"amount": rng.randint(1, 500), "category": "餐饮", "date": "2024-06-01",
+                        "note": "load"}
+            else:
+                method, path, body = "GET", rng.choice(READ_PATHS), None
+            start = time.perf_counter()
+            status = await send(reader, writer, method, path, host, body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(host, port, clients, requests, write_ratio):
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, requests, write_ratio, n, latencies, errors)
+                           for n in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+def start_local_server(rows, workdir):
+    from models import DataManager
+    from server import start_in_thread
+
+    dm = DataManager()
+    dm.data_file = os.path.join(workdir, "load_test.json")
+    dm.transactions = generate_ledger(rows)
+    dm.budget_tracker.rebuild(dm.transactions)
+    dm.save_data()
+    return start_in_thread(dm, port=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查询服务压力测试")
+    parser.add_argument("--url", help="已运行的服务地址，不指定时在本进程内启动")
+    parser.add_argument("--rows", type=int, default=100000, help="本地启动时生成的交易条数")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=50, help="每个客户端的请求数")
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--output", help="结果 JSON 文件")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+        else:
+            print(f"生成 {args.rows} 条交易并启动服务 ...", flush=True)
+            server = start_local_server(args.rows, workdir)
+            host, port = "127.0.0.1", server.port
+        result = asyncio.run(run_load(host, port, args.clients, args.requests, args.write_ratio))
+
+    result.update(clients=args.clients, write_ratio=args.write_ratio)
+    if not args.url:
+        result.update(rows=args.rows, write_batches=server.batches)
+    for key, value in result.items():
+        print(f"  {key:<14}{value}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
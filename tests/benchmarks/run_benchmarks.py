@@ -0,0 +1,171 @@
+"""热点路径性能基准测试
+
+用法:
+    python tests/benchmarks/run_benchmarks.py --sizes 1000 100000 --output results.json
+    python tests/benchmarks/run_benchmarks.py --compare results.json
+
+结果保存为 JSON，使用 --compare 与之前的结果对比，耗时增加超过阈值的项目会被标出。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'budget_app'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ledger_gen import generate_ledger, write_ledger  # noqa: E402
+from models import DataManager, Transaction  # noqa: E402
+from queries import TransactionFilter  # noqa: E402
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+# 预算页常见的几种筛选组合
+SEARCH_FILTERS = {
+    "search_none": TransactionFilter(),
+    "search_text": TransactionFilter(search_term="午饭"),
+    "search_type_category": TransactionFilter(type_filter="支出", category_filter="餐饮"),
+    "search_amount_date": TransactionFilter(amount_min="10", amount_max="200",
+                                            date_start="2020-01-01", date_end="2020-12-31"),
+}
+
+
+def timed(func, repeat=1):
+    """返回多次运行中的最短耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def uncached(dm, query):
+    """清空查询缓存后执行 query，测量未命中缓存时的耗时"""
+    dm.query_cache.clear()
+    return query()
+
+
+def run_size(size, workdir, repeat):
+    results = {}
+    transactions = generate_ledger(size)
+    path = os.path.join(workdir, f"ledger_{size}.json")
+    write_ledger(path, transactions)
+
+    dm = DataManager()
+    dm.data_file = path
+    results["load_data"] = timed(dm.load_data, repeat)
+    results["save_data"] = timed(dm.save_data, repeat)
+
+    # add_transaction 每次都会保存文件，只测少量次数取平均
+    adds = 5
+    start = time.perf_counter()
+    for _ in range(adds):
+        dm.add_transaction(Transaction(12.5, "餐饮", "2024-06-01", "支出", "bench"))
+    results["add_transaction"] = (time.perf_counter() - start) / adds
+
+    # 删除 1% 的记录
+    ids = [tx.transaction_id for tx in random.Random(1).sample(dm.transactions, max(1, size // 100))]
+    results["delete_transactions"] = timed(lambda: dm.delete_transactions(ids))
+
+    ledger = dm.transactions
+    # 与预算页一样通过 DataManager.search 查询；每次先清空查询缓存，测的是实际筛选
+    for name, transaction_filter in SEARCH_FILTERS.items():
+        results[name] = timed(lambda: uncached(dm, lambda: dm.search(transaction_filter)), repeat)
+    # 反复切换筛选条件：除第一次外都命中查询缓存
+    cached_filter = next(iter(SEARCH_FILTERS.values()))
+    results["search_cached"] = timed(lambda: dm.search(cached_filter), repeat)
+    # 按金额排序整个账本：首次建立排序序列，之后沿序列取出
+    all_rows = list(ledger)
+    results["sort_amount_build"] = timed(lambda: dm.sort_rows(all_rows, "金额"))
+    results["sort_amount"] = timed(lambda: dm.sort_rows(all_rows, "金额"), repeat)
+
+    # 预算页的月度概览（BudgetWindow.calculate_monthly_data）读取预算引擎维护的合计
+    month = 2024 * 12 + 5
+    results["calculate_monthly_data"] = timed(lambda: dm.budget_tracker.month_totals(month), repeat)
+    # 统计页（StatisticsWindow.get_transaction_data）调用 DataManager.aggregate：
+    # 数据变化后第一次打开时重新汇总，之后命中查询缓存
+    for daily, mode in ((True, "daily"), (False, "monthly")):
+        results[f"get_transaction_data_{mode}"] = timed(
+            lambda: uncached(dm, lambda: dm.aggregate(daily)), repeat)
+        results[f"get_transaction_data_{mode}_cached"] = timed(lambda: dm.aggregate(daily), repeat)
+
+    # 1000 次任意日期的结余查询
+    balance = dm.budget_tracker.balance
+    rng = random.Random(2)
+    days = [rng.randrange(730000, 740000) for _ in range(1000)]
+    results["balance_as_of_x1000"] = timed(lambda: balance.running_balance(days), repeat)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(__file__), text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """打印与基线结果的对比，返回是否存在回退"""
+    regressed = False
+    for size, ops in current["results"].items():
+        base_ops = baseline["results"].get(size, {})
+        for op, seconds in ops.items():
+            if op not in base_ops:
+                continue
+            ratio = seconds / base_ops[op] if base_ops[op] else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "  <-- 回退"
+                regressed = True
+            print(f"{size:>9} {op:<36}{base_ops[op]:10.4f}s -> {seconds:10.4f}s  x{ratio:5.2f}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="运行热点路径基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="结果 JSON 文件")
+    parser.add_argument("--compare", help="用于对比的历史结果 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定为回退的耗时增幅")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "revision": git_revision(),
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            print(f"规模 {size} ...", flush=True)
+            results = run_size(size, workdir, args.repeat)
+            report["results"][str(size)] = results
+            for op, seconds in results.items():
+                print(f"  {op:<36}{seconds:10.4f}s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""按类别和月份增量维护的支出分析：最大支出（top-K）与分位数，金额单位为分
+
+每个 (类别, 月份) 单元保存一个有界小顶堆（该单元最大的若干笔支出）和一个 KLL 分位数草图。
+新增交易时 O(log K) 更新；查询时合并相关单元的堆和草图，不需要对整个账本排序。
+删除交易无法从草图中撤销，只把所在单元标记为失效，下次查询前从账本重建这些单元。
+"""
+import heapq
+import math
+import random
+from itertools import count
+
+TOP_K = 20  # 每个单元保留的最大支出笔数
+
+
+class KLLSketch:
+    """KLL 分位数草图（Karnin, Lang, Liberty 2016）
+
+    元素不超过 k 个时结果是精确的；之后内存为 O(k)，秩误差约为 O(1/k)。
+    两个草图可以合并，合并后的精度与直接处理全部数据相同。
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.count = 0
+        self.size = 0  # 当前保存的元素个数
+        self.compactors = [[]]
+        self._max_size = self._capacity_total()
+        self._rng = random.Random(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _capacity_total(self):
+        return sum(self._capacity(level) for level in range(len(self.compactors)))
+
+    def _add_level(self):
+        self.compactors.append([])
+        self._max_size = self._capacity_total()
+
+    def update(self, value):
+        self.compactors[0].append(value)
+        self.count += 1
+        self.size += 1
+        if self.size >= self._max_size:
+            self._compress()
+
+    def _compress(self):
+        """把超出容量的层压缩一半到上一层，直到总数回到容量以内"""
+        for level in range(len(self.compactors)):
+            if len(self.compactors[level]) >= self._capacity(level):
+                if level + 1 >= len(self.compactors):
+                    self._add_level()
+                items = sorted(self.compactors[level])
+                keep = [items.pop()] if len(items) % 2 else []
+                promoted = items[self._rng.randint(0, 1)::2]
+                self.compactors[level + 1].extend(promoted)
+                self.compactors[level] = keep
+                self.size -= len(items) - len(promoted)
+                if self.size < self._max_size:
+                    break
+
+    def merge(self, other):
+        """把另一个草图合并进来"""
+        while len(self.compactors) < len(other.compactors):
+            self._add_level()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self.size += other.size
+        while self.size >= self._max_size:
+            self._compress()
+        return self
+
+    def quantile(self, q):
+        """q 分位数（0 <= q <= 1），没有数据时返回 None"""
+        weighted = sorted((value, 1 << level)
+                          for level, items in enumerate(self.compactors) for value in items)
+        if not weighted:
+            return None
+        total = sum(weight for _, weight in weighted)
+        target = q * total
+        cumulative = 0
+        for value, weight in weighted:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return weighted[-1][0]
+
+
+class _Cell:
+    __slots__ = ("heap", "sketch")
+
+    def __init__(self):
+        self.heap = []  # (金额, 序号, 交易) 小顶堆
+        self.sketch = KLLSketch()
+
+
+class CategoryAnalytics:
+    """各类别、各月份的支出分析"""
+
+    def __init__(self):
+        self._cells = {}  # (类别, 月序号) -> _Cell
+        self._dirty = set()
+        self._sequence = count()
+
+    def rebuild(self, transactions):
+        self._cells = {}
+        self._dirty = set()
+        for transaction in transactions:
+            self.add(transaction)
+
+    def add(self, transaction):
+        if transaction.type != "支出" or transaction.month_index is None:
+            return
+        key = (transaction.category, transaction.month_index)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = _Cell()
+        item = (transaction.amount_cents, next(self._sequence), transaction)
+        if len(cell.heap) < TOP_K:
+            heapq.heappush(cell.heap, item)
+        elif item[0] > cell.heap[0][0]:
+            heapq.heapreplace(cell.heap, item)
+        cell.sketch.update(transaction.amount_cents)
+
+    def remove(self, transaction):
+        """标记所在单元失效，由 refresh 重建"""
+        if transaction.type == "支出" and transaction.month_index is not None:
+            self._dirty.add((transaction.category, transaction.month_index))
+
+    @property
+    def dirty(self):
+        return bool(self._dirty)
+
+    def refresh(self, transactions):
+        """从账本重建失效的单元（一次扫描）"""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        for key in dirty:
+            self._cells.pop(key, None)
+        for transaction in transactions:
+            if (transaction.category, transaction.month_index) in dirty:
+                self.add(transaction)
+
+    def _matching(self, category=None, month_index=None):
+        return [cell for (cell_category, cell_month), cell in self._cells.items()
+                if (category is None or cell_category == category)
+                and (month_index is None or cell_month == month_index)]
+
+    def months(self):
+        """有支出记录的月份，最新的在前面"""
+        return sorted({month for _, month in self._cells}, reverse=True)
+
+    def top_expenses(self, k=10, category=None, month_index=None):
+        """最大的 k 笔支出（k 不超过 TOP_K），最大的在前面"""
+        cells = self._matching(category, month_index)
+        items = heapq.nlargest(min(k, TOP_K), (item for cell in cells for item in cell.heap))
+        return [transaction for _, _, transaction in items]
+
+    def quantiles(self, qs=(0.5, 0.9), category=None, month_index=None):
+        """支出金额的分位数 {q: 分}，没有数据时为 None"""
+        merged = KLLSketch()
+        for cell in self._matching(category, month_index):
+            merged.merge(cell.sketch)
+        return {q: merged.quantile(q) for q in qs}
+
+    def summary(self, month_index=None):
+        """各类别的笔数、中位数、P90 和最大支出，按类别名排序"""
+        rows = []
+        for category in sorted({cell_category for cell_category, _ in self._cells}):
+            cells = self._matching(category, month_index)
+            if not cells:
+                continue
+            merged = KLLSketch()
+            for cell in cells:
+                merged.merge(cell.sketch)
+            largest = max(item[0] for cell in cells for item in cell.heap)
+            rows.append({"category": category, "count": merged.count,
+                         "median": merged.quantile(0.5), "p90": merged.quantile(0.9), "max": largest})
+        return rows
@@ -0,0 +1,157 @@
+"""历史交易的压缩冷归档
+
+早于截止日期的交易记录被移出内存账本，按月写入压缩的只读分段（lzma 或 zlib），
+同时在 index.json 中保存每个分段的汇总（按日收支、类别支出），
+统计页直接使用汇总数据，只有搜索确实需要明细时才解压分段。
+
+目录结构:
+    index.json
+    2019-03.1.json.xz   2019 年 3 月的第 1 个分段
+
+分段和索引都先写临时文件再替换。归档分两步提交：写入索引时把归档的交易ID记为 pending，
+账本保存成功、记录确实移出后再清除；中途中断时 DataManager 加载数据时完成剩下的一步。
+"""
+import json
+import lzma
+import os
+import zlib
+
+from storage import partition_month_index, write_bytes_atomic, write_json_atomic
+from utils import month_key, ordinal_month_index, ordinal_to_str
+
+CODECS = {
+    "lzma": (".json.xz", lzma.compress, lzma.decompress),
+    "zlib": (".json.zz", lambda data: zlib.compress(data, 9), zlib.decompress),
+}
+INDEX = "index.json"
+
+
+def summarize(transactions):
+    """计算分段汇总：行数、收支合计、按日收支和类别支出（单位：分）"""
+    summary = {'rows': 0, 'expense_cents': 0, 'income_cents': 0, 'daily': {}, 'categories': {}}
+    for tx in transactions:
+        summary['rows'] += 1
+        day = summary['daily'].setdefault(ordinal_to_str(tx.date_ordinal), [0, 0])
+        if tx.type == "支出":
+            summary['expense_cents'] += tx.amount_cents
+            day[0] += tx.amount_cents
+            summary['categories'][tx.category] = summary['categories'].get(tx.category, 0) + tx.amount_cents
+        else:
+            summary['income_cents'] += tx.amount_cents
+            day[1] += tx.amount_cents
+    return summary
+
+
+class ArchiveStore:
+    """压缩归档，分段写入后不再修改"""
+
+    def __init__(self, directory, codec="lzma"):
+        if codec not in CODECS:
+            raise ValueError(f"未知的压缩方式: {codec}")
+        self.directory = directory
+        self.codec = codec
+        self.index = {'cutoff': None, 'segments': []}
+        self._rows = {}  # 分段文件名 -> 已解压的交易记录
+        if self.exists():
+            with open(os.path.join(directory, INDEX), 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, INDEX))
+
+    @property
+    def cutoff(self):
+        """归档截止日期的序数日，早于该日期的记录都在归档中"""
+        return self.index['cutoff']
+
+    @property
+    def pending(self):
+        """已写入归档、但尚未确认移出账本的交易ID"""
+        return self.index.get('pending', [])
+
+    def archive(self, transactions, cutoff_ordinal):
+        """把交易记录按月写入新的压缩分段并更新截止日期，这些记录移出账本后需调用 commit"""
+        os.makedirs(self.directory, exist_ok=True)
+        extension, compress, _ = CODECS[self.codec]
+        by_month = {}
+        for tx in transactions:
+            by_month.setdefault(tx.month_index, []).append(tx)
+
+        segments = list(self.index['segments'])
+        for month_index in sorted(by_month):
+            rows = by_month[month_index]
+            key = month_key(month_index)
+            number = sum(1 for segment in segments if segment['month'] == key) + 1
+            name = f"{key}.{number}{extension}"
+            payload = json.dumps([tx.to_dict() for tx in rows], ensure_ascii=False).encode('utf-8')
+            write_bytes_atomic(os.path.join(self.directory, name), compress(payload))
+            segment = {'month': key, 'file': name, 'codec': self.codec}
+            segment.update(summarize(rows))
+            segments.append(segment)
+
+        # 索引写入成功才算归档，之前中断时只会留下索引没有引用的分段文件
+        index = dict(self.index, segments=segments,
+                     cutoff=max(cutoff_ordinal, self.cutoff or cutoff_ordinal),
+                     pending=self.pending + [tx.transaction_id for tx in transactions])
+        write_json_atomic(os.path.join(self.directory, INDEX), index)
+        self.index = index
+
+    def commit(self):
+        """归档的记录已移出账本并保存，清除 pending"""
+        if 'pending' in self.index:
+            index = dict(self.index)
+            del index['pending']
+            write_json_atomic(os.path.join(self.directory, INDEX), index)
+            self.index = index
+
+    def summary(self, daily, index=None):
+        """归档部分的统计，格式与 queries.aggregate_transactions 相同，不解压分段
+
+        index 为之前取得的索引（索引只整体替换，不原地修改），默认为当前索引
+        """
+        expense_data = {}
+        income_data = {}
+        category_data = {}
+        for segment in (index or self.index)['segments']:
+            if daily:
+                for day, (expense, income) in segment['daily'].items():
+                    if expense:
+                        expense_data[day] = expense_data.get(day, 0) + expense
+                    if income:
+                        income_data[day] = income_data.get(day, 0) + income
+            else:
+                key = segment['month']
+                if segment['expense_cents']:
+                    expense_data[key] = expense_data.get(key, 0) + segment['expense_cents']
+                if segment['income_cents']:
+                    income_data[key] = income_data.get(key, 0) + segment['income_cents']
+            for category, cents in segment['categories'].items():
+                category_data[category] = category_data.get(category, 0) + cents
+        return expense_data, income_data, category_data
+
+    def needed_for(self, start_ordinal, end_ordinal):
+        """明确指定的日期范围是否涉及归档，未指定日期范围时不包含归档"""
+        if not self.index['segments'] or (start_ordinal is None and end_ordinal is None):
+            return False
+        return start_ordinal is None or start_ordinal < self.cutoff
+
+    def read_rows(self, start_ordinal=None, end_ordinal=None):
+        """解压与日期范围重叠的分段，返回其中的交易记录（按分段先后）"""
+        from models import Transaction
+
+        start_month = ordinal_month_index(start_ordinal) if start_ordinal else None
+        end_month = ordinal_month_index(end_ordinal) if end_ordinal else None
+        rows = []
+        for segment in self.index['segments']:
+            month = partition_month_index(segment['month'])
+            if start_month is not None and month < start_month:
+                continue
+            if end_month is not None and month > end_month:
+                continue
+            if segment['file'] not in self._rows:
+                _, _, decompress = CODECS[segment['codec']]
+                with open(os.path.join(self.directory, segment['file']), 'rb') as f:
+                    data = json.loads(decompress(f.read()).decode('utf-8'))
+                self._rows[segment['file']] = [Transaction.from_dict(tx_data) for tx_data in data]
+            rows.extend(self._rows[segment['file']])
+        return rows
@@ -0,0 +1,86 @@
+"""DataManager 单文件账本的存储后端
+
+后端按名称读写整块字节：
+    FileBackend    名称即文件路径，写入时先写临时文件再替换（默认）
+    MemoryBackend  保存在内存中的字典里，不访问磁盘，供测试使用；
+                   可以注入故障（破坏已保存的字节、下一次写入只写入一部分）
+
+DataManager.load_data 遇到内容损坏的数据时回退到默认数据，
+MemoryBackend 的故障注入用来验证这一点，不需要写真实的临时文件。
+"""
+import errno
+import os
+import tempfile
+
+
+class FileBackend:
+    """本地文件系统"""
+
+    def exists(self, name):
+        return os.path.exists(name)
+
+    def read(self, name):
+        """读取全部字节，文件不存在时抛出 FileNotFoundError"""
+        with open(name, 'rb') as f:
+            return f.read()
+
+    def write(self, name, data):
+        """原子写入：先写临时文件再替换，避免写到一半时留下损坏的文件"""
+        directory = os.path.dirname(name) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, name)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def remove(self, name):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+class MemoryBackend:
+    """内存中的存储，带故障注入"""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})  # 名称 -> bytes
+        self.reads = 0
+        self.writes = 0
+        self._short_write = None
+
+    def exists(self, name):
+        return name in self.files
+
+    def read(self, name):
+        self.reads += 1
+        try:
+            return self.files[name]
+        except KeyError:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), name) from None
+
+    def write(self, name, data):
+        self.writes += 1
+        data = bytes(data)
+        if self._short_write is not None:
+            # 模拟写入中途磁盘已满：只留下前面一部分，并抛出 OSError
+            limit, self._short_write = self._short_write, None
+            self.files[name] = data[:limit]
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC), name)
+        self.files[name] = data
+
+    def remove(self, name):
+        self.files.pop(name, None)
+
+    def corrupt(self, name, position=None, garbage=b"\xff"):
+        """用 garbage 覆盖已保存内容中 position 处（默认为中间）的字节"""
+        data = self.files[name]
+        if position is None:
+            position = len(data) // 2
+        self.files[name] = data[:position] + garbage + data[position + len(garbage):]
+
+    def fail_next_write(self, keep_bytes=0):
+        """下一次写入只保存前 keep_bytes 个字节并抛出 OSError"""
+        self._short_write = keep_bytes
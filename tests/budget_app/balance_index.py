@@ -0,0 +1,136 @@
+"""按日期累计的收支索引（树状数组），金额单位为分
+
+以 1900-01-01 至 2100-12-31 的每一天为下标（与日期校验允许的范围一致），
+分别维护支出和收入的树状数组。补记或删除历史交易都是 O(log n)，
+"截至某日的结余"、"两日期之间的支出"以及结余序列的每个点也都是 O(log n)。
+"""
+from datetime import date
+
+FIRST_ORDINAL = date(1900, 1, 1).toordinal()
+LAST_ORDINAL = date(2100, 12, 31).toordinal()
+SIZE = LAST_ORDINAL - FIRST_ORDINAL + 1
+
+
+class FenwickTree:
+    """树状数组，下标从 1 开始"""
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    @classmethod
+    def from_values(cls, values):
+        """由 values[1..size]（values[0] 不使用）线性时间建树"""
+        fenwick = cls(len(values) - 1)
+        tree = fenwick.tree = list(values)
+        tree[0] = 0
+        size = fenwick.size
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        return fenwick
+
+    def add(self, index, delta):
+        tree = self.tree
+        while index <= self.size:
+            tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index):
+        """前 index 项之和"""
+        tree = self.tree
+        total = 0
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+    def copy(self):
+        fenwick = FenwickTree(self.size)
+        fenwick.tree = self.tree[:]
+        return fenwick
+
+
+def _position(ordinal):
+    """序数日对应的下标，超出范围时截断到两端（0 表示 1900 年之前）"""
+    return min(max(ordinal - FIRST_ORDINAL + 1, 0), SIZE)
+
+
+class BalanceIndex:
+    """累计收支索引"""
+
+    def __init__(self):
+        self.expense = FenwickTree(SIZE)
+        self.income = FenwickTree(SIZE)
+
+    def rebuild(self, transactions):
+        """根据全部交易重建，O(交易数 + 天数)；交易较少时逐条加入，O(交易数 × log 天数)"""
+        transactions = list(transactions)
+        if len(transactions) * SIZE.bit_length() < SIZE:
+            # 线性建树要扫描全部七万多天，空账本和小账本逐条加入更快
+            self.expense = FenwickTree(SIZE)
+            self.income = FenwickTree(SIZE)
+            for transaction in transactions:
+                self.add(transaction)
+            return
+        expense = [0] * (SIZE + 1)
+        income = [0] * (SIZE + 1)
+        for transaction in transactions:
+            ordinal = transaction.date_ordinal
+            if ordinal is None or not FIRST_ORDINAL <= ordinal <= LAST_ORDINAL:
+                continue
+            target = expense if transaction.type == "支出" else income
+            target[ordinal - FIRST_ORDINAL + 1] += transaction.amount_cents
+        self.expense = FenwickTree.from_values(expense)
+        self.income = FenwickTree.from_values(income)
+
+    def add(self, transaction, sign=1):
+        """计入一笔交易，sign 为 -1 时表示撤销"""
+        self.add_amount(transaction.date_ordinal, transaction.type == "支出",
+                        sign * transaction.amount_cents)
+
+    def remove(self, transaction):
+        self.add(transaction, -1)
+
+    def add_amount(self, ordinal, is_expense, cents):
+        """直接计入某一天的金额，例如归档部分的按日汇总"""
+        if ordinal is None or not FIRST_ORDINAL <= ordinal <= LAST_ORDINAL:
+            return
+        (self.expense if is_expense else self.income).add(ordinal - FIRST_ORDINAL + 1, cents)
+
+    def spent_through(self, ordinal):
+        """截至某日（含）的累计支出"""
+        return self.expense.prefix(_position(ordinal))
+
+    def income_through(self, ordinal):
+        """截至某日（含）的累计收入"""
+        return self.income.prefix(_position(ordinal))
+
+    def balance_as_of(self, ordinal):
+        """截至某日（含）的结余：累计收入 - 累计支出"""
+        position = _position(ordinal)
+        return self.income.prefix(position) - self.expense.prefix(position)
+
+    def spend_between(self, start_ordinal, end_ordinal):
+        """两日期之间（含两端）的支出"""
+        if end_ordinal < start_ordinal:
+            return 0
+        return self.spent_through(end_ordinal) - self.spent_through(start_ordinal - 1)
+
+    def income_between(self, start_ordinal, end_ordinal):
+        """两日期之间（含两端）的收入"""
+        if end_ordinal < start_ordinal:
+            return 0
+        return self.income_through(end_ordinal) - self.income_through(start_ordinal - 1)
+
+    def running_balance(self, ordinals):
+        """各日期的结余序列"""
+        return [self.balance_as_of(ordinal) for ordinal in ordinals]
+
+    def copy(self):
+        """复制一份，供后台线程在数据继续变化时读取"""
+        index = BalanceIndex.__new__(BalanceIndex)
+        index.expense = self.expense.copy()
+        index.income = self.income.copy()
+        return index
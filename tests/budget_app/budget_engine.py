@@ -0,0 +1,155 @@
+"""多预算引擎：按周期和类别增量维护支出合计，金额单位为分"""
+from datetime import date
+
+from analytics import CategoryAnalytics
+from balance_index import BalanceIndex
+from dedup import DuplicateIndex
+from money import to_cents
+from sort_index import SortIndex
+from trends import DailySpend
+from utils import days_in_month
+
+PERIODS = ("weekly", "monthly", "yearly")
+PERIOD_NAMES = {"weekly": "每周", "monthly": "每月", "yearly": "每年"}
+
+
+def period_index(period, ordinal, month_index):
+    """返回日期所在周期的序号（周从周一开始）"""
+    if period == "weekly":
+        return (ordinal - 1) // 7
+    if period == "monthly":
+        return month_index
+    if period == "yearly":
+        return month_index // 12
+    raise ValueError(f"未知的预算周期: {period}")
+
+
+def period_bounds(period, index):
+    """返回周期的 (起始序数日, 天数)"""
+    if period == "weekly":
+        return index * 7 + 1, 7
+    if period == "monthly":
+        year, month = divmod(index, 12)
+        return date(year, month + 1, 1).toordinal(), days_in_month(year, month + 1)
+    start = date(index, 1, 1).toordinal()
+    return start, date(index + 1, 1, 1).toordinal() - start
+
+
+class BudgetStatus:
+    """单个预算在当前周期内的使用情况"""
+
+    def __init__(self, budget, spent, today_ordinal):
+        today = date.fromordinal(today_ordinal)
+        index = period_index(budget.period, today_ordinal, today.year * 12 + today.month - 1)
+        start, length = period_bounds(budget.period, index)
+
+        self.budget = budget
+        self.amount = to_cents(budget.amount)
+        self.spent = spent
+        self.remaining = self.amount - spent
+        self.over = self.remaining < 0
+        # 燃尽数据：已过天数、剩余天数和剩余日均可用额度
+        self.days_elapsed = today_ordinal - start + 1
+        self.days_left = length - self.days_elapsed + 1
+        self.daily_allowance = max(self.remaining, 0) // self.days_left
+
+    @property
+    def label(self):
+        category = self.budget.category or "总"
+        return f"{category}({PERIOD_NAMES.get(self.budget.period, self.budget.period)})"
+
+
+class BudgetTracker:
+    """随交易增删增量更新各周期、各类别的支出合计、每月收入、按日期累计的收支索引、
+    各类别每天的支出、支出分析、表格各列的排序序列以及用于导入去重的指纹计数"""
+
+    def __init__(self):
+        self._spent = {}  # (周期, 周期序号, 类别或 None) -> 支出
+        self._income = {}  # 月序号 -> 收入
+        self.balance = BalanceIndex()
+        self.daily = DailySpend()  # 移动平均和月底预测
+        self.analytics = CategoryAnalytics()
+        self.sorting = SortIndex()
+        self.duplicates = DuplicateIndex()
+
+    def rebuild(self, transactions):
+        """根据全部交易重建合计"""
+        self._spent = {}
+        self._income = {}
+        self.daily.clear()
+        self.balance.rebuild(transactions)
+        self.analytics.rebuild(transactions)
+        self.sorting.invalidate()
+        self.duplicates.rebuild(transactions)
+        for transaction in transactions:
+            self._add_totals(transaction)
+
+    def add(self, transaction, sign=1):
+        """计入一笔交易，sign 为 -1 时表示撤销"""
+        if sign > 0:
+            self.sorting.add(transaction)
+        else:
+            self.sorting.remove(transaction)
+        self._add_indexes(transaction, sign)
+
+    def add_many(self, transactions, sign=1):
+        """批量计入或撤销（加载分区、批量添加和删除）
+
+        排序序列逐条插入每条为 O(n)，批量时整体丢弃，下次排序时一次排序重建
+        """
+        if len(transactions) == 1:
+            self.add(transactions[0], sign)
+            return
+        if transactions:
+            self.sorting.invalidate()
+        for transaction in transactions:
+            self._add_indexes(transaction, sign)
+
+    def _add_indexes(self, transaction, sign):
+        """更新排序序列以外的各项索引和合计"""
+        self.balance.add(transaction, sign)
+        if sign > 0:
+            self.analytics.add(transaction)
+            self.duplicates.add(transaction)
+        else:
+            self.analytics.remove(transaction)
+            self.duplicates.remove(transaction)
+        self._add_totals(transaction, sign)
+
+    def _add_totals(self, transaction, sign=1):
+        if transaction.date_ordinal is None:
+            return
+        cents = sign * transaction.amount_cents
+        if transaction.type != "支出":
+            self._income[transaction.month_index] = self._income.get(transaction.month_index, 0) + cents
+            return
+        self.daily.add_amount(transaction.date_ordinal, transaction.category, cents)
+        for period in PERIODS:
+            index = period_index(period, transaction.date_ordinal, transaction.month_index)
+            for category in (None, transaction.category):
+                key = (period, index, category)
+                self._spent[key] = self._spent.get(key, 0) + cents
+
+    def remove(self, transaction):
+        """撤销一笔交易"""
+        self.add(transaction, -1)
+
+    def spent(self, period, index, category=None):
+        """返回指定周期内的支出，category 为 None 时为全部类别"""
+        return self._spent.get((period, index, category), 0)
+
+    def month_totals(self, month_index):
+        """返回指定月份的 (支出, 收入)"""
+        return self.spent("monthly", month_index), self._income.get(month_index, 0)
+
+    def status(self, budget, today=None):
+        """返回预算在 today 所在周期的使用情况"""
+        today = today or date.today()
+        ordinal = today.toordinal()
+        index = period_index(budget.period, ordinal, today.year * 12 + today.month - 1)
+        return BudgetStatus(budget, self.spent(budget.period, index, budget.category), ordinal)
+
+    def over_budgets(self, budgets, today=None):
+        """返回当前周期已超支的预算状态，复杂度为 O(预算数)"""
+        statuses = [self.status(budget, today) for budget in budgets]
+        return [status for status in statuses if status.over]
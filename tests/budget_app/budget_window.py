@@ -1,7 +1,14 @@
+from bisect import bisect_left, bisect_right
+from datetime import date
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime
-from models import transactions, budgets, data_manager, categories
+from models import data_manager, categories
+from utils import current_month_index
+from money import to_cents, format_cents
+from queries import TransactionFilter
+from sort_index import merge_sorted, sort_key
+from budget_engine import PERIOD_NAMES
+from instrumentation import span
 
 class PlaceholderEntry(tk.Entry):
     """支持占位符文本的 Entry 组件"""
@@ -43,8 +50,18 @@ class BudgetWindow:
     def __init__(self, parent):
         self.parent = parent
         self.frame = tk.Frame(parent)
+        self._rows = {}  # Treeview iid -> 交易记录
+        self._iids = {}  # 交易ID -> Treeview iid 列表
+        self._archived_iids = set()  # 来自归档的只读行
+        self._filter = TransactionFilter()
+        self._version = None  # 表格当前对应的数据版本
+        self._sort = None  # (列名, 是否降序)，None 表示默认顺序（最新的在前面）
+        self._sort_keys = []  # 排序时表格中各行的排序键（升序），用于确定新增行的位置
+        self._visible = False
+        self._searching = False
         self.create_widgets()
-        self.update_display()
+        # 表格在第一次 show() 时填充
+        data_manager.add_listener(self.on_ledger_change)
     
     def create_widgets(self):
         # 标题
@@ -57,11 +74,28 @@ class BudgetWindow:
         tk.Label(budget_frame, text="月度预算:").grid(row=0, column=0, sticky="w", pady=5)
         self.budget_entry = tk.Entry(budget_frame)
         self.budget_entry.grid(row=0, column=1, pady=5, padx=5, sticky="ew")
-        self.budget_entry.insert(0, str(budgets[0].amount))
+        self.budget_entry.insert(0, str(data_manager.budgets[0].amount))
         
         tk.Button(budget_frame, text="更新预算", command=self.update_budget,
                  bg="#4CAF50", fg="white").grid(row=0, column=2, padx=5)
         
+        # 分类预算：类别 + 周期 + 金额
+        tk.Label(budget_frame, text="分类预算:").grid(row=1, column=0, sticky="w", pady=5)
+        category_budget_frame = tk.Frame(budget_frame)
+        category_budget_frame.grid(row=1, column=1, pady=5, padx=5, sticky="ew")
+        self.budget_category = tk.StringVar(value=categories[0])
+        self.budget_category_combo = ttk.Combobox(category_budget_frame, textvariable=self.budget_category,
+                                                  values=categories, state="readonly", width=8)
+        self.budget_category_combo.pack(side="left")
+        self.budget_period = tk.StringVar(value=PERIOD_NAMES["monthly"])
+        ttk.Combobox(category_budget_frame, textvariable=self.budget_period,
+                     values=list(PERIOD_NAMES.values()), state="readonly", width=6).pack(side="left", padx=5)
+        self.category_budget_entry = tk.Entry(category_budget_frame)
+        self.category_budget_entry.pack(side="left", fill="x", expand=True)
+        
+        tk.Button(budget_frame, text="设置", command=self.update_category_budget,
+                 bg="#4CAF50", fg="white").grid(row=1, column=2, padx=5)
+        
         budget_frame.columnconfigure(1, weight=1)
         
         # 月度概览框架
@@ -80,6 +114,12 @@ class BudgetWindow:
         self.balance_label = tk.Label(overview_frame, text="余额: 0")
         self.balance_label.pack(side="left", padx=10)
         
+        self.over_budget_label = tk.Label(overview_frame, text="", fg="red")
+        self.over_budget_label.pack(side="left", padx=10)
+        
+        self.forecast_label = tk.Label(overview_frame, text="")
+        self.forecast_label.pack(side="left", padx=10)
+        
         # 搜索框架
         search_frame = tk.LabelFrame(self.frame, text="交易记录搜索与筛选")
         search_frame.pack(fill="x", padx=20, pady=10)
@@ -116,10 +156,10 @@ class BudgetWindow:
         # 类别筛选
         tk.Label(row2, text="类别:").pack(side="left", padx=(10, 0))
         self.category_filter = tk.StringVar(value="全部")
-        category_combo = ttk.Combobox(row2, textvariable=self.category_filter,
-                                     values=["全部"] + categories, state="readonly", width=8)
-        category_combo.pack(side="left", padx=5)
-        category_combo.bind('<<ComboboxSelected>>', self.search_transactions)
+        self.category_combo = ttk.Combobox(row2, textvariable=self.category_filter,
+                                          values=["全部"] + categories, state="readonly", width=8)
+        self.category_combo.pack(side="left", padx=5)
+        self.category_combo.bind('<<ComboboxSelected>>', self.search_transactions)
         
         # 金额范围筛选
         tk.Label(row2, text="金额范围:").pack(side="left", padx=(10, 0))
@@ -170,8 +210,9 @@ class BudgetWindow:
         self.tree.column("金额", width=100)
         self.tree.column("备注", width=200)
         
+        # 点击表头按该列排序，再次点击切换升序/降序
         for col in columns:
-            self.tree.heading(col, text=col)
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
         
         # 添加滚动条
         scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
@@ -190,111 +231,158 @@ class BudgetWindow:
                 messagebox.showerror("错误", "预算不能为负数！")
                 return
                 
-            budgets[0].amount = new_budget
-            # 保存数据
-            data_manager.save_data()
-            self.update_display()
+            data_manager.budgets[0].amount = new_budget
+            # 只改了预算，分区存储时只需更新清单
+            data_manager.save_data(partitions=())
+            self.update_overview()
             messagebox.showinfo("成功", "预算更新成功！")
         except ValueError:
             messagebox.showerror("错误", "请输入有效的预算金额！")
     
+    def update_category_budget(self):
+        """设置分类预算，金额为 0 或留空时删除该预算"""
+        text = self.category_budget_entry.get().strip()
+        try:
+            amount = float(text) if text else 0
+        except ValueError:
+            messagebox.showerror("错误", "请输入有效的预算金额！")
+            return
+        if amount < 0:
+            messagebox.showerror("错误", "预算不能为负数！")
+            return
+        
+        period = next(key for key, name in PERIOD_NAMES.items() if name == self.budget_period.get())
+        data_manager.set_budget(amount, period, self.budget_category.get())
+        self.category_budget_entry.delete(0, tk.END)
+        self.update_overview()
+    
     def calculate_monthly_data(self):
-        """计算月度数据"""
-        current_month = datetime.now().strftime("%Y-%m")
-        monthly_expense = 0
-        monthly_income = 0
-        
-        for transaction in transactions:
-            if transaction.date.startswith(current_month):
-                if transaction.type == "支出":
-                    monthly_expense += transaction.amount
-                else:
-                    monthly_income += transaction.amount
-        
-        return monthly_expense, monthly_income
+        """计算月度数据（单位：分），由预算引擎增量维护"""
+        return data_manager.budget_tracker.month_totals(current_month_index())
+    
+    def current_filter(self):
+        """根据界面输入构造筛选条件"""
+        return TransactionFilter(
+            search_term=self.search_entry.get(),
+            search_column=self.search_column.get(),
+            type_filter=self.type_filter.get(),
+            category_filter=self.category_filter.get(),
+            amount_min=self.amount_min.get(),
+            amount_max=self.amount_max.get(),
+            date_start=self.date_start.get_content(),
+            date_end=self.date_end.get_content()
+        )
     
     def search_transactions(self, *args):
         """搜索和筛选交易记录"""
-        search_term = self.search_entry.get().lower()
-        search_column = self.search_column.get()
-        type_filter = self.type_filter.get()
-        category_filter = self.category_filter.get()
-        
-        # 获取日期范围
-        date_start = self.date_start.get_content()
-        date_end = self.date_end.get_content()
-        
-        # 清空表格
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # 填充数据
-        for transaction in reversed(transactions):  # 最新的在前面
-            # 检查搜索条件
-            matches_search = False
-            if not search_term:
-                matches_search = True
-            else:
-                if search_column == "全部":
-                    # 在所有列中搜索
-                    matches_search = (
-                        search_term in transaction.date or
-                        search_term in transaction.type.lower() or
-                        search_term in transaction.category.lower() or
-                        search_term in str(transaction.amount) or
-                        search_term in transaction.note.lower()
-                    )
-                else:
-                    # 在指定列中搜索
-                    if search_column == "日期":
-                        matches_search = search_term in transaction.date
-                    elif search_column == "类型":
-                        matches_search = search_term in transaction.type.lower()
-                    elif search_column == "类别":
-                        matches_search = search_term in transaction.category.lower()
-                    elif search_column == "金额":
-                        matches_search = search_term in str(transaction.amount)
-                    elif search_column == "备注":
-                        matches_search = search_term in transaction.note.lower()
-            
-            # 检查类型筛选
-            matches_type = (type_filter == "全部" or transaction.type == type_filter)
-            
-            # 检查类别筛选
-            matches_category = (category_filter == "全部" or transaction.category == category_filter)
+        with span("search") as s:
+            self._filter = self.current_filter()
             
-            # 检查金额范围
-            matches_amount = True
-            try:
-                if self.amount_min.get():
-                    min_val = float(self.amount_min.get())
-                    if transaction.amount < min_val:
-                        matches_amount = False
-                if self.amount_max.get():
-                    max_val = float(self.amount_max.get())
-                    if transaction.amount > max_val:
-                        matches_amount = False
-            except ValueError:
-                pass  # 如果输入的不是有效数字，忽略金额筛选
+            # 日期范围涉及未加载的历史分区时先加载
+            if self._filter.start_ordinal or self._filter.end_ordinal:
+                self._searching = True
+                try:
+                    data_manager.ensure_loaded(self._filter.start_ordinal, self._filter.end_ordinal)
+                finally:
+                    self._searching = False
             
-            # 检查日期范围
-            matches_date = True
-            if date_start:
-                if transaction.date < date_start:
-                    matches_date = False
-            if date_end:
-                if transaction.date > date_end:
-                    matches_date = False
+            # 清空表格
+            self.tree.delete(*self.tree.get_children())
+            self._rows = {}
+            self._iids = {}
+            self._archived_iids = set()
             
-            # 如果所有条件都满足，显示记录
-            if matches_search and matches_type and matches_category and matches_amount and matches_date:
-                self.tree.insert("", "end", values=(
-                    transaction.date,
-                    transaction.type,
-                    transaction.category,
-                    f"{transaction.amount:.2f}",
-                    transaction.note
-                ), tags=(transaction.transaction_id,))
+            # 填充数据，最新的在前面，归档记录排在后面；切换回之前的筛选条件时直接使用缓存结果
+            _, rows, archived = data_manager.search(self._filter)
+            if self._sort is None:
+                for transaction in rows:
+                    self._insert_row(transaction, "end")
+                for transaction in archived:
+                    self._archived_iids.add(self._insert_row(transaction, "end"))
+            else:
+                self._fill_sorted(rows, archived)
+            self._version = data_manager.version
+            s.count("rows_rendered", len(rows))
+    
+    def _fill_sorted(self, rows, archived):
+        """按当前排序列填充表格，账本部分使用预先计算的排序序列，再与归档部分合并"""
+        column, descending = self._sort
+        rows = data_manager.sort_rows(rows, column, descending)
+        archived_ids = set(map(id, archived))
+        archived = sorted(archived, key=sort_key(column), reverse=descending)
+        for transaction in merge_sorted(rows, archived, column, descending):
+            iid = self._insert_row(transaction, "end")
+            if id(transaction) in archived_ids:
+                self._archived_iids.add(iid)
+        self._sort_keys = sorted(map(sort_key(column), self._rows.values()))
+    
+    def sort_by(self, column):
+        """按列排序，同一列再次点击时切换升序/降序"""
+        if self._sort is not None and self._sort[0] == column:
+            self._sort = (column, not self._sort[1])
+        else:
+            self._sort = (column, False)
+        for col in self.tree["columns"]:
+            arrow = (" ▼" if self._sort[1] else " ▲") if col == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self.search_transactions()
+    
+    def _sorted_position(self, transaction):
+        """排序状态下新增记录在表格中的位置，同时记录它的排序键"""
+        key = sort_key(self._sort[0])(transaction)
+        position = bisect_right(self._sort_keys, key)
+        self._sort_keys.insert(position, key)
+        return len(self._sort_keys) - 1 - position if self._sort[1] else position
+    
+    def _forget_sort_key(self, transaction):
+        key = sort_key(self._sort[0])(transaction)
+        position = bisect_left(self._sort_keys, key)
+        if position < len(self._sort_keys) and self._sort_keys[position] == key:
+            del self._sort_keys[position]
+    
+    def _insert_row(self, transaction, index):
+        """插入一行并记录 iid 与交易记录的对应关系"""
+        iid = self.tree.insert("", index, values=(
+            transaction.date,
+            transaction.type,
+            transaction.category,
+            transaction.amount_text,
+            transaction.note
+        ))
+        self._rows[iid] = transaction
+        self._iids.setdefault(transaction.transaction_id, []).append(iid)
+        return iid
+    
+    def on_ledger_change(self, change):
+        """根据数据变更事件增量更新表格"""
+        if change.reset:
+            if self._searching or not self._visible:
+                # 正在进行的搜索或下次 show() 时再重建表格
+                self._version = None
+                self.update_overview()
+            else:
+                self.update_display()
+            return
+        
+        # 删除被移除的行
+        deleted = []
+        for transaction_id in change.removed:
+            for iid in self._iids.pop(transaction_id, ()):
+                if self._sort is not None:
+                    self._forget_sort_key(self._rows[iid])
+                del self._rows[iid]
+                deleted.append(iid)
+        if deleted:
+            self.tree.delete(*deleted)
+        
+        # 新增且满足当前筛选条件的记录插入到最前面，排序时插入到对应位置
+        for transaction in change.added:
+            if self._filter.matches(transaction):
+                index = 0 if self._sort is None else self._sorted_position(transaction)
+                self._insert_row(transaction, index)
+        
+        self._version = change.version
+        self.update_overview()
     
     def delete_selected(self):
         """删除选中的交易记录"""
@@ -308,22 +396,16 @@ class BudgetWindow:
         if not result:
             return
         
-        # 获取要删除的交易ID
-        transaction_ids_to_delete = []
-        for item in selected_items:
-            transaction_id = self.tree.item(item, "tags")[0]
-            transaction_ids_to_delete.append(transaction_id)
-        
-        # 从数据中删除
-        global transactions
-        transactions = [tx for tx in transactions if tx.transaction_id not in transaction_ids_to_delete]
-        
-        # 保存数据
-        data_manager.transactions = transactions
-        data_manager.save_data()
+        # 获取要删除的交易ID，归档中的记录只读
+        transaction_ids_to_delete = [self._rows[item].transaction_id for item in selected_items
+                                     if item not in self._archived_iids]
+        if len(transaction_ids_to_delete) < len(selected_items):
+            messagebox.showwarning("警告", "已归档的记录不能删除，将跳过这些记录")
+        if not transaction_ids_to_delete:
+            return
         
-        # 更新显示
-        self.update_display()
+        # 从数据中删除并保存，表格通过变更事件更新
+        data_manager.delete_transactions(transaction_ids_to_delete)
         messagebox.showinfo("成功", f"已删除 {len(transaction_ids_to_delete)} 条记录")
     
     def on_item_double_click(self, event):
@@ -358,26 +440,54 @@ class BudgetWindow:
     
     def update_display(self):
         """更新显示"""
+        self.update_overview()
+        
+        # 更新表格
+        self.search_transactions()
+    
+    def update_overview(self):
+        """更新月度概览"""
         monthly_expense, monthly_income = self.calculate_monthly_data()
-        budget = budgets[0].amount
+        budget = to_cents(data_manager.budgets[0].amount)
         balance = budget - monthly_expense
         
-        self.budget_label.config(text=f"预算: {budget:.2f}")
-        self.expense_label.config(text=f"支出: {monthly_expense:.2f}")
-        self.income_label.config(text=f"收入: {monthly_income:.2f}")
+        self.budget_label.config(text=f"预算: {format_cents(budget)}")
+        self.expense_label.config(text=f"支出: {format_cents(monthly_expense)}")
+        self.income_label.config(text=f"收入: {format_cents(monthly_income)}")
         
         # 根据余额设置颜色
         if balance >= 0:
-            self.balance_label.config(text=f"余额: {balance:.2f}", fg="green")
+            self.balance_label.config(text=f"余额: {format_cents(balance)}", fg="green")
         else:
-            self.balance_label.config(text=f"超支: {-balance:.2f}", fg="red")
-        
-        # 更新表格
-        self.search_transactions()
+            self.balance_label.config(text=f"超支: {format_cents(-balance)}", fg="red")
+        
+        # 列出其余超支的预算
+        over = data_manager.budget_tracker.over_budgets(data_manager.budgets[1:])
+        self.over_budget_label.config(text="  ".join(
+            f"{status.label}超支 {format_cents(-status.remaining)}" for status in over))
+        
+        # 近 7/30 天日均支出和按近 30 天日均外推的月底支出
+        projection = data_manager.month_end_projection()
+        today = date.today().toordinal()
+        averages = data_manager.moving_averages([today])
+        text = "  ".join(f"{window}日日均: {format_cents(round(values[today]))}"
+                         for window, values in averages.items())
+        text += f"  预计月底支出: {format_cents(projection.projected)}"
+        if projection.over:
+            self.forecast_label.config(text=f"{text}（预计超支 {format_cents(projection.overrun)}）", fg="red")
+        else:
+            self.forecast_label.config(text=text, fg="black")
     
     def show(self):
         self.frame.pack(fill="both", expand=True)
-        self.update_display()
+        self._visible = True
+        # 类别列表可能新增了自定义类别
+        self.budget_category_combo.config(values=categories)
+        self.category_combo.config(values=["全部"] + categories)
+        # 数据没有变化时不必重建表格
+        if self._version != data_manager.version:
+            self.update_display()
     
     def hide(self):
-        self.frame.pack_forget()
\ No newline at end of file
+        self.frame.pack_forget()
+        self._visible = False
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""交易类别的注册表：类别名称与小整数编码的双向映射
+
+编码按注册顺序分配，只增不减，同一进程内保持不变：默认类别为 0..7，
+之后依次是账本文件中保存的自定义类别和通过 DataManager 添加、采用的类别。
+交易记录在设置类别时只查询编码、不注册，分组、筛选和饼图汇总都按编码在整数数组上进行，
+未注册的类别按名称处理。
+"""
+import threading
+
+DEFAULT_CATEGORIES = ("餐饮", "购物", "交通", "住房", "娱乐", "医疗", "教育", "其他")
+
+
+class CategoryRegistry:
+    """类别名称 <-> 编码"""
+
+    def __init__(self, names=()):
+        self._lock = threading.Lock()
+        self._names = []
+        self._codes = {}
+        for name in names:
+            self.code(name)
+
+    def code(self, name):
+        """类别的编码，第一次出现时分配新编码"""
+        code = self._codes.get(name)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(name)
+                if code is None:
+                    code = self._codes[name] = len(self._names)
+                    self._names.append(name)
+        return code
+
+    def lookup(self, name):
+        """已注册类别的编码，未注册时返回 None"""
+        return self._codes.get(name)
+
+    def name(self, code):
+        return self._names[code]
+
+    def names(self):
+        """全部类别名称，按编码顺序"""
+        return list(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, name):
+        return name in self._codes
+
+
+registry = CategoryRegistry(DEFAULT_CATEGORIES)
+
+
+def category_code(name):
+    """在全局注册表中取得类别编码"""
+    return registry.code(name)
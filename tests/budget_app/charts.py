@@ -0,0 +1,130 @@
+"""统计图的后台渲染
+
+图表用非交互的 Agg 后端在工作线程中绘制成 PNG，Tk 线程只负责把图片显示出来，
+渲染期间界面不会卡住。新的渲染请求会使之前的请求作废：尚未开始的直接取消，
+正在进行的在下一个检查点放弃。
+"""
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import span
+from money import cents_to_float
+from utils import days_in_month, parse_date
+
+Figure = None
+FigureCanvasAgg = None
+
+
+def load_matplotlib():
+    """首次绘图时才导入 matplotlib（只用面向对象接口和 Agg 后端，不依赖 pyplot 的全局状态）"""
+    global Figure, FigureCanvasAgg
+    if Figure is None:
+        import matplotlib
+        from matplotlib.backends.backend_agg import FigureCanvasAgg as canvas_class
+        from matplotlib.figure import Figure as figure_class
+        matplotlib.rcParams['font.family'] = 'SimHei'
+        Figure, FigureCanvasAgg = figure_class, canvas_class
+    return Figure, FigureCanvasAgg
+
+
+def period_end_ordinal(key):
+    """图表横轴的日期 "YYYY-MM-DD" 或月份 "YYYY-MM" 对应的最后一天（序数日）"""
+    if len(key) == 7:
+        first = parse_date(f"{key}-01")[0]
+        if first is None:
+            return None
+        return first + days_in_month(int(key[:4]), int(key[5:])) - 1
+    return parse_date(key)[0]
+
+
+def render_chart(expense_data, income_data, category_data, daily,
+                 width=1200, height=500, dpi=100, is_stale=None, balance=None, trend=None):
+    """把收支趋势和类别占比绘制为 PNG（金额单位：分）
+
+    balance 为 BalanceIndex 时在趋势图上叠加累计结余曲线；
+    trend 为 trends.DailySpend 且按日统计时叠加 7 日和 30 日移动平均日支出；
+    is_stale() 返回 True 时放弃渲染并返回 None
+    """
+    figure_class, canvas_class = load_matplotlib()
+    fig = figure_class(figsize=(width / dpi, height / dpi), dpi=dpi)
+    canvas_class(fig)
+    ax1, ax2 = fig.subplots(1, 2)
+
+    # 折线图
+    if expense_data or income_data:
+        dates = sorted(set(expense_data) | set(income_data))
+        expense_values = [cents_to_float(expense_data.get(date, 0)) for date in dates]
+        income_values = [cents_to_float(income_data.get(date, 0)) for date in dates]
+
+        ax1.plot(dates, expense_values, 'r-', label='支出', marker='o')
+        ax1.plot(dates, income_values, 'g-', label='收入', marker='o')
+
+        # 移动平均：所有日期、所有类别在一个矩阵上用前缀和一次算出
+        if daily and trend is not None:
+            ordinals = {date: parse_date(date)[0] for date in dates}
+            averages = trend.moving_averages([ordinal for ordinal in ordinals.values() if ordinal is not None])
+            for (window, values), style in zip(averages.items(), (':', '-.')):
+                ax1.plot(dates, [cents_to_float(values.get(ordinals[date], 0)) for date in dates],
+                         'm' + style, label=f'{window}日均线')
+        ax1.set_title(f"{'每日' if daily else '每月'}收支趋势")
+        ax1.set_xlabel('时间')
+        ax1.set_ylabel('金额')
+        ax1.legend(loc='upper left')
+        ax1.tick_params(axis='x', rotation=45)
+
+        # 累计结余：每个点都是一次 O(log n) 的前缀和查询
+        if balance is not None:
+            ordinals = [period_end_ordinal(date) for date in dates]
+            points = [(date, cents_to_float(balance.balance_as_of(ordinal)))
+                      for date, ordinal in zip(dates, ordinals) if ordinal is not None]
+            ax3 = ax1.twinx()
+            ax3.plot([date for date, _ in points], [value for _, value in points], 'b--', label='累计结余')
+            ax3.set_ylabel('累计结余')
+            ax3.legend(loc='upper right')
+
+    # 饼图
+    labels = [cat for cat, amount in category_data.items() if amount > 0]
+    sizes = [amount for amount in category_data.values() if amount > 0]
+    if labels:
+        ax2.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
+        ax2.set_title('支出类别占比')
+
+    if is_stale is not None and is_stale():
+        return None
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    with span("draw") as s:
+        s.count("points", len(expense_data) + len(income_data))
+        fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+class ChartRenderer:
+    """单线程的渲染队列，只有最新一次请求的结果有效"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="chart-render")
+        self._lock = threading.Lock()
+        self._future = None
+        self.generation = 0
+
+    def submit(self, func, *args):
+        """提交渲染任务 func(*args, is_stale=...)，之前的任务作废，返回 (代号, Future)"""
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+            if self._future is not None:
+                self._future.cancel()
+            self._future = self._executor.submit(
+                func, *args, is_stale=lambda: generation != self.generation)
+            return generation, self._future
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def shutdown(self):
+        with self._lock:
+            self.generation += 1
+            self._executor.shutdown(wait=False)
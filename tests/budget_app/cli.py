@@ -0,0 +1,273 @@
+"""无界面的命令行入口，直接使用 DataManager，不导入 tkinter 和 matplotlib
+
+用法:
+    python cli.py add 12.5 餐饮 2025-01-01 --note 午饭
+    python cli.py import ledger.csv          # CSV 表头: amount,category,date,type,note；也支持 JSON，默认跳过重复记录
+    python cli.py search --type 支出 --date-start 2025-01-01 --format csv
+    python cli.py monthly --month 2025-01
+    python cli.py stats --mode daily
+    python cli.py sync /mnt/laptop/accounting_data.json  # 与另一份账本双向合并
+
+通过 --data-file / --data-dir 指定账本，默认与桌面程序相同（BUDGET_DATA_DIR 或当前目录的
+accounting_data.json）。
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+
+from archive import ArchiveStore
+from dedup import bloom_path
+from money import format_cents, to_cents
+from queries import TransactionFilter
+from storage import PartitionedStorage, migrate_json_file
+from utils import current_month_index, days_in_month, month_key, parse_date
+
+DEFAULT_DATA_FILE = "accounting_data.json"
+COLUMNS = ("date", "type", "category", "amount", "note")
+HEADERS = ("日期", "类型", "类别", "金额", "备注")
+
+
+def configure_storage(data_manager, data_dir=None):
+    """按桌面程序的规则设置存储方式、归档目录和去重用的布隆过滤器文件，返回归档目录
+
+    data_dir 不为空时使用按月分区存储，首次使用时从单文件迁移
+    """
+    if data_dir:
+        storage = PartitionedStorage(data_dir)
+        if not storage.exists() and os.path.exists(data_manager.data_file):
+            storage = migrate_json_file(data_manager.data_file, data_dir)
+        data_manager.partitions = storage
+        archive_dir = os.path.join(data_dir, "archive")
+        data_manager.bloom_path = bloom_path(data_dir, partitioned=True)
+    else:
+        archive_dir = os.path.splitext(data_manager.data_file)[0] + "_archive"
+        data_manager.bloom_path = bloom_path(data_manager.data_file, partitioned=False)
+    archive = ArchiveStore(archive_dir)
+    if archive.exists():
+        data_manager.archive = archive
+    return archive_dir
+
+
+def open_data_manager(data_file=None, data_dir=None):
+    """创建并加载 DataManager，加载过程中的提示信息输出到 stderr，不影响 stdout 的结果"""
+    with contextlib.redirect_stdout(sys.stderr):
+        from models import DataManager
+
+        dm = DataManager()
+        if data_file:
+            dm.data_file = data_file
+        configure_storage(dm, data_dir)
+        dm.load_data()
+    return dm
+
+
+def read_import_file(path):
+    """读取待导入的记录（字典列表），支持 CSV 和 JSON（列表或 accounting_data.json 格式）"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".json"):
+            data = json.load(f)
+            rows = data.get("transactions", []) if isinstance(data, dict) else data
+            if not isinstance(rows, list):
+                raise ValueError(f"{path} 中没有记录列表")
+            return rows
+        return list(csv.DictReader(f))
+
+
+def build_filter(args):
+    return TransactionFilter(
+        search_term=args.search, search_column=args.column, type_filter=args.type,
+        category_filter=args.category, amount_min=args.amount_min, amount_max=args.amount_max,
+        date_start=args.date_start, date_end=args.date_end)
+
+
+def row_values(transaction):
+    return (transaction.date, transaction.type, transaction.category,
+            transaction.amount_text, transaction.note)
+
+
+def cmd_add(dm, args, out):
+    from models import create_transaction
+
+    transaction = create_transaction(args.amount, args.category, args.date, args.type, args.note,
+                                     dm.categories)
+    dm.add_transaction(transaction)
+    print(transaction.transaction_id, file=out)
+    return 0
+
+
+def cmd_import(dm, args, out):
+    from models import create_transaction
+
+    transactions = []
+    errors = 0
+    for line, item in enumerate(read_import_file(args.file), start=1):
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("记录必须是 JSON 对象")
+            transactions.append(create_transaction(
+                item.get("amount"), item.get("category"), item.get("date", ""),
+                item.get("type") or "支出", item.get("note") or "", dm.categories))
+        except ValueError as e:
+            errors += 1
+            print(f"第{line}条: {e}", file=sys.stderr)
+    if errors and not args.skip_invalid:
+        print(f"{errors} 条记录无效，未导入任何记录（使用 --skip-invalid 跳过无效记录）", file=sys.stderr)
+        return 1
+    # 一次性添加，只保存一次；与已有记录重复的跳过
+    result = dm.import_transactions(transactions, skip_duplicates=not args.allow_duplicates)
+    message = f"已导入 {len(result.added)} 条记录"
+    if result.duplicates:
+        message += f"，跳过 {len(result.duplicates)} 条重复记录"
+    print(message, file=out)
+    return 0
+
+
+def cmd_search(dm, args, out):
+    """与预算页的搜索语义一致：先加载日期范围涉及的分区，归档记录排在最后"""
+    transaction_filter = build_filter(args)
+    if transaction_filter.start_ordinal or transaction_filter.end_ordinal:
+        dm.ensure_loaded(transaction_filter.start_ordinal, transaction_filter.end_ordinal)
+    _, rows, archived = dm.search(transaction_filter)
+    rows = rows + archived
+    if args.limit:
+        rows = rows[:args.limit]
+
+    if args.format == "json":
+        json.dump([tx.to_dict() for tx in rows], out, ensure_ascii=False, indent=2)
+        print(file=out)
+    elif args.format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS)
+        writer.writerows(row_values(tx) for tx in rows)
+    else:
+        print("\t".join(HEADERS), file=out)
+        for transaction in rows:
+            print("\t".join(row_values(transaction)), file=out)
+    return 0
+
+
+def cmd_monthly(dm, args, out):
+    """月度概览，与预算页的 calculate_monthly_data 一致"""
+    if args.month:
+        first = parse_date(f"{args.month}-01")[0]
+        if first is None or len(args.month) != 7:
+            print("月份格式应为YYYY-MM", file=sys.stderr)
+            return 2
+        index = int(args.month[:4]) * 12 + int(args.month[5:]) - 1
+        dm.ensure_loaded(first, first + days_in_month(int(args.month[:4]), int(args.month[5:])) - 1)
+    else:
+        index = current_month_index()
+    expense, income = dm.budget_tracker.month_totals(index)
+    budget = to_cents(dm.budgets[0].amount)
+    print(f"月份: {month_key(index)}", file=out)
+    print(f"预算: {format_cents(budget)}", file=out)
+    print(f"支出: {format_cents(expense)}", file=out)
+    print(f"收入: {format_cents(income)}", file=out)
+    balance = budget - expense
+    print(f"余额: {format_cents(balance)}" if balance >= 0 else f"超支: {format_cents(-balance)}", file=out)
+    return 0
+
+
+def cmd_stats(dm, args, out):
+    """统计页的数据：按日或按月的收支以及各类别支出"""
+    dm.ensure_loaded()
+    daily = args.mode == "daily"
+    expense, income, categories = dm.aggregate(daily)
+
+    if args.format == "json":
+        json.dump({"expense_cents": expense, "income_cents": income, "category_cents": categories},
+                  out, ensure_ascii=False, indent=2)
+        print(file=out)
+        return 0
+    print("日期\t支出\t收入", file=out)
+    for key in sorted(set(expense) | set(income)):
+        print(f"{key}\t{format_cents(expense.get(key, 0))}\t{format_cents(income.get(key, 0))}", file=out)
+    print(file=out)
+    print("类别\t支出", file=out)
+    for category, cents in categories.items():
+        if cents:
+            print(f"{category}\t{format_cents(cents)}", file=out)
+    return 0
+
+
+def cmd_sync(dm, args, out):
+    """与另一份账本双向同步，只比较两边不同的月份；不加载 DataManager"""
+    from sync import sync
+
+    local = args.data_dir or args.data_file or DEFAULT_DATA_FILE
+    result = sync(local, args.remote, args.base)
+    print(f"比较了 {result.months_compared} 个月份", file=out)
+    print(f"本地: 新增 {result.added_local} 条，删除 {result.deleted_local} 条", file=out)
+    print(f"远端: 新增 {result.added_remote} 条，删除 {result.deleted_remote} 条", file=out)
+    if result.conflicts:
+        print(f"{len(result.conflicts)} 条记录两边都修改过，已保留本地版本", file=out)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="记账本命令行工具")
+    parser.add_argument("--data-file", help="账本文件，默认为 accounting_data.json")
+    parser.add_argument("--data-dir", default=os.environ.get("BUDGET_DATA_DIR"),
+                        help="按月分区存储的目录，默认取 BUDGET_DATA_DIR")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="添加一条交易记录")
+    add.add_argument("amount")
+    add.add_argument("category")
+    add.add_argument("date", help="YYYY-MM-DD")
+    add.add_argument("--type", default="支出", choices=("支出", "收入"))
+    add.add_argument("--note", default="")
+    add.set_defaults(handler=cmd_add)
+
+    bulk = commands.add_parser("import", help="从 CSV 或 JSON 文件批量导入")
+    bulk.add_argument("file")
+    bulk.add_argument("--skip-invalid", action="store_true", help="跳过无效记录，导入其余记录")
+    bulk.add_argument("--allow-duplicates", action="store_true",
+                      help="不检查重复，与已有记录相同的也导入")
+    bulk.set_defaults(handler=cmd_import)
+
+    search = commands.add_parser("search", help="搜索交易记录（最新的在前面）")
+    search.add_argument("--search", default="", help="搜索关键字")
+    search.add_argument("--column", default="全部", choices=("全部",) + HEADERS)
+    search.add_argument("--type", default="全部")
+    search.add_argument("--category", default="全部")
+    search.add_argument("--amount-min", default="")
+    search.add_argument("--amount-max", default="")
+    search.add_argument("--date-start", default="")
+    search.add_argument("--date-end", default="")
+    search.add_argument("--limit", type=int, default=0, help="最多输出的条数，0 表示不限")
+    search.add_argument("--format", default="table", choices=("table", "csv", "json"))
+    search.set_defaults(handler=cmd_search)
+
+    monthly = commands.add_parser("monthly", help="月度概览")
+    monthly.add_argument("--month", help="YYYY-MM，默认为本月")
+    monthly.set_defaults(handler=cmd_monthly)
+
+    stats = commands.add_parser("stats", help="收支统计")
+    stats.add_argument("--mode", default="monthly", choices=("daily", "monthly"))
+    stats.add_argument("--format", default="table", choices=("table", "json"))
+    stats.set_defaults(handler=cmd_stats)
+
+    sync = commands.add_parser("sync", help="与另一份账本（单文件或分区目录）双向合并")
+    sync.add_argument("remote", help="另一份账本的文件或目录")
+    sync.add_argument("--base", help="同步基准目录，默认在本地账本旁边；与多个账本同步时各用一个")
+    sync.set_defaults(handler=cmd_sync, needs_ledger=False)
+    return parser
+
+
+def main(argv=None, out=None):
+    args = build_parser().parse_args(argv)
+    out = out or sys.stdout
+    dm = open_data_manager(args.data_file, args.data_dir) if getattr(args, "needs_ledger", True) else None
+    try:
+        return args.handler(dm, args, out)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
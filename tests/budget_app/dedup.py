@@ -0,0 +1,150 @@
+"""导入时的重复记录检测
+
+每条交易按规范化后的 (日期, 金额, 类型, 类别, 备注) 计算 blake2b 指纹。
+内存中的指纹计数表回答"账本中有几条相同的记录"，每行 O(1)；
+可选的布隆过滤器保存在磁盘上，覆盖全部历史（包括未加载的分区和归档），
+指纹不在过滤器中的记录一定是新记录，不需要加载任何历史数据，
+只有过滤器命中的记录才去加载对应日期的分区或归档做精确比较。
+
+重复按多重集合计算：账本中有两条相同的记录时，导入的第三条才算新记录，
+因此同一天两笔相同的消费不会被误判。
+"""
+import math
+import os
+import struct
+from collections import Counter
+from hashlib import blake2b
+
+BLOOM_FILE = "dedup.bloom"
+BLOOM_MAGIC = b"BLM1"
+_HEADER = struct.Struct("<4sQIQQ")  # 标识, 位数, 哈希个数, 已加入个数, 设计容量
+
+
+def fingerprint(transaction):
+    """交易记录的 16 字节指纹，忽略交易ID、备注的大小写和多余空白"""
+    date = transaction.date_ordinal if transaction.date_ordinal is not None else str(transaction.date).strip()
+    note = " ".join(str(transaction.note or "").split()).casefold()
+    key = (date, transaction.amount_cents, transaction.type, str(transaction.category).strip(), note)
+    return blake2b(repr(key).encode("utf-8"), digest_size=16).digest()
+
+
+def bloom_path(ledger_path, partitioned=None):
+    """账本对应的布隆过滤器文件：分区目录中的 dedup.bloom，单文件旁边的 <文件名>_dedup.bloom
+
+    partitioned 为 None 时按路径是否为目录判断
+    """
+    if partitioned is None:
+        partitioned = os.path.isdir(ledger_path)
+    if partitioned:
+        return os.path.join(ledger_path, BLOOM_FILE)
+    return os.path.splitext(ledger_path)[0] + "_" + BLOOM_FILE
+
+
+def invalidate_bloom(ledger_path):
+    """账本被 DataManager 以外的途径（例如同步）修改后删除它的布隆过滤器，下次导入时重新建立"""
+    path = bloom_path(ledger_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class BloomFilter:
+    """布隆过滤器，按指纹的两半做双重哈希"""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.count = 0
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, digest):
+        bits = self.bits
+        for position in self._positions(digest):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    @property
+    def saturated(self):
+        """加入的记录超过设计容量，误判率已明显上升"""
+        return self.count > self.capacity
+
+    def save(self, path):
+        """原子写入文件"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(BLOOM_MAGIC, self.size, self.hashes, self.count, self.capacity))
+            f.write(self.bits)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """读取文件，文件不存在或格式不对时返回 None"""
+        try:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER.size)
+                bits = f.read()
+        except OSError:
+            return None
+        if len(header) != _HEADER.size:
+            return None
+        magic, size, hashes, count, capacity = _HEADER.unpack(header)
+        if magic != BLOOM_MAGIC or len(bits) != (size + 7) // 8:
+            return None
+        bloom = cls.__new__(cls)
+        bloom.size, bloom.hashes, bloom.count, bloom.capacity = size, hashes, count, capacity
+        bloom.bits = bytearray(bits)
+        return bloom
+
+
+class DuplicateIndex:
+    """账本中各指纹的出现次数，第一次查询时建立，之后随交易增删更新"""
+
+    def __init__(self):
+        self._counts = None
+
+    @property
+    def built(self):
+        return self._counts is not None
+
+    def rebuild(self, transactions):
+        """数据整体变化时丢弃计数，下次查询时重新建立"""
+        self._counts = None
+
+    def ensure_built(self, transactions):
+        if self._counts is None:
+            self._counts = Counter(map(fingerprint, transactions))
+
+    def add(self, transaction):
+        if self._counts is not None:
+            self._counts[fingerprint(transaction)] += 1
+
+    def remove(self, transaction):
+        if self._counts is not None:
+            digest = fingerprint(transaction)
+            self._counts[digest] -= 1
+            if self._counts[digest] <= 0:
+                del self._counts[digest]
+
+    def count(self, digest):
+        return self._counts.get(digest, 0)
+
+
+class ImportResult:
+    """一次导入的结果：新增的记录和被判定为重复而跳过的记录"""
+
+    def __init__(self, added=(), duplicates=()):
+        self.added = list(added)
+        self.duplicates = list(duplicates)
+
+    def __repr__(self):
+        return f"ImportResult(added={len(self.added)}, duplicates={len(self.duplicates)})"
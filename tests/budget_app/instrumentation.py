@@ -0,0 +1,176 @@
+"""轻量级性能埋点：计时区间（span）与计数器
+
+默认关闭，此时 span() 返回共享的空对象，几乎没有额外开销。
+设置环境变量 BUDGET_TRACE=<文件路径> 或调用 enable(path) 开启后，
+每个区间结束时向 JSONL 文件写入一行记录，同时在内存中累计各区间的耗时统计。
+
+用法:
+    with span("search") as s:
+        ...
+        s.count("rows_scanned", n)
+
+    @traced("load")
+    def load_data(self): ...
+"""
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+_enabled = False
+_trace_file = None
+_lock = threading.Lock()
+_local = threading.local()
+_stats = {}  # 区间名 -> [次数, 总耗时, 最大耗时]
+
+
+class _NullSpan:
+    """关闭埋点时使用的空区间"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def count(self, name, n=1):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一次计时区间，可记录计数器和附加字段"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+        self.counters = {}
+        self.start = None
+        self.duration = None
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        _stack().pop()
+        _record(self, exc_type)
+        return False
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _record(span_obj, exc_type):
+    record = {
+        "ts": round(time.time(), 6),
+        "span": span_obj.name,
+        "ms": round(span_obj.duration * 1000, 3),
+        "parent": span_obj.parent,
+        "depth": span_obj.depth,
+        "thread": threading.current_thread().name,
+    }
+    if span_obj.counters:
+        record["counters"] = span_obj.counters
+    if span_obj.fields:
+        record.update(span_obj.fields)
+    if exc_type is not None:
+        record["error"] = exc_type.__name__
+
+    with _lock:
+        stats = _stats.setdefault(span_obj.name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += span_obj.duration
+        stats[2] = max(stats[2], span_obj.duration)
+        if _trace_file is not None:
+            _trace_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            _trace_file.flush()
+
+
+def span(name, **fields):
+    """创建计时区间，埋点关闭时返回空对象"""
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, fields)
+
+
+def count(name, n=1):
+    """给当前线程最内层的区间累加计数器"""
+    if not _enabled:
+        return
+    stack = _stack()
+    if stack:
+        stack[-1].count(name, n)
+
+
+def traced(name=None):
+    """把函数整体作为一个计时区间的装饰器"""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(label, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable(path=None):
+    """开启埋点，path 不为空时把记录追加写入该 JSONL 文件"""
+    global _enabled, _trace_file
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = open(path, "a", encoding="utf-8") if path else None
+        _enabled = True
+
+
+def disable():
+    """关闭埋点"""
+    global _enabled, _trace_file
+    with _lock:
+        _enabled = False
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+
+
+def is_enabled():
+    return _enabled
+
+
+def summary():
+    """返回各区间的累计统计 {名称: {count, total_ms, max_ms}}，按总耗时降序"""
+    with _lock:
+        items = sorted(_stats.items(), key=lambda item: item[1][1], reverse=True)
+        return {name: {"count": c, "total_ms": round(total * 1000, 3), "max_ms": round(peak * 1000, 3)}
+                for name, (c, total, peak) in items}
+
+
+def reset():
+    """清空累计统计"""
+    with _lock:
+        _stats.clear()
+
+
+if os.environ.get("BUDGET_TRACE"):
+    enable(os.environ["BUDGET_TRACE"])
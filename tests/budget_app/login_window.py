@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import messagebox
 from models import users
+from stall_watchdog import StallWatchdog
 
 
 class LoginWindow:
@@ -10,6 +11,7 @@ class LoginWindow:
         self.window.title("记账管理系统 - 登录")
         self.window.geometry("300x200")
         self.window.resizable(False, False)
+        self.watchdog = StallWatchdog.from_env(self.window)
 
         self.create_widgets()
 
@@ -41,6 +43,9 @@ class LoginWindow:
         # 验证登录
         for user in users:
             if user.username == username and user.password == password:
+                # 登录成功后主窗口在本回调内运行，先停止卡顿检测
+                if self.watchdog:
+                    self.watchdog.stop()
                 self.window.destroy()
                 self.on_login_success()
                 return
@@ -49,3 +54,5 @@ class LoginWindow:
 
     def run(self):
         self.window.mainloop()
+        if self.watchdog:
+            self.watchdog.stop()
@@ -1,16 +1,47 @@
 from login_window import LoginWindow
 from main_window import MainWindow
 from models import data_manager
+from archive import ArchiveStore
+from cli import configure_storage
+from utils import parse_date
+import instrumentation
+import os
 
 def main():
+    # 设置 BUDGET_DATA_DIR 时使用按月分区存储，首次使用时从单文件迁移
+    archive_dir = configure_storage(data_manager, os.environ.get("BUDGET_DATA_DIR"))
+
+    # 设置 BUDGET_ARCHIVE_BEFORE=YYYY-MM-DD 时把更早的记录移入压缩归档
+    archive_before = os.environ.get("BUDGET_ARCHIVE_BEFORE")
+    if archive_before and data_manager.archive is None:
+        data_manager.archive = ArchiveStore(archive_dir)
+
     # 加载数据
     data_manager.load_data()
+    if archive_before:
+        cutoff = parse_date(archive_before)[0]
+        if cutoff is None:
+            print(f"BUDGET_ARCHIVE_BEFORE 日期格式错误: {archive_before}")
+        else:
+            print(f"已归档 {data_manager.archive_before(cutoff)} 条记录")
     def on_login_success():
         main_app = MainWindow()
+        # 设置 BUDGET_SERVER_PORT 时启动本地查询服务，写操作交给 Tk 主线程执行
+        port = os.environ.get("BUDGET_SERVER_PORT")
+        if port:
+            from server import TkDispatcher, start_in_thread
+            server = start_in_thread(data_manager, port=int(port),
+                                     dispatcher=TkDispatcher(main_app.window))
+            print(f"查询服务监听 http://127.0.0.1:{server.port}")
         main_app.run()
     
     login_app = LoginWindow(on_login_success)
     login_app.run()
 
+    # 开启埋点时（BUDGET_TRACE）退出前输出各阶段耗时汇总
+    if instrumentation.is_enabled():
+        for name, stats in instrumentation.summary().items():
+            print(f"{name:<20}{stats['count']:>6}次  共{stats['total_ms']:>10.1f}ms  最长{stats['max_ms']:>8.1f}ms")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
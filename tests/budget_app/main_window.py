@@ -2,6 +2,7 @@ import tkinter as tk
 from transaction_window import TransactionWindow
 from statistics_window import StatisticsWindow
 from budget_window import BudgetWindow
+from stall_watchdog import StallWatchdog
 
 
 class MainWindow:
@@ -9,9 +10,12 @@ class MainWindow:
         self.window = tk.Tk()
         self.window.title("记账管理系统")
         self.window.geometry("800x600")
+        # 卡顿检测需要在创建控件之前启动
+        self.watchdog = StallWatchdog.from_env(self.window)
 
         self.current_window = None
         self.windows = {}
+        self.window_classes = {}
 
         self.create_navigation()
         self.create_windows()
@@ -36,10 +40,16 @@ class MainWindow:
             btn.pack(side="left", fill="x", expand=True)
 
     def create_windows(self):
-        # 创建各个功能窗口
-        self.windows["transaction"] = TransactionWindow(self.window)
-        self.windows["statistics"] = StatisticsWindow(self.window)
-        self.windows["budget"] = BudgetWindow(self.window)
+        # 登记各个功能窗口，首次切换到该页时才创建
+        self.window_classes["transaction"] = TransactionWindow
+        self.window_classes["statistics"] = StatisticsWindow
+        self.window_classes["budget"] = BudgetWindow
+
+    def get_window(self, window_key):
+        """返回功能窗口，尚未创建时先创建"""
+        if window_key not in self.windows:
+            self.windows[window_key] = self.window_classes[window_key](self.window)
+        return self.windows[window_key]
 
     def show_window(self, window_key):
         # 隐藏当前窗口
@@ -47,8 +57,11 @@ class MainWindow:
             self.current_window.hide()
 
         # 显示新窗口
-        self.current_window = self.windows[window_key]
+        self.current_window = self.get_window(window_key)
         self.current_window.show()
 
     def run(self):
         self.window.mainloop()
+        if self.watchdog:
+            self.watchdog.stop()
+            print(self.watchdog.format_report())
@@ -1,6 +1,20 @@
 import json
-import os
+import threading
+import uuid
+from collections import Counter
+from collections.abc import Sequence
 from datetime import datetime
+from functools import wraps
+from utils import parse_date, month_key, ordinal_month_index, current_month_index, validate_date
+from money import to_cents, format_cents
+from backends import FileBackend
+from budget_engine import BudgetTracker
+from instrumentation import count, traced
+from storage import UNKNOWN_PARTITION, partition_key
+from category_registry import DEFAULT_CATEGORIES, category_code, registry
+from dedup import BloomFilter, ImportResult, fingerprint
+from trends import ARCHIVED, FORECAST_WINDOW, WINDOWS, project_month_end
+from queries import QueryCache, aggregate_transactions, filter_archived, filter_transactions, merge_aggregates
 
 
 class User:
@@ -10,15 +24,86 @@ class User:
         self.role = role
 
 
+_last_transaction_ms = 0
+_id_lock = threading.Lock()
+
+
+def new_transaction_id():
+    """生成交易ID：毫秒时间戳（同一毫秒内依次递增，线程安全）加随机后缀
+
+    时间戳使 ID 大致按创建先后排列，随机后缀保证不同设备上创建的记录不会重复（同步按 ID 合并）
+    """
+    global _last_transaction_ms
+    with _id_lock:
+        _last_transaction_ms = max(int(datetime.now().timestamp() * 1000), _last_transaction_ms + 1)
+        timestamp = _last_transaction_ms
+    return f"txn_{timestamp}_{uuid.uuid4().hex[:16]}"
+
+
 class Transaction:
     def __init__(self, amount, category, date, type_, note=""):
-        self.transaction_id = f"txn_{int(datetime.now().timestamp() * 1000)}"
+        self.transaction_id = new_transaction_id()
         self.amount = amount
         self.category = category
         self.date = date
         self.type = type_  # "支出" 或 "收入"
         self.note = note
 
+    @property
+    def amount(self):
+        return self._amount
+
+    @amount.setter
+    def amount(self, value):
+        # 原值原样保存以保证 JSON 往返无损，计算统一使用整数分
+        self._amount = value
+        self.amount_str = str(value)
+        try:
+            self.amount_cents = to_cents(value)
+            self.amount_text = format_cents(self.amount_cents)
+        except (ValueError, TypeError):
+            # 非法金额按 0 计入统计
+            self.amount_cents = 0
+            self.amount_text = self.amount_str
+
+    @property
+    def category(self):
+        return self._category
+
+    @category.setter
+    def category(self, value):
+        # 同时保存类别编码，分组和筛选按整数比较；只查询不注册，新类别由 DataManager 添加时注册
+        self._category = value
+        self._category_code = registry.lookup(value)
+
+    @property
+    def category_code(self):
+        """类别编码，类别尚未注册时为 None（注册后再次读取时补上）"""
+        code = self._category_code
+        if code is None:
+            code = self._category_code = registry.lookup(self._category)
+        return code
+
+    @property
+    def date(self):
+        return self._date
+
+    @date.setter
+    def date(self, value):
+        # 日期在写入时解析一次，之后的比较和分组都使用整数
+        self._date = value
+        try:
+            self.date_ordinal, self.month_index = parse_date(value)
+        except TypeError:
+            self.date_ordinal, self.month_index = None, None
+
+    @property
+    def month_key(self):
+        """所属月份 "YYYY-MM"，日期无法解析时为 None"""
+        if self.month_index is None:
+            return None
+        return month_key(self.month_index)
+
     def to_dict(self):
         return {
             'transaction_id': self.transaction_id,
@@ -42,94 +127,698 @@ class Transaction:
         return transaction
 
 
+TRANSACTION_TYPES = ("支出", "收入")
+
+
+def create_transaction(amount, category, date, type_="支出", note="", categories=None):
+    """校验输入并创建交易记录，校验规则与添加记录页一致，不合法时抛出 ValueError"""
+    try:
+        cents = to_cents(amount)
+    except (ValueError, TypeError):
+        raise ValueError("请输入有效的金额！")
+    if cents <= 0:
+        raise ValueError("金额必须大于0！")
+    if not category or (categories is not None and category not in categories):
+        raise ValueError("请选择类别！")
+    if type_ not in TRANSACTION_TYPES:
+        raise ValueError(f"类型必须为{'或'.join(TRANSACTION_TYPES)}")
+    parts = str(date).split("-")
+    is_valid, message = validate_date(*parts) if len(parts) == 3 else (False, "日期格式应为YYYY-MM-DD")
+    if not is_valid:
+        raise ValueError(f"日期无效: {message}")
+    year, month, day = (int(part) for part in parts)
+    # 与添加记录页一样保存为数值（按分取整），不保存命令行或请求中的原始字符串
+    return Transaction(cents / 100, category, f"{year}-{month:02d}-{day:02d}", type_, note)
+
+
 class Budget:
-    def __init__(self, amount, period=None):
+    def __init__(self, amount, period="monthly", category=None):
         self.budget_id = f"budget_1"
         self.amount = amount
-        self.period = period
+        self.period = period  # "weekly"、"monthly" 或 "yearly"
+        self.category = category  # None 表示全部类别
 
     def to_dict(self):
         return {
             'budget_id': self.budget_id,
             'amount': self.amount,
-            'period': self.period
+            'period': self.period,
+            'category': self.category
         }
 
     @classmethod
     def from_dict(cls, data):
-        budget = cls(data['amount'], data.get('period', 'monthly'))
+        budget = cls(data['amount'], data.get('period') or 'monthly', data.get('category'))
         budget.budget_id = data['budget_id']
         return budget
 
 
+class LedgerChange:
+    """交易数据变更事件
+
+    added 为新增的交易记录，removed 为被删除的交易ID，reset 为 True 时表示数据整体重新加载
+    """
+
+    def __init__(self, version, added=(), removed=(), reset=False):
+        self.version = version
+        self.added = list(added)
+        self.removed = list(removed)
+        self.reset = reset
+
+
+def _locked(method):
+    """在 DataManager 的写锁内执行"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class LedgerSnapshot:
+    """某一版本的交易记录，rows 为不可变元组
+
+    由 DataManager.snapshot 取得时还带有同一时刻的类别列表和归档索引，后台线程汇总时不需要再读 DataManager
+    """
+    __slots__ = ("version", "rows", "categories", "archive_index")
+
+    def __init__(self, version, rows, categories=None, archive_index=None):
+        self.version = version
+        self.rows = rows
+        self.categories = categories
+        self.archive_index = archive_index
+
+
+class Ledger(Sequence):
+    """唯一的交易记录账本
+
+    写操作在锁内生成新的元组（写时复制），读操作直接遍历当时的元组，无需加锁，
+    也不会受到并发写入的影响。支持列表的常用只读操作以及 append/extend/clear。
+    """
+
+    def __init__(self, rows=()):
+        self.lock = threading.RLock()
+        self._rows = tuple(rows)
+        self.version = 0
+
+    def snapshot(self):
+        """返回当前版本的快照"""
+        with self.lock:
+            return LedgerSnapshot(self.version, self._rows)
+
+    def replace(self, rows):
+        with self.lock:
+            self._rows = tuple(rows)
+            self.version += 1
+
+    def append(self, transaction):
+        with self.lock:
+            self._rows += (transaction,)
+            self.version += 1
+
+    def extend(self, transactions):
+        with self.lock:
+            self._rows += tuple(transactions)
+            self.version += 1
+
+    def clear(self):
+        self.replace(())
+
+    def remove_where(self, predicate):
+        """移除满足条件的记录，返回被移除的记录列表"""
+        with self.lock:
+            kept = []
+            removed = []
+            for tx in self._rows:
+                (removed if predicate(tx) else kept).append(tx)
+            if removed:
+                self.replace(kept)
+            return removed
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __reversed__(self):
+        return reversed(self._rows)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def __eq__(self, other):
+        if isinstance(other, Ledger):
+            other = other._rows
+        try:
+            return self._rows == tuple(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Ledger(version={self.version}, rows={len(self._rows)})"
+
+
 class DataManager:
-    def __init__(self):
+    """数据管理器
+
+    所有写操作都持有 lock（可重入），保证账本、预算统计、文件和变更事件的顺序一致；
+    后台线程读取数据时使用 snapshot() 即可，不需要加锁。
+    """
+
+    def __init__(self, partitions=None, archive=None, backend=None):
         self.data_file = "accounting_data.json"
+        # 单文件账本的读写后端，默认为本地文件；测试时可以换成 backends.MemoryBackend
+        self.backend = backend if backend is not None else FileBackend()
+        # 为 PartitionedStorage 时按月分区存储，启动时只加载近期分区
+        self.partitions = partitions
+        self.loaded_partitions = set()
+        # 为 ArchiveStore 时，早于截止日期的记录保存在压缩归档中
+        self.archive = archive
+        # 设置后在该文件中维护覆盖全部历史的布隆过滤器，导入去重时先用它筛选
+        self.bloom_path = None
+        self._bloom = None
         self.users = []
-        self.transactions = []
+        self.ledger = Ledger()
+        self.lock = self.ledger.lock
         self.budgets = []
-        self.categories = ["餐饮", "购物", "交通", "住房", "娱乐", "医疗", "教育", "其他"]
+        self.categories = list(DEFAULT_CATEGORIES)  # 可选的类别，包括用户自定义的类别
+        self.budget_tracker = BudgetTracker()
+        self.query_cache = QueryCache()  # 筛选和汇总结果，账本变更后失效
+        self.version = 0  # 每次交易数据变更时递增
+        self._listeners = []
 
         # 初始化默认数据
         self.initialize_default_data()
 
+    @property
+    def transactions(self):
+        """交易记录账本，始终是同一个 Ledger 对象，模块级别名不会过期"""
+        return self.ledger
+
+    @transactions.setter
+    def transactions(self, rows):
+        self.ledger.replace(rows)
+
+    @_locked
+    def snapshot(self):
+        """供后台线程使用的当前数据快照：交易记录、类别列表和归档索引在锁内一起取得"""
+        snapshot = self.ledger.snapshot()
+        snapshot.categories = tuple(self.categories)
+        snapshot.archive_index = self.archive.index if self.archive is not None else None
+        return snapshot
+
     def initialize_default_data(self):
         """初始化默认数据"""
-        self.users = [User("admin", "admin", "administrator")]
+        self.users[:] = [User("admin", "admin", "administrator")]
         if not self.budgets:
-            self.budgets = [Budget(5000)]
+            self.budgets[:] = [Budget(5000)]
 
+    @_locked
+    @traced("load")
     def load_data(self):
-        """从文件加载数据"""
-        if not os.path.exists(self.data_file):
+        """从文件加载数据
+
+        文件不存在时初始化默认数据并创建文件；内容损坏时回退到默认数据，
+        原内容备份为 <文件名>.corrupt，之后的保存不会覆盖掉它
+        """
+        if self.partitions is not None:
+            self._load_recent_partitions()
+        else:
+            self._load_json_file()
+        self._finish_archive()
+
+    def _load_json_file(self):
+        if not self.backend.exists(self.data_file):
+            self.initialize_default_data()
             self.save_data()  # 创建初始文件
             return
 
         print(f"加载数据中")
-        with open(self.data_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        raw = None
+        try:
+            raw = self.backend.read(self.data_file)
+            categories, transactions, budgets = self._parse_data(raw)
+        except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+            print(f"加载数据失败: {e}")
+            self._load_defaults(raw)
+            return
 
-        # 加载交易记录
-        self.transactions = [Transaction.from_dict(
-            tx_data) for tx_data in data.get('transactions', [])]
-        # 加载预算
-        self.budgets = [Budget.from_dict(budget_data)
-                        for budget_data in data.get('budgets', [])]
+        # 加载类别和交易记录
+        self._load_categories(categories)
+        self.transactions = transactions
+        self._adopt_categories(self.transactions)
+        count("rows", len(self.transactions))
+        self._rebuild_totals()
+        # 加载预算，如果没有预算数据，创建默认预算
+        self.budgets[:] = budgets or [Budget(5000)]
+        self._notify(reset=True)
+        print(f"加载完成")
+
+    @staticmethod
+    def _parse_data(raw):
+        """解析单文件账本的内容，返回 (类别, 交易记录, 预算)；格式不对时抛出异常，不修改任何状态"""
+        data = json.loads(raw.decode('utf-8'))
+        if not isinstance(data, dict):
+            raise ValueError("数据文件格式错误")
+        categories = data.get('categories')
+        if categories is not None and not (isinstance(categories, list)
+                                           and all(isinstance(name, str) for name in categories)):
+            raise ValueError("类别列表格式错误")
+        transactions = [Transaction.from_dict(tx_data) for tx_data in data.get('transactions', [])]
+        budgets = [Budget.from_dict(budget_data) for budget_data in data.get('budgets', [])]
+        return categories, transactions, budgets
+
+    def _load_defaults(self, raw=None):
+        """数据损坏时回退到默认数据，raw 为读到的原内容"""
+        if raw:
+            try:
+                self.backend.write(self.data_file + ".corrupt", raw)
+            except OSError as e:
+                print(f"备份损坏的数据失败: {e}")
+        self._load_categories(None)
+        self.transactions = []
+        self._rebuild_totals()
+        self.budgets[:] = [Budget(5000)]
+        self._notify(reset=True)
+
+    def _load_recent_partitions(self):
+        """加载分区清单以及近期分区（今年以来和上个月，足够计算各周期预算）"""
+        if not self.partitions.exists():
+            self.save_data()  # 创建初始清单
+            return
+
+        manifest = self.partitions.read_manifest()
+        current = current_month_index()
+        recent = min(current - current % 12, current - 1)
+        keys = self.partitions.overlapping_keys(start_month=recent)
+        if UNKNOWN_PARTITION in manifest['partitions']:
+            keys.append(UNKNOWN_PARTITION)
 
-        # 如果没有预算数据，创建默认预算
+        self.loaded_partitions = set()
+        self._load_categories(manifest.get('categories'))
+        self.transactions = self._read_partitions(keys)
+        self._adopt_categories(self.transactions)
+        count("rows", len(self.transactions))
+        self._rebuild_totals()
+        self.budgets[:] = [Budget.from_dict(budget_data) for budget_data in manifest['budgets']]
         if not self.budgets:
-            self.budgets = [Budget(5000)]
-        print(f"加载完成")
+            self.budgets[:] = [Budget(5000)]
+        self._notify(reset=True)
+
+    def _load_categories(self, names):
+        """恢复保存的类别列表（保持原对象，模块级别名不会过期），并按保存的顺序注册编码"""
+        self.categories[:] = names or DEFAULT_CATEGORIES
+        for name in self.categories:
+            category_code(name)
+
+    def _adopt_categories(self, transactions):
+        """交易中出现、但不在类别列表中的类别追加到列表末尾并注册编码"""
+        known = set(self.categories)
+        for name in {tx.category for tx in transactions} - known:
+            if name:
+                self.categories.append(name)
+                category_code(name)
+
+    @_locked
+    def add_category(self, name):
+        """添加自定义类别并保存，返回类别编码；名称为空或已存在时抛出 ValueError"""
+        name = (name or "").strip()
+        if not name:
+            raise ValueError("类别名称不能为空！")
+        if name in self.categories:
+            raise ValueError(f"类别“{name}”已存在！")
+        self.categories.append(name)
+        self.save_data(partitions=())  # 分区存储时只更新清单
+        return category_code(name)
+
+    def _rebuild_totals(self):
+        """重建预算统计；累计收支索引和每天的支出还要计入归档部分，结余和移动平均才是完整的"""
+        self.budget_tracker.rebuild(self.transactions)
+        if self.archive is not None:
+            expense_data, income_data, _ = self.archive.summary(daily=True)
+            for is_expense, data in ((True, expense_data), (False, income_data)):
+                for day, cents in data.items():
+                    ordinal = parse_date(day)[0]
+                    self.budget_tracker.balance.add_amount(ordinal, is_expense, cents)
+                    if is_expense and ordinal is not None:
+                        self.budget_tracker.daily.add_amount(ordinal, ARCHIVED, cents)
+
+    def _read_partitions(self, keys):
+        rows = []
+        for key in sorted(keys):
+            rows.extend(Transaction.from_dict(tx_data) for tx_data in self.partitions.read_partition(key))
+            self.loaded_partitions.add(key)
+        return rows
+
+    @_locked
+    @traced("load_partitions")
+    def ensure_loaded(self, start_ordinal=None, end_ordinal=None):
+        """确保日期范围内（序数日，None 表示不限）的历史分区都已加载，返回是否加载了新分区"""
+        if self.partitions is None:
+            return False
+        start_month = ordinal_month_index(start_ordinal) if start_ordinal else None
+        end_month = ordinal_month_index(end_ordinal) if end_ordinal else None
+        missing = [key for key in self.partitions.overlapping_keys(start_month, end_month)
+                   if key not in self.loaded_partitions]
+        if not missing:
+            return False
 
-        #except Exception as e:
-        #    print(f"加载数据失败: {e}")
-        #    # 如果加载失败，使用默认数据
-        #    self.initialize_default_data()
+        # 历史分区比已加载的数据更早，放在前面
+        rows = self._read_partitions(missing)
+        self._adopt_categories(rows)
+        count("rows", len(rows))
+        self.budget_tracker.add_many(rows)
+        self.ledger.replace(rows + list(self.ledger))
+        self._notify(reset=True)
+        return True
+
+    @_locked
+    @traced("save")
+    def save_data(self, partitions=None):
+        """保存数据到文件，返回是否保存成功
+
+        分区存储时只写入 partitions 指定的分区（默认为全部已加载分区）以及清单
+        """
+        if self.partitions is not None:
+            return self._save_partitions(self.loaded_partitions if partitions is None else partitions)
 
-    def save_data(self):
-        """保存数据到文件"""
         try:
             data = {
-                'transactions': [tx.to_dict() for tx in self.transactions],
-                'budgets': [budget.to_dict() for budget in self.budgets]
+                'transactions': [tx.to_dict() for tx in self.ledger.snapshot().rows],
+                'budgets': [budget.to_dict() for budget in self.budgets],
+                'categories': list(self.categories)
             }
 
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+            self.backend.write(self.data_file, payload)
+            count("rows", len(data['transactions']))
+            return True
 
         except Exception as e:
             print(f"保存数据失败: {e}")
+            return False
 
+    def _save_partitions(self, keys):
+        """写入指定分区，其余分区文件不动"""
+        keys = set(keys)
+        rows_by_key = {key: [] for key in keys}
+        if keys:
+            for tx in self.ledger.snapshot().rows:
+                key = partition_key(tx)
+                if key in rows_by_key:
+                    rows_by_key[key].append(tx)
+        try:
+            self.partitions.write(rows_by_key, [budget.to_dict() for budget in self.budgets],
+                                  list(self.categories))
+            count("rows", sum(len(rows) for rows in rows_by_key.values()))
+            return True
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            return False
+
+    @_locked
     def delete_transactions(self, transaction_ids):
-        """删除指定的交易记录"""
-        self.transactions = [
-            tx for tx in self.transactions if tx.transaction_id not in transaction_ids]
-        self.save_data()
+        """删除指定的交易记录，返回被删除的记录"""
+        transaction_ids = set(transaction_ids)
+        return self._remove_where(lambda tx: tx.transaction_id in transaction_ids)[0]
+
+    def _remove_where(self, predicate):
+        """移除满足条件的交易记录并保存，返回 (被移除的记录, 是否保存成功)"""
+        removed = self.ledger.remove_where(predicate)
+        self.budget_tracker.add_many(removed, -1)
+        saved = self.save_data(partitions={partition_key(tx) for tx in removed})
+        self._notify(removed=[tx.transaction_id for tx in removed])
+        return removed, saved
+
+    @_locked
+    def archive_before(self, cutoff_ordinal):
+        """把早于截止日期（序数日）的交易记录移入压缩归档，返回归档的条数"""
+        if self.archive is None:
+            raise ValueError("未配置归档目录")
+        self.ensure_loaded(end_ordinal=cutoff_ordinal)
+        old = [tx for tx in self.transactions
+               if tx.date_ordinal is not None and tx.date_ordinal < cutoff_ordinal]
+        self.archive.archive(old, cutoff_ordinal)
+        # 索引已提交，再把记录移出账本；账本保存成功后才确认归档完成
+        old_ids = {id(tx) for tx in old}
+        if self._remove_where(lambda tx: id(tx) in old_ids)[1]:
+            self.archive.commit()
+        # 归档的记录仍然计入累计收支和每天的支出
+        for tx in old:
+            self.budget_tracker.balance.add(tx)
+            if tx.type == "支出":
+                self.budget_tracker.daily.add_amount(tx.date_ordinal, ARCHIVED, tx.amount_cents)
+        return len(old)
+
+    def _finish_archive(self):
+        """上次归档在记录移出账本之前中断时（索引中仍有 pending），移出这些记录并确认归档"""
+        if self.archive is None or not self.archive.pending:
+            return
+        pending, cutoff = set(self.archive.pending), self.archive.cutoff
+        self.ensure_loaded(end_ordinal=cutoff)
+        # 加载时归档的汇总已计入累计收支，这里只需从账本中移出重复的明细
+        _, saved = self._remove_where(lambda tx: tx.transaction_id in pending
+                                      and tx.date_ordinal is not None and tx.date_ordinal < cutoff)
+        if saved:
+            self.archive.commit()
+
+    @_locked
+    def moving_averages(self, ordinals, windows=WINDOWS):
+        """各日期（序数日）截至当天的移动平均日支出 {窗口: {序数日: 分}}，包含归档部分"""
+        return self.budget_tracker.daily.moving_averages(ordinals, windows)
+
+    @_locked
+    def month_end_projection(self, today=None):
+        """按近期日均支出预测本月月底的支出，并与总预算 budgets[0] 比较"""
+        today = today or datetime.now().date()
+        self.ensure_loaded(start_ordinal=today.toordinal() - FORECAST_WINDOW)
+        budget = to_cents(self.budgets[0].amount) if self.budgets else None
+        return project_month_end(self.budget_tracker.daily, today, budget)
+
+    def balance_as_of(self, ordinal):
+        """截至某日（序数日，含当天）的结余，包含归档部分"""
+        self.ensure_loaded(end_ordinal=ordinal)
+        return self.budget_tracker.balance.balance_as_of(ordinal)
+
+    @_locked
+    def category_analytics(self):
+        """各类别、各月份的支出分析（top-K 与分位数），先重建因删除而失效的单元"""
+        self.budget_tracker.analytics.refresh(self.ledger)
+        return self.budget_tracker.analytics
+
+    @_locked
+    def sort_rows(self, rows, column, descending=False):
+        """把 rows（当前账本中的记录）按表格的列排序，使用预先计算的排序序列"""
+        return self.budget_tracker.sorting.sort(rows, column, self.ledger, descending)
+
+    def search(self, transaction_filter):
+        """筛选交易记录，返回 (版本, 账本中的记录, 归档中的记录)，两者都是最新的在前面
+
+        结果按筛选条件和账本版本缓存，反复切换筛选条件时不需要重新扫描
+        """
+        snapshot = self.snapshot()
+
+        def compute():
+            count("rows_scanned", len(snapshot.rows))
+            return (tuple(filter_transactions(snapshot.rows, transaction_filter)),
+                    tuple(filter_archived(self.archive, transaction_filter)))
+
+        rows, archived = self.query_cache.get(
+            ("search",) + transaction_filter.key(), snapshot.version, compute)
+        return snapshot.version, rows, archived
+
+    def aggregate(self, daily, snapshot=None):
+        """按日或按月汇总收支和各类别支出（含归档部分），格式同 aggregate_transactions
+
+        结果按账本版本缓存，调用方不能修改；snapshot 默认为当前快照。
+        只读取快照中的数据，可以在后台线程中调用
+        """
+        snapshot = snapshot or self.snapshot()
+        categories, archive_index = snapshot.categories, snapshot.archive_index
+        if categories is None:
+            # 只有交易记录的快照（Ledger.snapshot），类别和归档索引在锁内补取
+            with self.lock:
+                categories = tuple(self.categories)
+                archive_index = self.archive.index if self.archive is not None else None
+        archive = self.archive
+
+        def compute():
+            count("rows_scanned", len(snapshot.rows))
+            data = aggregate_transactions(snapshot.rows, daily, categories)
+            # 归档部分直接使用预先计算的汇总，不解压明细
+            if archive_index is not None:
+                merge_aggregates(data, archive.summary(daily, archive_index))
+            return data
+
+        return self.query_cache.get(("aggregate", daily, categories), snapshot.version, compute)
+
+    def spend_between(self, start_ordinal, end_ordinal):
+        """两日期之间（含两端）的支出，包含归档部分"""
+        self.ensure_loaded(start_ordinal, end_ordinal)
+        return self.budget_tracker.balance.spend_between(start_ordinal, end_ordinal)
 
     def add_transaction(self, transaction):
         """添加交易记录"""
-        self.transactions.append(transaction)
-        self.save_data()
+        self.add_transactions([transaction])
+
+    @_locked
+    def add_transactions(self, transactions):
+        """批量添加交易记录，只保存一次并发出一个变更事件"""
+        transactions = list(transactions)
+        if not transactions:
+            return
+        keys = set()
+        for transaction in transactions:
+            key = partition_key(transaction)
+            if self.partitions is not None and key not in self.loaded_partitions:
+                # 补记到未加载的历史月份时先加载该分区，避免覆盖已有记录
+                if transaction.date_ordinal is not None:
+                    self.ensure_loaded(transaction.date_ordinal, transaction.date_ordinal)
+                self.loaded_partitions.add(key)
+            keys.add(key)
+        self._adopt_categories(transactions)
+        self.ledger.extend(transactions)
+        self.budget_tracker.add_many(transactions)
+        self._record_fingerprints(transactions)
+        self.save_data(partitions=keys)
+        self._notify(added=transactions)
+
+    @_locked
+    @traced("import")
+    def import_transactions(self, transactions, skip_duplicates=True):
+        """批量导入交易记录，跳过与已有记录（包括未加载的分区和归档）重复的记录，返回 ImportResult
+
+        已加载的记录用内存中的指纹计数精确比较；未加载的分区和归档用布隆过滤器筛选：
+        设置了 bloom_path 时只为命中过滤器的记录加载对应日期的历史，否则加载导入日期范围涉及的全部历史分区
+        """
+        transactions = list(transactions)
+        if not skip_duplicates:
+            self.add_transactions(transactions)
+            return ImportResult(transactions)
+
+        digests = [fingerprint(tx) for tx in transactions]
+        bloom = self._bloom_filter()
+        if bloom is None:
+            candidates = transactions
+            ordinals = [tx.date_ordinal for tx in transactions if tx.date_ordinal is not None]
+            if ordinals:
+                self.ensure_loaded(min(ordinals), max(ordinals))
+        else:
+            candidates = [tx for tx, digest in zip(transactions, digests) if digest in bloom]
+            for transaction in candidates:
+                if transaction.date_ordinal is not None:
+                    self.ensure_loaded(transaction.date_ordinal, transaction.date_ordinal)
+        count("candidates", len(candidates))
+
+        # 过滤器只决定要加载哪些历史；是否重复一律按已加载的记录精确比较，
+        # 过滤器未覆盖的记录（例如同步进来的）只要已加载就不会漏判
+        index = self.budget_tracker.duplicates
+        index.ensure_built(self.ledger)
+        archived = self._archived_fingerprints(candidates)
+        used = Counter()
+        result = ImportResult()
+        for transaction, digest in zip(transactions, digests):
+            # 多重集合：账本中已有几条相同的记录，就跳过导入中的前几条
+            if index.count(digest) + archived[digest] > used[digest]:
+                used[digest] += 1
+                result.duplicates.append(transaction)
+            else:
+                result.added.append(transaction)
+        self.add_transactions(result.added)
+        return result
+
+    def _archived_fingerprints(self, transactions):
+        """归档中与这些记录同月的记录的指纹计数，只解压涉及的分段"""
+        ordinals = [tx.date_ordinal for tx in transactions if tx.date_ordinal is not None]
+        ordinals = [o for o in ordinals if self.archive is not None and self.archive.needed_for(o, o)]
+        if not ordinals:
+            return Counter()
+        return Counter(map(fingerprint, self.archive.read_rows(min(ordinals), max(ordinals))))
+
+    def _bloom_filter(self):
+        """读取布隆过滤器，文件不存在或容量不足时由全部历史重新建立；未设置 bloom_path 时返回 None"""
+        if self.bloom_path is None:
+            return None
+        if self._bloom is None:
+            self._bloom = BloomFilter.load(self.bloom_path)
+        if self._bloom is None or self._bloom.saturated:
+            self.ensure_loaded()
+            rows = list(self.ledger)
+            if self.archive is not None:
+                rows.extend(self.archive.read_rows())
+            bloom = BloomFilter(capacity=max(2 * len(rows), 10000))
+            for transaction in rows:
+                bloom.add(fingerprint(transaction))
+            bloom.save(self.bloom_path)
+            self._bloom = bloom
+        return self._bloom
+
+    def _record_fingerprints(self, transactions):
+        """布隆过滤器已建立时把新记录加入并保存，使它始终覆盖全部历史；尚未建立时由下次导入建立"""
+        if self.bloom_path is None:
+            return
+        if self._bloom is None:
+            self._bloom = BloomFilter.load(self.bloom_path)
+            if self._bloom is None:
+                return
+        for transaction in transactions:
+            self._bloom.add(fingerprint(transaction))
+        try:
+            self._bloom.save(self.bloom_path)
+        except OSError as e:
+            print(f"保存去重索引失败: {e}")
+
+    def add_listener(self, callback):
+        """订阅交易数据变更，callback 接收 LedgerChange"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """取消订阅"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, added=(), removed=(), reset=False):
+        with self.lock:
+            self.version += 1
+            change = LedgerChange(self.version, added, removed, reset)
+            for callback in list(self._listeners):
+                callback(change)
+
+    @_locked
+    def set_budget(self, amount, period="monthly", category=None):
+        """设置指定周期和类别的预算，已存在时更新金额
+
+        金额为 0 或 None 时直接删除该预算（第一个总预算不可删除）并返回 None，没有可删除的预算时不保存
+        """
+        if not amount:
+            kept = [b for b in self.budgets[1:] if not (b.period == period and b.category == category)]
+            if len(kept) < len(self.budgets) - 1:
+                self.budgets[1:] = kept
+                self.save_data(partitions=())
+            return None
+        for budget in self.budgets:
+            if budget.period == period and budget.category == category:
+                budget.amount = amount
+                break
+        else:
+            budget = Budget(amount, period, category)
+            used = {b.budget_id for b in self.budgets}
+            number = len(self.budgets) + 1
+            while f"budget_{number}" in used:
+                number += 1
+            budget.budget_id = f"budget_{number}"
+            self.budgets.append(budget)
+        self.save_data(partitions=())
+        return budget
+
+    @_locked
+    def remove_budget(self, budget_id):
+        """删除指定预算（第一个总预算不可删除）"""
+        self.budgets[1:] = [b for b in self.budgets[1:] if b.budget_id != budget_id]
+        self.save_data(partitions=())
 
     def get_transaction_by_id(self, transaction_id):
         """根据ID获取交易记录"""
@@ -140,8 +829,9 @@ class DataManager:
 
 
 # 全局数据管理器
+# 由程序入口（main.py、server.py）配置存储后调用 load_data，导入本模块时不读取文件
 data_manager = DataManager()
-data_manager.load_data()
+# 以下别名指向的对象在整个进程中不变：加载数据时原地替换列表内容，不重新绑定
 users = data_manager.users
 transactions = data_manager.transactions
 budgets = data_manager.budgets
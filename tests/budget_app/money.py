@@ -0,0 +1,32 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+_ONE = Decimal(1)
+
+
+def to_cents(amount):
+    """把金额转换为整数分，按四舍五入保留两位小数
+
+    浮点数按其最短十进制表示转换，因此 39.8 得到 3980 而不是 3979
+    """
+    if isinstance(amount, int):
+        return amount * 100
+    try:
+        value = Decimal(str(amount))
+        if not value.is_finite():
+            raise ValueError(f"无效金额: {amount!r}")
+        return int(value.scaleb(2).quantize(_ONE, rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f"无效金额: {amount!r}") from None
+
+
+def format_cents(cents):
+    """把整数分格式化为两位小数的字符串，与 f"{amount:.2f}" 的格式一致"""
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+def cents_to_float(cents):
+    """把整数分转换为浮点元，用于图表等只需要近似值的场景"""
+    return cents / 100
+
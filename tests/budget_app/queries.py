@@ -0,0 +1,242 @@
+"""交易数据的查询与汇总逻辑，不依赖 tkinter/matplotlib，金额单位统一为分"""
+import threading
+from collections import OrderedDict
+
+from category_registry import registry
+from instrumentation import count
+from money import to_cents
+from utils import month_key, ordinal_to_str, parse_date
+
+
+def monthly_totals(transactions, month_index):
+    """计算指定月份的支出和收入合计"""
+    expense = 0
+    income = 0
+    for transaction in transactions:
+        if transaction.month_index == month_index:
+            if transaction.type == "支出":
+                expense += transaction.amount_cents
+            else:
+                income += transaction.amount_cents
+    return expense, income
+
+
+def aggregate_transactions(transactions, daily, categories):
+    """按日或按月汇总收支，并统计各类别支出
+
+    返回 (expense_data, income_data, category_data)，前两者的键为 "YYYY-MM-DD" 或 "YYYY-MM"；
+    category_data 包含 categories 中的全部类别，以及其他有支出的类别
+    """
+    expense_data = {}
+    income_data = {}
+    # 各类别支出按类别编码累加在整数数组中，最后再转换为名称；未注册的类别按名称累加
+    category_totals = [0] * len(registry)
+    unregistered = {}
+
+    # 按序数日或月序号分组，最后再把分组键转换为字符串
+    for transaction in transactions:
+        key = transaction.date_ordinal if daily else transaction.month_index
+        if key is None:
+            continue
+
+        if transaction.type == "支出":
+            expense_data[key] = expense_data.get(key, 0) + transaction.amount_cents
+            code = transaction.category_code
+            if code is not None and code < len(category_totals):
+                category_totals[code] += transaction.amount_cents
+            else:
+                name = transaction.category
+                unregistered[name] = unregistered.get(name, 0) + transaction.amount_cents
+        else:
+            income_data[key] = income_data.get(key, 0) + transaction.amount_cents
+
+    category_data = dict.fromkeys(categories, 0)
+    for code, cents in enumerate(category_totals):
+        if cents:
+            name = registry.name(code)
+            category_data[name] = category_data.get(name, 0) + cents
+    for category, cents in unregistered.items():
+        category_data[category] = category_data.get(category, 0) + cents
+
+    to_label = ordinal_to_str if daily else month_key
+    expense_data = {to_label(key): value for key, value in expense_data.items()}
+    income_data = {to_label(key): value for key, value in income_data.items()}
+    return expense_data, income_data, category_data
+
+
+def filter_archived(archive, transaction_filter):
+    """归档中满足条件的记录，最新的在前面
+
+    只有明确的日期范围涉及归档时才解压归档分段，否则返回空列表
+    """
+    start, end = transaction_filter.start_ordinal, transaction_filter.end_ordinal
+    if archive is None or not archive.needed_for(start, end):
+        return []
+    archived = archive.read_rows(start, end)
+    archived.sort(key=lambda tx: tx.date_ordinal or 0)
+    return filter_transactions(archived, transaction_filter)
+
+
+def merge_aggregates(base, extra):
+    """把另一份 aggregate_transactions 格式的汇总（如归档汇总）合并到 base 中"""
+    for target, source in zip(base, extra):
+        for key, cents in source.items():
+            target[key] = target.get(key, 0) + cents
+    return base
+
+
+class QueryCache:
+    """查询结果的 LRU 缓存，键为规范化的查询条件，按账本版本整体失效
+
+    缓存的结果由多个调用方共享，调用方不能修改。线程安全。
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version, compute):
+        """返回 key 在账本版本 version 下的结果，未命中时调用 compute() 计算并缓存"""
+        with self._lock:
+            if self.version is None or version > self.version:
+                # 账本已变更，之前的结果全部作废
+                if self._entries:
+                    self.invalidations += 1
+                    self._entries.clear()
+                self.version = version
+            elif version == self.version and key in self._entries:
+                self.hits += 1
+                count("cache_hit")
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            count("cache_miss")
+
+        # 在锁外计算，不阻塞其他查询；基于旧版本快照的查询只计算不缓存
+        result = compute()
+        with self._lock:
+            if version == self.version:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+
+    def stats(self):
+        """命中、未命中、淘汰、失效次数以及当前条目数"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "invalidations": self.invalidations, "size": len(self._entries),
+                    "hit_rate": self.hits / total if total else 0.0}
+
+
+class TransactionFilter:
+    """交易记录的搜索与筛选条件，语义与预算页的搜索框一致"""
+
+    def __init__(self, search_term="", search_column="全部", type_filter="全部",
+                 category_filter="全部", amount_min="", amount_max="",
+                 date_start="", date_end=""):
+        self.search_term = search_term.lower()
+        self.search_column = search_column
+        self.type_filter = type_filter
+        self.category_filter = category_filter
+        # 只查询不注册，输入未注册的类别时为 None，按名称比较
+        self.category_code = registry.lookup(category_filter) if category_filter != "全部" else None
+        self.date_start = date_start
+        self.date_end = date_end
+        self.start_ordinal = parse_date(date_start)[0] if date_start else None
+        self.end_ordinal = parse_date(date_end)[0] if date_end else None
+
+        # 金额范围（单位：分）
+        self.min_cents = self.max_cents = None
+        try:
+            if amount_min:
+                self.min_cents = to_cents(amount_min)
+            if amount_max:
+                self.max_cents = to_cents(amount_max)
+        except ValueError:
+            pass  # 如果输入的不是有效数字，忽略金额筛选
+
+    def key(self):
+        """规范化后的筛选条件，可用作缓存键"""
+        return (self.search_term, self.search_column if self.search_term else "全部",
+                self.type_filter, self.category_filter, self.min_cents, self.max_cents,
+                self.date_start, self.date_end)
+
+    def matches_search(self, transaction):
+        """检查搜索条件"""
+        term = self.search_term
+        if not term:
+            return True
+        column = self.search_column
+        if column == "全部":
+            # 在所有列中搜索
+            return (
+                term in transaction.date or
+                term in transaction.type.lower() or
+                term in transaction.category.lower() or
+                term in transaction.amount_str or
+                term in transaction.note.lower()
+            )
+        # 在指定列中搜索
+        if column == "日期":
+            return term in transaction.date
+        if column == "类型":
+            return term in transaction.type.lower()
+        if column == "类别":
+            return term in transaction.category.lower()
+        if column == "金额":
+            return term in transaction.amount_str
+        if column == "备注":
+            return term in transaction.note.lower()
+        return False
+
+    def matches(self, transaction):
+        """检查交易记录是否满足全部条件"""
+        # 检查类型和类别筛选
+        if self.type_filter != "全部" and transaction.type != self.type_filter:
+            return False
+        if self.category_filter != "全部":
+            if self.category_code is None:
+                if transaction.category != self.category_filter:
+                    return False
+            elif transaction.category_code != self.category_code:
+                return False
+
+        # 检查金额范围
+        if self.min_cents is not None and transaction.amount_cents < self.min_cents:
+            return False
+        if self.max_cents is not None and transaction.amount_cents > self.max_cents:
+            return False
+
+        # 检查日期范围，完整日期按序数日比较，未输入完整时退回字符串比较
+        if self.date_start:
+            if self.start_ordinal is not None and transaction.date_ordinal is not None:
+                if transaction.date_ordinal < self.start_ordinal:
+                    return False
+            elif transaction.date < self.date_start:
+                return False
+        if self.date_end:
+            if self.end_ordinal is not None and transaction.date_ordinal is not None:
+                if transaction.date_ordinal > self.end_ordinal:
+                    return False
+            elif transaction.date > self.date_end:
+                return False
+
+        return self.matches_search(transaction)
+
+
+def filter_transactions(transactions, transaction_filter):
+    """返回满足条件的交易记录，最新的在前面"""
+    matches = transaction_filter.matches
+    return [transaction for transaction in reversed(transactions) if matches(transaction)]
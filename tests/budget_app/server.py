@@ -0,0 +1,429 @@
+"""本地账本查询服务（asyncio + HTTP/JSON，默认只监听 127.0.0.1）
+
+桌面程序运行时，脚本和看板可以通过它查询账本，不必各自重新解析 accounting_data.json。
+读请求在线程池中基于账本快照执行，互不阻塞；写请求进入队列，由唯一的写入任务
+把排队中的请求合并成一批，每批只保存一次文件、发出一个变更事件。
+
+接口:
+    GET    /transactions?search=&column=&type=&category=&amount_min=&amount_max=&date_start=&date_end=&limit=
+    GET    /aggregate?mode=monthly|daily
+    GET    /monthly?month=YYYY-MM
+    GET    /cache          查询缓存的命中统计
+    POST   /transactions   {"amount": 12.5, "category": "餐饮", "date": "2025-01-01", "type": "支出", "note": ""}
+                           也可以是这样的对象组成的列表
+    DELETE /transactions   {"ids": ["txn_...", ...]}
+
+金额单位为分。单独运行: python server.py --port 8765；
+或设置环境变量 BUDGET_SERVER_PORT 后运行 main.py，与桌面程序共用同一个 DataManager。
+"""
+import argparse
+import asyncio
+import json
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from models import create_transaction
+from queries import TransactionFilter
+from utils import current_month_index, days_in_month, month_key, parse_date
+
+MAX_BATCH = 256  # 每批最多合并的写请求数
+MAX_BODY = 16 * 1024 * 1024
+DEFAULT_LIMIT = 1000
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class TkDispatcher:
+    """在 Tk 主线程上执行写操作
+
+    tkinter 不是线程安全的，而变更事件会直接更新界面，所以与桌面程序共用
+    DataManager 时，写操作通过队列交给主线程定时执行。
+    """
+
+    def __init__(self, root, interval_ms=50):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._queue = queue.Queue()
+        self._poll()
+
+    def submit(self, func, *args):
+        future = Future()
+        self._queue.put((future, func, args))
+        return future
+
+    def _poll(self):
+        while True:
+            try:
+                future, func, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args))
+                except BaseException as e:
+                    future.set_exception(e)
+        self.root.after(self.interval_ms, self._poll)
+
+
+class QueryServer:
+    """DataManager 前面的 HTTP 查询服务"""
+
+    def __init__(self, data_manager, host="127.0.0.1", port=8765, dispatcher=None, read_workers=4):
+        self.dm = data_manager
+        self.host = host
+        self.port = port
+        self.batches = 0  # 已执行的写入批次数
+        self._readers = ThreadPoolExecutor(read_workers, thread_name_prefix="query-read")
+        if dispatcher is None:
+            dispatcher = ThreadPoolExecutor(1, thread_name_prefix="query-write")
+        self._submit_write = dispatcher.submit
+        self._pending = None
+        self._writer_task = None
+        self._server = None
+        self._routes = {
+            "/transactions": {"GET": self._query, "POST": self._add, "DELETE": self._delete},
+            "/aggregate": {"GET": self._aggregate},
+            "/monthly": {"GET": self._monthly},
+            "/cache": {"GET": self._cache_stats},
+        }
+
+    async def start(self):
+        self._pending = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_loop())
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._writer_task.cancel()
+        try:
+            await self._writer_task
+        except asyncio.CancelledError:
+            pass
+        self._readers.shutdown(wait=False)
+
+    # ---- HTTP ----
+
+    async def _handle(self, reader, writer):
+        """处理一个连接，支持 keep-alive"""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    status, payload = 200, await self._dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "请求行格式错误")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(400, "Content-Length 格式错误")
+        if length > MAX_BODY:
+            raise HTTPError(413, "请求体过大")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _dispatch(self, method, target, body):
+        url = urlsplit(target)
+        methods = self._routes.get(url.path)
+        if methods is None:
+            raise HTTPError(404, f"未知的接口: {url.path}")
+        handler = methods.get(method)
+        if handler is None:
+            raise HTTPError(405, f"{url.path} 不支持 {method}")
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            return await handler(params, body)
+        except HTTPError:
+            raise
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        except Exception as e:
+            raise HTTPError(500, f"{type(e).__name__}: {e}")
+
+    async def _read(self, func, *args):
+        """在读线程池中执行"""
+        return await asyncio.get_running_loop().run_in_executor(self._readers, func, *args)
+
+    async def _write(self, func, *args):
+        """在写线程（或 Tk 主线程）中执行，不参与合并"""
+        return await asyncio.wrap_future(self._submit_write(func, *args))
+
+    async def _ensure_loaded(self, start_ordinal, end_ordinal):
+        """与预算页一致：日期范围涉及未加载的历史分区时先加载"""
+        if self.dm.partitions is not None:
+            await self._write(self.dm.ensure_loaded, start_ordinal, end_ordinal)
+
+    # ---- 读接口 ----
+
+    async def _query(self, params, body):
+        transaction_filter = TransactionFilter(
+            search_term=params.get("search", ""),
+            search_column=params.get("column", "全部"),
+            type_filter=params.get("type", "全部"),
+            category_filter=params.get("category", "全部"),
+            amount_min=params.get("amount_min", ""),
+            amount_max=params.get("amount_max", ""),
+            date_start=params.get("date_start", ""),
+            date_end=params.get("date_end", ""),
+        )
+        limit = _parse_limit(params.get("limit"))
+        start, end = transaction_filter.start_ordinal, transaction_filter.end_ordinal
+        if start or end:
+            await self._ensure_loaded(start, end)
+        return await self._read(self._run_query, transaction_filter, limit)
+
+    def _run_query(self, transaction_filter, limit):
+        version, rows, archived = self.dm.search(transaction_filter)
+        page = rows[:limit] + archived[:max(limit - len(rows), 0)]
+        return {"version": version, "total": len(rows) + len(archived),
+                "rows": [tx.to_dict() for tx in page]}
+
+    async def _aggregate(self, params, body):
+        mode = params.get("mode", "monthly")
+        if mode not in ("daily", "monthly"):
+            raise ValueError("mode 必须为 daily 或 monthly")
+        return await self._read(self._run_aggregate, mode == "daily")
+
+    def _run_aggregate(self, daily):
+        snapshot = self.dm.snapshot()
+        expense, income, categories = self.dm.aggregate(daily, snapshot)
+        return {"version": snapshot.version, "expense_cents": expense,
+                "income_cents": income, "category_cents": categories}
+
+    async def _cache_stats(self, params, body):
+        return self.dm.query_cache.stats()
+
+    async def _monthly(self, params, body):
+        month = params.get("month") or month_key(current_month_index())
+        first = parse_date(f"{month}-01")[0]
+        if first is None or len(month) != 7:
+            raise ValueError("month 格式应为YYYY-MM")
+        year, month_number = int(month[:4]), int(month[5:])
+        await self._ensure_loaded(first, first + days_in_month(year, month_number) - 1)
+        expense, income = self.dm.budget_tracker.month_totals(year * 12 + month_number - 1)
+        return {"month": month, "expense_cents": expense, "income_cents": income}
+
+    # ---- 写接口（合并成批） ----
+
+    async def _add(self, params, body):
+        data = _json_body(body)
+        items = data if isinstance(data, list) else [data]
+        transactions = []
+        for item in items:
+            if not isinstance(item, dict):
+                raise ValueError("交易记录必须是 JSON 对象")
+            transactions.append(create_transaction(
+                item.get("amount"), item.get("category"), item.get("date", ""),
+                item.get("type", "支出"), item.get("note", ""), self.dm.categories))
+        await self._enqueue("add", transactions)
+        return {"added": [tx.transaction_id for tx in transactions]}
+
+    async def _delete(self, params, body):
+        data = _json_body(body) if body else None
+        ids = data.get("ids") if isinstance(data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(tid, str) for tid in ids):
+            raise ValueError("请求体应为 {\"ids\": [\"txn_...\", ...]}")
+        _check_known(ids, {tx.transaction_id for tx in self.dm.ledger})
+        removed = await self._enqueue("delete", ids)
+        return {"deleted": len(set(ids) & removed)}
+
+    async def _enqueue(self, kind, items):
+        future = asyncio.get_running_loop().create_future()
+        await self._pending.put((kind, items, future))
+        return await future
+
+    async def _write_loop(self):
+        """唯一的写入任务：上一批执行期间到达的写请求合并为下一批"""
+        while True:
+            batch = [await self._pending.get()]
+            while len(batch) < MAX_BATCH and not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            try:
+                results = await self._write(self._apply, [(kind, items) for kind, items, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            else:
+                self.batches += 1
+            for (_, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _apply(self, requests):
+        """执行一批写请求 [(类型, 内容)]，返回各请求的结果：被删除的交易ID集合或异常
+
+        错误只影响出错的请求；整批只保存一次删除
+        """
+        results = [set()] * len(requests)
+        with self.dm.lock:
+            adds = [tx for kind, items in requests if kind == "add" for tx in items]
+            if adds:
+                try:
+                    self.dm.add_transactions(adds)
+                except Exception as e:
+                    results = [e if kind == "add" else result
+                               for (kind, _), result in zip(requests, results)]
+
+            # 排队期间记录可能已被删除，按执行时的账本再检查一次
+            existing = {tx.transaction_id for tx in self.dm.ledger}
+            deletes = set()
+            for i, (kind, items) in enumerate(requests):
+                if kind != "delete":
+                    continue
+                try:
+                    _check_known(items, existing)
+                except ValueError as e:
+                    results[i] = e
+                else:
+                    deletes.update(items)
+            if deletes:
+                removed = {tx.transaction_id for tx in self.dm.delete_transactions(deletes)}
+                results = [removed if kind == "delete" and not isinstance(result, Exception) else result
+                           for (kind, _), result in zip(requests, results)]
+        return results
+
+
+def _parse_limit(value):
+    """查询的 limit 参数，缺省时为 DEFAULT_LIMIT，必须为非负整数"""
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit 必须为非负整数") from None
+    if limit < 0:
+        raise ValueError("limit 必须为非负整数")
+    return limit
+
+
+def _check_known(ids, existing):
+    """ids 中有不存在的交易ID时抛出 ValueError"""
+    unknown = [tid for tid in ids if tid not in existing]
+    if unknown:
+        raise ValueError(f"未知的交易ID: {', '.join(unknown[:10])}")
+
+
+def _json_body(body):
+    try:
+        return json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise ValueError("请求体不是有效的 JSON")
+
+
+def start_in_thread(data_manager, host="127.0.0.1", port=8765, dispatcher=None):
+    """在后台线程中运行服务，返回已开始监听的 QueryServer（port 为实际端口）"""
+    server = QueryServer(data_manager, host, port, dispatcher)
+    started = threading.Event()
+    errors = []
+
+    def run():
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(server.start())
+        except Exception as e:
+            errors.append(e)
+            started.set()
+            return
+        server.loop = loop
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="query-server", daemon=True).start()
+    started.wait()
+    if errors:
+        raise errors[0]
+    return server
+
+
+def stop_thread(server):
+    """停止 start_in_thread 启动的服务"""
+    asyncio.run_coroutine_threadsafe(server.stop(), server.loop).result()
+    server.loop.call_soon_threadsafe(server.loop.stop)
+
+
+def run_server(data_manager, host, port):
+    """在当前线程中运行服务，直到按下 Ctrl+C"""
+    server = QueryServer(data_manager, host, port)
+    print(f"查询服务监听 http://{host}:{port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地账本查询服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data-file", help="账本文件，默认为当前目录的 accounting_data.json")
+    parser.add_argument("--data-dir", default=os.environ.get("BUDGET_DATA_DIR"),
+                        help="按月分区存储的目录，默认取 BUDGET_DATA_DIR")
+    args = parser.parse_args(argv)
+
+    # 存储设置（分区目录、归档、去重过滤器）与桌面程序和命令行工具相同
+    from cli import open_data_manager
+    data_manager = open_data_manager(args.data_file, args.data_dir)
+    run_server(data_manager, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""交易记录表格的列排序：预先计算并增量维护的各列排序序列
+
+每列的排序序列在第一次按该列排序时建立（O(n log n)），之后随单条交易的增删用二分查找
+插入或删除（O(log n) 次比较）；批量加载、导入和删除时整体丢弃，下次排序时一次性重建。对筛选结果排序时按结果大小选择代价更低的方式：
+结果较少时直接按排序键排序，较多时沿整列的排序序列顺序取出属于结果的记录（O(n)），
+都不需要对整个账本重新排序。
+
+排序键在主键相同时依次比较日期和交易ID，两种方式得到的顺序完全一致。
+"""
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+
+
+def _date_key(transaction):
+    return transaction.date_ordinal or 0
+
+
+SORT_KEYS = {
+    "日期": lambda tx: (_date_key(tx), tx.date, tx.transaction_id),
+    "类型": lambda tx: (tx.type, _date_key(tx), tx.transaction_id),
+    "类别": lambda tx: (tx.category, _date_key(tx), tx.transaction_id),
+    "金额": lambda tx: (tx.amount_cents, _date_key(tx), tx.transaction_id),
+    "备注": lambda tx: (tx.note, _date_key(tx), tx.transaction_id),
+}
+
+
+def sort_key(column):
+    """列名对应的排序键函数，未知列名时抛出 KeyError"""
+    return SORT_KEYS[column]
+
+
+class _Column:
+    """一列的排序序列：升序的排序键和对应的交易记录"""
+    __slots__ = ("keys", "rows")
+
+    def __init__(self, key, transactions):
+        pairs = sorted(((key(tx), tx) for tx in transactions), key=lambda pair: pair[0])
+        self.keys = [k for k, _ in pairs]
+        self.rows = [tx for _, tx in pairs]
+
+
+class SortIndex:
+    """各列的排序序列，只为实际排序过的列建立"""
+
+    def __init__(self):
+        self._columns = {}  # 列名 -> _Column
+
+    def invalidate(self):
+        """数据整体变化时丢弃所有排序序列，下次排序时重新建立"""
+        self._columns = {}
+
+    def add(self, transaction):
+        for column, ordering in self._columns.items():
+            key = SORT_KEYS[column](transaction)
+            position = bisect_right(ordering.keys, key)
+            ordering.keys.insert(position, key)
+            ordering.rows.insert(position, transaction)
+
+    def remove(self, transaction):
+        for column, ordering in self._columns.items():
+            key = SORT_KEYS[column](transaction)
+            position = bisect_left(ordering.keys, key)
+            # 交易ID 重复时键也相同，按对象找到对应的那一条
+            while position < len(ordering.keys) and ordering.keys[position] == key:
+                if ordering.rows[position] is transaction:
+                    del ordering.keys[position]
+                    del ordering.rows[position]
+                    break
+                position += 1
+
+    def ordering(self, column, transactions):
+        """整列的升序排序序列，transactions 为当前全部交易（用于首次建立）"""
+        ordering = self._columns.get(column)
+        if ordering is None:
+            ordering = self._columns[column] = _Column(sort_key(column), transactions)
+        return ordering.rows
+
+    def sort(self, rows, column, transactions, descending=False):
+        """对 rows（transactions 的子集）按列排序，返回新列表"""
+        key = sort_key(column)
+        total = len(transactions)
+        if len(rows) * math.log2(len(rows) + 1) < total:
+            # 结果较少：直接排序
+            return sorted(rows, key=key, reverse=descending)
+        # 结果较多：沿预先计算的排序序列取出属于结果的记录
+        wanted = set(map(id, rows))
+        ordered = [tx for tx in self.ordering(column, transactions) if id(tx) in wanted]
+        if descending:
+            ordered.reverse()
+        return ordered
+
+
+def merge_sorted(first, second, column, descending=False):
+    """合并两个已按同一列排好序的序列（例如账本部分和归档部分）"""
+    return list(heapq.merge(first, second, key=sort_key(column), reverse=descending))
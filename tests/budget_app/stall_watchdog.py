@@ -0,0 +1,164 @@
+"""Tk 主循环卡顿检测
+
+通过 window.after 定时发送心跳，测量主循环的延迟；同时为所有 Tk 回调计时。
+当心跳延迟超过阈值时，把这次卡顿归因到上次心跳以来耗时最长的回调，
+最终输出最严重的卡顿来源报告。
+
+设置环境变量 BUDGET_WATCHDOG=<阈值毫秒> 即可在主窗口和登录窗口上启用。
+"""
+import json
+import os
+import time
+import tkinter
+
+_active = []  # 正在运行的看门狗
+_original_call = None
+_original_after = None
+_calling = []  # 正在执行的 Tk 回调，after 回调执行时替换为原始函数
+
+
+class _AfterCallback:
+    """传给 after 的包装：tkinter 会再把回调包进 Misc.after 内部的 callit，
+    这里保留原始函数，执行时替换掉正在计时的回调，用于命名和识别心跳"""
+
+    def __init__(self, func):
+        self.func = func
+        self.__name__ = getattr(func, "__name__", type(func).__name__)
+
+    def __call__(self, *args):
+        if _calling:
+            _calling[-1] = self.func
+        return self.func(*args)
+
+
+def _timed_call(self, *args):
+    """替换 tkinter.CallWrapper.__call__，为每个 Tk 回调计时"""
+    if not _active:
+        return _original_call(self, *args)
+    _calling.append(self.func)
+    start = time.perf_counter()
+    try:
+        return _original_call(self, *args)
+    finally:
+        duration = time.perf_counter() - start
+        func = _calling.pop()
+        for watchdog in _active:
+            watchdog._on_callback(func, duration)
+
+
+def _after(self, ms, func=None, *args):
+    """替换 tkinter.Misc.after，在 tkinter 包装之前先包一层"""
+    if func is not None and not isinstance(func, _AfterCallback):
+        func = _AfterCallback(func)
+    return _original_after(self, ms, func, *args)
+
+
+def _install_hook():
+    global _original_call, _original_after
+    if _original_call is None:
+        _original_call = tkinter.CallWrapper.__call__
+        tkinter.CallWrapper.__call__ = _timed_call
+    if _original_after is None:
+        _original_after = tkinter.Misc.after
+        tkinter.Misc.after = _after
+
+
+def callback_name(func):
+    """回调的可读名称，例如 BudgetWindow.search_transactions"""
+    func = getattr(func, "__func__", func)
+    return getattr(func, "__qualname__", None) or repr(func)
+
+
+class StallWatchdog:
+    """主循环卡顿检测器
+
+    需要在创建控件之前启动，之后注册的回调才会被计时。
+    """
+
+    def __init__(self, root, threshold_ms=200, interval_ms=100):
+        self.root = root
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stalls = []  # (回调名称, 卡顿时长, 回调耗时)
+        self._slowest = None  # 上次心跳以来耗时最长的 (回调名称, 耗时)
+        self._expected = None
+        self._after_id = None
+
+    @classmethod
+    def from_env(cls, root):
+        """根据 BUDGET_WATCHDOG 环境变量创建并启动看门狗，未设置时返回 None"""
+        value = os.environ.get("BUDGET_WATCHDOG")
+        if not value:
+            return None
+        try:
+            watchdog = cls(root, threshold_ms=float(value))
+        except ValueError:
+            watchdog = cls(root)
+        watchdog.start()
+        return watchdog
+
+    def start(self):
+        _install_hook()
+        if self not in _active:
+            _active.append(self)
+        self._schedule()
+
+    def stop(self):
+        if self in _active:
+            _active.remove(self)
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tkinter.TclError:
+                pass  # 窗口已销毁
+            self._after_id = None
+
+    def _schedule(self):
+        self._expected = time.perf_counter() + self.interval
+        self._after_id = self.root.after(int(self.interval * 1000), self._heartbeat)
+
+    def _on_callback(self, func, duration):
+        if func == self._heartbeat:
+            return
+        if self._slowest is None or duration > self._slowest[1]:
+            self._slowest = (callback_name(func), duration)
+
+    def _heartbeat(self):
+        self.check(time.perf_counter())
+        self._schedule()
+
+    def check(self, now):
+        """根据心跳到达时间判断是否发生卡顿"""
+        latency = now - self._expected
+        if latency >= self.threshold:
+            name, duration = self._slowest or ("<Tk 内部处理>", 0.0)
+            self.stalls.append((name, latency, duration))
+        self._slowest = None
+
+    def report(self, top=10):
+        """按最长卡顿排序的卡顿来源列表"""
+        offenders = {}
+        for name, latency, duration in self.stalls:
+            entry = offenders.setdefault(name, {"callback": name, "stalls": 0, "total_ms": 0.0,
+                                                "max_stall_ms": 0.0, "max_callback_ms": 0.0})
+            entry["stalls"] += 1
+            entry["total_ms"] += latency * 1000
+            entry["max_stall_ms"] = max(entry["max_stall_ms"], latency * 1000)
+            entry["max_callback_ms"] = max(entry["max_callback_ms"], duration * 1000)
+        ranked = sorted(offenders.values(), key=lambda e: e["max_stall_ms"], reverse=True)
+        for entry in ranked:
+            for key in ("total_ms", "max_stall_ms", "max_callback_ms"):
+                entry[key] = round(entry[key], 1)
+        return ranked[:top]
+
+    def format_report(self, top=10):
+        lines = [f"检测到 {len(self.stalls)} 次卡顿（阈值 {self.threshold * 1000:.0f}ms）"]
+        for entry in self.report(top):
+            lines.append(f"  {entry['callback']:<48}{entry['stalls']:>4}次  "
+                         f"最长卡顿{entry['max_stall_ms']:>8.1f}ms  回调耗时{entry['max_callback_ms']:>8.1f}ms")
+        return "\n".join(lines)
+
+    def dump(self, path, top=10):
+        """把报告写入 JSON 文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(top), f, ensure_ascii=False, indent=2)
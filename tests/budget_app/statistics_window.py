@@ -1,16 +1,23 @@
+import base64
 import tkinter as tk
 from tkinter import ttk
-from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from models import transactions, categories
+from models import data_manager
+from instrumentation import span
+from charts import ChartRenderer, render_chart
+from money import format_cents
+from utils import month_key
+
+POLL_MS = 30  # 检查后台渲染是否完成的间隔
+DEFAULT_SIZE = (1200, 500)
 
 
 class StatisticsWindow:
     def __init__(self, parent):
         self.parent = parent
         self.frame = tk.Frame(parent)
-        plt.rcParams['font.family'] = 'SimHei'
+        self._rendered = None  # 当前图表对应的 (数据版本, 统计类型)
+        self.renderer = ChartRenderer()
+        self._image = None  # 保持对 PhotoImage 的引用，否则图片会被回收
         self.create_widgets()
 
     def create_widgets(self):
@@ -28,85 +35,121 @@ class StatisticsWindow:
         ttk.Radiobutton(control_frame, text="按月", variable=self.stats_type,
                         value="monthly", command=self.update_charts).pack(side="left", padx=5)
 
+        # 支出分析：各类别的中位数、P90 和最大支出
+        analytics_frame = tk.LabelFrame(self.frame, text="支出分析")
+        analytics_frame.pack(side="bottom", fill="x", padx=20, pady=10)
+
+        month_row = tk.Frame(analytics_frame)
+        month_row.pack(fill="x", pady=5)
+        tk.Label(month_row, text="月份:").pack(side="left")
+        self.analytics_month = tk.StringVar(value="全部")
+        self.month_combo = ttk.Combobox(month_row, textvariable=self.analytics_month,
+                                        values=["全部"], state="readonly", width=10)
+        self.month_combo.pack(side="left", padx=5)
+        self.month_combo.bind('<<ComboboxSelected>>', self.update_analytics)
+
+        columns = ("类别", "笔数", "中位数", "P90", "最大")
+        self.analytics_tree = ttk.Treeview(analytics_frame, columns=columns, show="headings", height=5)
+        for col in columns:
+            self.analytics_tree.heading(col, text=col)
+            self.analytics_tree.column(col, width=100)
+        self.analytics_tree.pack(fill="x")
+        self.top_label = tk.Label(analytics_frame, text="", anchor="w", justify="left")
+        self.top_label.pack(fill="x", pady=5)
+
         # 图表框架
         self.chart_frame = tk.Frame(self.frame)
         self.chart_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        self.chart_label = tk.Label(self.chart_frame, text="图表生成中...")
+        self.chart_label.pack(fill="both", expand=True)
 
-        self.update_charts()
-
-    def get_transaction_data(self):
-        """获取交易数据"""
-        expense_data = {}
-        income_data = {}
-        category_data = {category: 0 for category in categories}
-
-        for transaction in transactions:
-            date_obj = datetime.strptime(transaction.date, "%Y-%m-%d")
-
-            if self.stats_type.get() == "daily":
-                key = transaction.date
-            else:  # monthly
-                key = f"{date_obj.year}-{date_obj.month:02d}"
-
-            if transaction.type == "支出":
-                if key not in expense_data:
-                    expense_data[key] = 0
-                expense_data[key] += transaction.amount
-                category_data[transaction.category] += transaction.amount
-            else:
-                if key not in income_data:
-                    income_data[key] = 0
-                income_data[key] += transaction.amount
+    def get_transaction_data(self, snapshot=None, daily=None):
+        """获取交易数据（金额单位：分），snapshot 默认为当前账本快照
 
-        return expense_data, income_data, category_data
+        同一版本下切换按日/按月时直接使用缓存的汇总结果
+        """
+        if snapshot is None:
+            snapshot = data_manager.snapshot()
+        if daily is None:
+            daily = self.stats_type.get() == "daily"
+        with span("aggregate", mode="daily" if daily else "monthly"):
+            return data_manager.aggregate(daily, snapshot)
 
     def update_charts(self):
-        """更新图表"""
-        # 清除现有图表
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
-
-        expense_data, income_data, category_data = self.get_transaction_data()
-
-        # 创建图表
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
-
-        # 折线图
-        if expense_data or income_data:
-            dates = sorted(
-                set(list(expense_data.keys()) + list(income_data.keys())))
-            expense_values = [expense_data.get(date, 0) for date in dates]
-            income_values = [income_data.get(date, 0) for date in dates]
-
-            ax1.plot(dates, expense_values, 'r-', label='支出', marker='o')
-            ax1.plot(dates, income_values, 'g-', label='收入', marker='o')
-            ax1.set_title(
-                f"{'每日' if self.stats_type.get() == 'daily' else '每月'}收支趋势")
-            ax1.set_xlabel('时间')
-            ax1.set_ylabel('金额')
-            ax1.legend()
-            ax1.tick_params(axis='x', rotation=45)
-
-        # 饼图
-        if any(category_data.values()):
-            labels = [cat for cat, amount in category_data.items()
-                      if amount > 0]
-            sizes = [amount for amount in category_data.values() if amount > 0]
-
-            if labels and sizes:
-                ax2.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-                ax2.set_title('支出类别占比')
-
-        plt.tight_layout()
-
-        # 嵌入到tkinter
-        canvas = FigureCanvasTkAgg(fig, self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True)
+        """在后台线程中重新生成图表，完成后由 Tk 线程显示
+
+        后台线程需要的数据都在这里（Tk 线程、DataManager 的锁内）取得快照
+        """
+        daily = self.stats_type.get() == "daily"
+        with data_manager.lock:
+            data_manager.ensure_loaded()  # 统计需要全部历史分区
+            self._rendered = (data_manager.version, self.stats_type.get())
+            snapshot = data_manager.snapshot()
+            balance = data_manager.budget_tracker.balance.copy()
+            trend = data_manager.budget_tracker.daily.copy() if daily else None
+
+        width, height = self.chart_frame.winfo_width(), self.chart_frame.winfo_height()
+        if width < 100 or height < 100:
+            width, height = DEFAULT_SIZE  # 尚未显示时使用默认大小
+
+        generation, future = self.renderer.submit(self._render, snapshot, daily, width, height,
+                                                  balance, trend)
+        if self._image is None:
+            self.chart_label.config(text="图表生成中...")
+        self.frame.after(POLL_MS, self._poll_render, generation, future)
+        self.update_analytics()
+
+    def update_analytics(self, *args):
+        """更新支出分析表，数据由预算引擎增量维护，不需要扫描账本"""
+        analytics = data_manager.category_analytics()
+        months = [month_key(index) for index in analytics.months()]
+        self.month_combo.config(values=["全部"] + months)
+        if self.analytics_month.get() not in months:
+            self.analytics_month.set("全部")
+        selected = self.analytics_month.get()
+        month_index = None if selected == "全部" else analytics.months()[months.index(selected)]
+
+        self.analytics_tree.delete(*self.analytics_tree.get_children())
+        for row in analytics.summary(month_index):
+            self.analytics_tree.insert("", "end", values=(
+                row["category"], row["count"], format_cents(row["median"]),
+                format_cents(row["p90"]), format_cents(row["max"])))
+        top = analytics.top_expenses(5, month_index=month_index)
+        self.top_label.config(text="最大支出: " + "  ".join(
+            f"{tx.date} {tx.category} {tx.amount_text}" for tx in top))
+
+    def _render(self, snapshot, daily, width, height, balance, trend, is_stale):
+        """工作线程：汇总并渲染为 PNG"""
+        with span("render_chart"):
+            expense_data, income_data, category_data = self.get_transaction_data(snapshot, daily)
+            if is_stale():
+                return None
+            return render_chart(expense_data, income_data, category_data, daily,
+                                width, height, is_stale=is_stale, balance=balance, trend=trend)
+
+    def _poll_render(self, generation, future):
+        """Tk 线程：渲染完成后替换图片，已作废的渲染直接丢弃"""
+        if not self.renderer.is_current(generation) or future.cancelled():
+            return
+        if not future.done():
+            self.frame.after(POLL_MS, self._poll_render, generation, future)
+            return
+        try:
+            png = future.result()
+        except Exception as e:
+            self._image = None
+            self.chart_label.config(image="", text=f"图表生成失败: {e}")
+            return
+        if png is None:
+            return
+        self._image = tk.PhotoImage(data=base64.b64encode(png).decode("ascii"))
+        self.chart_label.config(image=self._image, text="")
 
     def show(self):
         self.frame.pack(fill="both", expand=True)
-        self.update_charts()
+        # 数据和统计类型都没有变化时沿用已有图表
+        if self._rendered != (data_manager.version, self.stats_type.get()):
+            self.update_charts()
 
     def hide(self):
         self.frame.pack_forget()
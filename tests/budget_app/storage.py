@@ -0,0 +1,179 @@
+"""按月分区的账本存储
+
+目录结构:
+    manifest.json          预算、类别以及每个分区的行数、收支合计和内容摘要
+    partitions/2025-10.json  该月的交易记录列表
+
+日期无法解析的交易记录放在 "unknown" 分区。
+"""
+import json
+import os
+import tempfile
+from hashlib import blake2b
+
+from money import to_cents
+
+MANIFEST = "manifest.json"
+UNKNOWN_PARTITION = "unknown"
+ROW_FIELDS = ('transaction_id', 'amount', 'category', 'date', 'type', 'note')
+
+
+def partition_key(transaction):
+    """交易记录所属的分区名 "YYYY-MM" """
+    return transaction.month_key or UNKNOWN_PARTITION
+
+
+def partition_month_index(key):
+    """分区名对应的月序号，"unknown" 分区返回 None"""
+    if key == UNKNOWN_PARTITION:
+        return None
+    return int(key[:4]) * 12 + int(key[5:7]) - 1
+
+
+def chunk_digest(rows):
+    """一组交易记录（字典列表）的内容摘要，与记录顺序无关，内容相同的分区摘要相同"""
+    digests = sorted(blake2b(repr(tuple(row.get(field) for field in ROW_FIELDS)).encode('utf-8'),
+                             digest_size=16).digest() for row in rows)
+    digest = blake2b(digest_size=16)
+    for row_digest in digests:
+        digest.update(row_digest)
+    return digest.hexdigest()
+
+
+def write_bytes_atomic(path, data):
+    """先写临时文件再替换，避免写到一半时留下损坏的文件"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json_atomic(path, data, indent=None):
+    """原子写入 JSON 文件"""
+    # json.dumps 使用 C 实现的编码器，比 json.dump 逐块写入快数倍
+    write_bytes_atomic(path, json.dumps(data, ensure_ascii=False, indent=indent).encode('utf-8'))
+
+
+class PartitionedStorage:
+    """每个月一个分区文件，外加一个记录分区概况的清单文件"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.partition_dir = os.path.join(directory, "partitions")
+        self.manifest = {'partitions': {}, 'budgets': []}
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, MANIFEST))
+
+    def read_manifest(self):
+        with open(os.path.join(self.directory, MANIFEST), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self.manifest.setdefault('partitions', {})
+        self.manifest.setdefault('budgets', [])
+        return self.manifest
+
+    def partition_keys(self):
+        return sorted(self.manifest['partitions'])
+
+    def partition_path(self, key):
+        return os.path.join(self.partition_dir, f"{key}.json")
+
+    def read_partition(self, key):
+        """读取一个分区的交易记录（字典列表）"""
+        path = self.partition_path(key)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write(self, rows_by_key, budgets, categories=None):
+        """写入指定分区并更新清单
+
+        rows_by_key 为 {分区名: 交易记录列表}，列表为空时删除该分区；未出现的分区保持不变；
+        categories 为 None 时清单中的类别列表保持不变
+        """
+        os.makedirs(self.partition_dir, exist_ok=True)
+        for key, transactions in rows_by_key.items():
+            rows = [tx.to_dict() for tx in transactions]
+            expense = sum(tx.amount_cents for tx in transactions if tx.type == "支出")
+            income = sum(tx.amount_cents for tx in transactions if tx.type != "支出")
+            self._write_partition(key, rows, expense, income)
+        self._write_manifest(budgets, categories)
+
+    def write_rows(self, rows_by_key, budgets, categories=None):
+        """同 write，但交易记录为 to_dict() 格式的字典，不需要先构造 Transaction（用于同步）"""
+        os.makedirs(self.partition_dir, exist_ok=True)
+        for key, rows in rows_by_key.items():
+            expense = income = 0
+            for row in rows:
+                try:
+                    cents = to_cents(row.get('amount'))
+                except (ValueError, TypeError):
+                    cents = 0  # 与 Transaction 一致，非法金额按 0 计入
+                if row.get('type') == "支出":
+                    expense += cents
+                else:
+                    income += cents
+            self._write_partition(key, rows, expense, income)
+        self._write_manifest(budgets, categories)
+
+    def _write_partition(self, key, rows, expense, income):
+        path = self.partition_path(key)
+        partitions = self.manifest['partitions']
+        if not rows:
+            partitions.pop(key, None)
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        write_json_atomic(path, rows)
+        partitions[key] = {'rows': len(rows), 'expense_cents': expense,
+                           'income_cents': income, 'hash': chunk_digest(rows)}
+
+    def _write_manifest(self, budgets, categories):
+        self.manifest['budgets'] = budgets
+        if categories is not None:
+            self.manifest['categories'] = categories
+        write_json_atomic(os.path.join(self.directory, MANIFEST), self.manifest, indent=2)
+
+    def chunk_hash(self, key):
+        """分区的内容摘要；旧版本清单中没有摘要时读取分区计算"""
+        info = self.manifest['partitions'][key]
+        if 'hash' not in info:
+            info['hash'] = chunk_digest(self.read_partition(key))
+        return info['hash']
+
+    def overlapping_keys(self, start_month=None, end_month=None):
+        """返回与月序号范围 [start_month, end_month] 重叠的分区，None 表示不限"""
+        keys = []
+        for key in self.partition_keys():
+            month = partition_month_index(key)
+            if month is None:
+                continue
+            if start_month is not None and month < start_month:
+                continue
+            if end_month is not None and month > end_month:
+                continue
+            keys.append(key)
+        return keys
+
+
+def migrate_json_file(json_path, directory):
+    """把 accounting_data.json 格式的单文件账本拆分为按月分区的存储"""
+    from models import Transaction
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    rows_by_key = {}
+    for tx_data in data.get('transactions', []):
+        transaction = Transaction.from_dict(tx_data)
+        rows_by_key.setdefault(partition_key(transaction), []).append(transaction)
+
+    storage = PartitionedStorage(directory)
+    storage.write(rows_by_key, data.get('budgets', []), data.get('categories'))
+    return storage
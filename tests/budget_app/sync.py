@@ -0,0 +1,280 @@
+"""两个账本之间的合并/同步
+
+账本可以是 accounting_data.json 格式的单文件，也可以是按月分区的目录。
+按月比较内容摘要，只有两边不同的月份才逐条比较；分区存储的摘要保存在清单中，
+不需要读取内容相同的分区。合并结果一次性写回两边，每边只写发生变化的月份。
+
+新增和删除按交易ID判断。为了区分"一边新增"和"另一边删除"，每次同步后把合并结果
+保存为同步基准（按月分区的目录）：
+    - 某月只有一边相对基准有变化时，直接采用变化的一边（包括其中的删除）；
+    - 两边都有变化时逐条合并：基准中有、一边没有的记录视为被删除；
+      同一ID两边内容不同时，采用相对基准有修改的一边，都修改过时以本地为准；
+      基准中没有这个ID时是两边各自新建的不同记录（旧版本生成的ID可能重复），两条都保留，
+      远端的一条换用由内容得到的新ID；同一边同一月份中ID重复的记录也先换用新ID；
+    - 没有基准时（第一次同步）取两边的并集。
+
+归档中的记录不参与同步。同步写入的记录没有计入去重用的布隆过滤器，
+因此账本被修改时删除它的过滤器文件，下次导入时重新建立。
+"""
+import json
+import os
+
+from dedup import invalidate_bloom
+from storage import (ROW_FIELDS, UNKNOWN_PARTITION, PartitionedStorage, chunk_digest,
+                     write_json_atomic)
+from utils import month_key, parse_date
+
+EMPTY_DIGEST = chunk_digest([])
+
+
+def row_partition_key(row):
+    """交易记录（字典）所属的月份分区名，与 storage.partition_key 一致"""
+    try:
+        month_index = parse_date(row.get('date'))[1]
+    except TypeError:
+        month_index = None
+    return month_key(month_index) if month_index is not None else UNKNOWN_PARTITION
+
+
+def _content(row):
+    return tuple(row.get(field) for field in ROW_FIELDS)
+
+
+class JsonLedger:
+    """accounting_data.json 格式的单文件账本（整个文件读入内存，写回时保持原有顺序）"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {'transactions': [], 'budgets': []}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        self._chunks = {}
+        for row in self.data.get('transactions', []):
+            self._chunks.setdefault(row_partition_key(row), []).append(row)
+        self._hashes = {}
+
+    def keys(self):
+        return set(self._chunks)
+
+    def chunk_hash(self, key):
+        if key not in self._hashes:
+            self._hashes[key] = chunk_digest(self._chunks.get(key, []))
+        return self._hashes[key]
+
+    def read_chunk(self, key):
+        return self._chunks.get(key, [])
+
+    def categories(self):
+        return self.data.get('categories')
+
+    def write(self, changes, categories):
+        """用合并结果替换发生变化的月份，原有记录保持原来的顺序，新增的记录追加在最后"""
+        replaced = {}  # 月份 -> {交易ID: [记录]}，ID 重复的记录不会互相覆盖
+        for key, rows in changes.items():
+            by_id = replaced[key] = {}
+            for row in rows:
+                by_id.setdefault(row['transaction_id'], []).append(row)
+        output = []
+        for row in self.data.get('transactions', []):
+            merged = replaced.get(row_partition_key(row))
+            if merged is None:
+                output.append(row)
+            elif merged.get(row.get('transaction_id')):
+                output.append(merged[row['transaction_id']].pop(0))
+        for merged in replaced.values():
+            for rows in merged.values():
+                output.extend(rows)
+
+        self.data['transactions'] = output
+        if categories is not None:
+            self.data['categories'] = categories
+        write_json_atomic(self.path, self.data, indent=2)
+
+
+class PartitionedLedger:
+    """按月分区的账本目录，月份摘要直接取自清单"""
+
+    def __init__(self, directory):
+        self.storage = PartitionedStorage(directory)
+        if self.storage.exists():
+            self.storage.read_manifest()
+
+    def keys(self):
+        return set(self.storage.manifest['partitions'])
+
+    def chunk_hash(self, key):
+        if key not in self.storage.manifest['partitions']:
+            return EMPTY_DIGEST
+        return self.storage.chunk_hash(key)
+
+    def read_chunk(self, key):
+        if key not in self.storage.manifest['partitions']:
+            return []
+        return self.storage.read_partition(key)
+
+    def categories(self):
+        return self.storage.manifest.get('categories')
+
+    def write(self, changes, categories):
+        self.storage.write_rows(changes, self.storage.manifest['budgets'], categories)
+
+
+def open_ledger(path):
+    """目录按分区存储打开，否则按单文件打开"""
+    if os.path.isdir(path):
+        return PartitionedLedger(path)
+    return JsonLedger(path)
+
+
+class SyncResult:
+    """一次同步的统计"""
+
+    def __init__(self):
+        self.months_compared = 0  # 两边不同、需要读取内容的月份数
+        self.added_local = 0  # 从远端合并到本地的记录数
+        self.added_remote = 0
+        self.deleted_local = 0  # 因远端删除而从本地删除的记录数
+        self.deleted_remote = 0
+        self.conflicts = []  # 两边内容不同的交易ID
+        self.local_written = False  # 本地账本是否被修改
+        self.remote_written = False
+
+    def __repr__(self):
+        return (f"SyncResult(months={self.months_compared}, +local={self.added_local}, "
+                f"+remote={self.added_remote}, -local={self.deleted_local}, "
+                f"-remote={self.deleted_remote}, conflicts={len(self.conflicts)})")
+
+
+def _with_new_id(row):
+    """换用新交易ID的副本；新ID由原ID和内容得到，两边重复同步时结果相同"""
+    return dict(row, transaction_id=f"{row['transaction_id']}_{chunk_digest([row])[:12]}")
+
+
+def unique_ids(rows):
+    """同一月份中交易ID重复的记录（旧版本生成或导入的）换用新ID，避免按ID合并时只剩一条
+
+    新ID由内容得到，两边对同样的记录得到同样的新ID
+    """
+    seen = set()
+    result = []
+    for row in rows:
+        if row['transaction_id'] in seen:
+            row = _with_new_id(row)
+            new_id, number = row['transaction_id'], 1
+            while row['transaction_id'] in seen:  # 内容也完全相同的重复记录
+                row = dict(row, transaction_id=f"{new_id}_{number}")
+                number += 1
+        seen.add(row['transaction_id'])
+        result.append(row)
+    return result
+
+
+def merge_rows(local_rows, remote_rows, base_rows, conflicts):
+    """逐条合并同一个月份的记录，base_rows 为 None 时表示没有同步基准（取并集）"""
+    local_rows, remote_rows = unique_ids(local_rows), unique_ids(remote_rows)
+    if base_rows is not None:
+        base_rows = unique_ids(base_rows)
+    remote_by_id = {row['transaction_id']: row for row in remote_rows}
+    base_by_id = {row['transaction_id']: row for row in base_rows} if base_rows is not None else {}
+    local_ids = {row['transaction_id'] for row in local_rows}
+    merged = []
+    for row in local_rows:
+        transaction_id = row['transaction_id']
+        remote = remote_by_id.get(transaction_id)
+        if remote is None:
+            if transaction_id not in base_by_id:
+                merged.append(row)  # 本地新增；否则为远端删除
+        elif _content(remote) == _content(row):
+            merged.append(row)
+        else:
+            base = base_by_id.get(transaction_id)
+            if base is None:
+                merged.append(row)
+                renamed = _with_new_id(remote)
+                if renamed['transaction_id'] not in local_ids:  # 本地已有换过ID的同一条记录
+                    merged.append(renamed)
+                continue
+            local_changed = _content(base) != _content(row)
+            remote_changed = _content(base) != _content(remote)
+            if local_changed and remote_changed:
+                conflicts.append(transaction_id)
+            merged.append(remote if remote_changed and not local_changed else row)
+    for row in remote_rows:
+        transaction_id = row['transaction_id']
+        if transaction_id not in local_ids and transaction_id not in base_by_id:
+            merged.append(row)  # 远端新增；否则为本地删除
+    return merged
+
+
+def _count_changes(before, after):
+    before_ids = {row['transaction_id'] for row in before}
+    after_ids = {row['transaction_id'] for row in after}
+    return len(after_ids - before_ids), len(before_ids - after_ids)
+
+
+def sync_ledgers(local, remote, base):
+    """同步两个账本并更新同步基准，返回 SyncResult
+
+    local/remote/base 为 JsonLedger 或 PartitionedLedger；base 通常是 PartitionedLedger
+    """
+    result = SyncResult()
+    has_base = bool(base.keys())
+    changes = ({}, {}, {})  # 本地、远端、基准需要写入的月份
+    for key in sorted(local.keys() | remote.keys() | base.keys()):
+        hashes = [store.chunk_hash(key) for store in (local, remote, base)]
+        local_hash, remote_hash, base_hash = hashes
+        if local_hash == remote_hash:
+            if base_hash != local_hash:
+                changes[2][key] = local.read_chunk(key)
+            continue
+
+        result.months_compared += 1
+        local_rows, remote_rows = local.read_chunk(key), remote.read_chunk(key)
+        if has_base and base_hash == local_hash:
+            merged = unique_ids(remote_rows)
+        elif has_base and base_hash == remote_hash:
+            merged = unique_ids(local_rows)
+        else:
+            base_rows = base.read_chunk(key) if has_base else None
+            merged = merge_rows(local_rows, remote_rows, base_rows, result.conflicts)
+        merged_hash = chunk_digest(merged)
+
+        added, deleted = _count_changes(local_rows, merged)
+        result.added_local += added
+        result.deleted_local += deleted
+        added, deleted = _count_changes(remote_rows, merged)
+        result.added_remote += added
+        result.deleted_remote += deleted
+        for store_changes, store_hash in zip(changes, hashes):
+            if merged_hash != store_hash:
+                store_changes[key] = merged
+
+    # 类别列表取并集，本地的顺序在前
+    categories = list(local.categories() or [])
+    for name in remote.categories() or []:
+        if name not in categories:
+            categories.append(name)
+
+    for store, store_changes in zip((local, remote, base), changes):
+        if store_changes or (categories and store.categories() != categories):
+            store.write(store_changes, categories or None)
+    result.local_written, result.remote_written = bool(changes[0]), bool(changes[1])
+    return result
+
+
+def default_base_path(local_path):
+    """本地账本默认的同步基准目录"""
+    if os.path.isdir(local_path):
+        return os.path.join(local_path, "sync_base")
+    return os.path.splitext(local_path)[0] + "_sync_base"
+
+
+def sync(local_path, remote_path, base_path=None):
+    """按路径同步两个账本，返回 SyncResult"""
+    base_path = base_path or default_base_path(local_path)
+    result = sync_ledgers(open_ledger(local_path), open_ledger(remote_path), PartitionedLedger(base_path))
+    for path, written in ((local_path, result.local_written), (remote_path, result.remote_written)):
+        if written:
+            invalidate_bloom(path)
+    return result
@@ -36,10 +36,11 @@ class TransactionWindow:
         # 类别
         tk.Label(form_frame, text="类别:").grid(
             row=2, column=0, sticky="w", pady=5)
+        # 可以直接输入新类别，添加记录时确认后加入类别列表
         self.category_var = tk.StringVar()
-        category_combo = ttk.Combobox(form_frame, textvariable=self.category_var,
-                                      values=categories, state="readonly")
-        category_combo.grid(row=2, column=1, pady=5, padx=5, sticky="ew")
+        self.category_combo = ttk.Combobox(form_frame, textvariable=self.category_var,
+                                           values=categories)
+        self.category_combo.grid(row=2, column=1, pady=5, padx=5, sticky="ew")
 
         # 日期
         tk.Label(form_frame, text="日期:").grid(
@@ -83,7 +84,7 @@ class TransactionWindow:
     def add_transaction(self):
         try:
             amount = float(self.amount_entry.get())
-            category = self.category_var.get()
+            category = self.category_var.get().strip()
             transaction_type = self.type_var.get()
             note = self.note_entry.get()
 
@@ -105,6 +106,12 @@ class TransactionWindow:
                 messagebox.showerror("错误", "金额必须大于0！")
                 return
 
+            if category not in categories:
+                if not messagebox.askyesno("新类别", f"类别“{category}”不存在，是否添加为新类别？"):
+                    return
+                data_manager.add_category(category)
+                self.category_combo.config(values=categories)
+
             # 创建交易记录
             from models import Transaction
             date_str = f"{int(year)}-{int(month):02d}-{int(day):02d}"
@@ -133,6 +140,7 @@ class TransactionWindow:
 
     def show(self):
         self.frame.pack(fill="both", expand=True)
+        self.category_combo.config(values=categories)
 
     def hide(self):
         self.frame.pack_forget()
@@ -0,0 +1,144 @@
+"""支出趋势：按日滑动窗口的移动平均和月底支出预测，金额单位为分
+
+DailySpend 随交易增删增量维护各类别每天的支出（稀疏字典，O(1)）。
+查询时把一段日期排成 类别 × 天数 的矩阵，用前缀和一次算出所有类别的滑动窗口合计：
+numpy 可用时整个矩阵向量化计算，否则逐行用 Python 计算，结果相同。
+查询只涉及所需的日期范围，不需要扫描账本。
+"""
+from datetime import date
+from itertools import accumulate
+
+from utils import days_in_month
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖
+    np = None
+
+WINDOWS = (7, 30)  # 移动平均的窗口（天）
+FORECAST_WINDOW = 30  # 月底预测使用近多少天的日均支出
+ARCHIVED = None  # 归档部分只有按日合计，没有类别
+
+
+def window_sums(rows, window):
+    """rows 的每一行为连续若干天的支出，返回每行从第 window 天起各天的滑动窗口合计"""
+    if np is not None and isinstance(rows, np.ndarray):
+        prefix = np.zeros((rows.shape[0], rows.shape[1] + 1), dtype=np.int64)
+        np.cumsum(rows, axis=1, out=prefix[:, 1:])
+        return prefix[:, window:] - prefix[:, :-window]
+    sums = []
+    for row in rows:
+        prefix = list(accumulate(row, initial=0))
+        sums.append([prefix[i + window] - prefix[i] for i in range(len(prefix) - window)])
+    return sums
+
+
+def column_totals(rows, length):
+    """各列（各天）所有类别的合计"""
+    if np is not None and isinstance(rows, np.ndarray):
+        return [int(value) for value in rows.sum(axis=0)]
+    return [sum(column) for column in zip(*rows)] if rows else [0] * length
+
+
+class DailySpend:
+    """各类别每天的支出"""
+
+    def __init__(self):
+        self._days = {}  # 类别 -> {序数日: 支出}
+
+    def clear(self):
+        self._days = {}
+
+    def copy(self):
+        """复制一份，供后台线程在数据继续变化时读取"""
+        spend = DailySpend()
+        spend._days = {category: dict(days) for category, days in self._days.items()}
+        return spend
+
+    def add_amount(self, ordinal, category, cents):
+        days = self._days.get(category)
+        if days is None:
+            days = self._days[category] = {}
+        total = days.get(ordinal, 0) + cents
+        if total:
+            days[ordinal] = total
+        else:
+            days.pop(ordinal, None)
+
+    def matrix(self, start, end):
+        """日期范围 [start, end] 的 (类别列表, 类别 × 天数 的支出矩阵)"""
+        categories = [category for category, days in self._days.items() if days]
+        rows = [[days.get(ordinal, 0) for ordinal in range(start, end + 1)]
+                for days in (self._days[category] for category in categories)]
+        if np is not None and rows:
+            try:
+                rows = np.array(rows, dtype=np.int64)
+            except OverflowError:
+                pass  # 超出 int64 时使用 Python 整数
+        return categories, rows
+
+    def rolling(self, start, end, windows=WINDOWS):
+        """[start, end] 内每一天截至当天的滑动窗口合计
+
+        返回 (类别列表, {窗口: 类别 × 天数 的合计}, {窗口: 每天所有类别的合计})
+        """
+        categories, rows = self.matrix(start - max(windows) + 1, end)
+        length = end - start + 1
+        by_category, totals = {}, {}
+        for window in windows:
+            sums = window_sums(rows, window) if len(rows) else []
+            # 较短的窗口会多算出前面几天，只保留 [start, end]
+            skip = max(windows) - window
+            if np is not None and isinstance(sums, np.ndarray):
+                sums = sums[:, skip:]
+            else:
+                sums = [row[skip:] for row in sums]
+            by_category[window] = sums
+            totals[window] = column_totals(sums, length)
+        return categories, by_category, totals
+
+    def moving_averages(self, ordinals, windows=WINDOWS):
+        """各日期的移动平均日支出 {窗口: {序数日: 分（浮点）}}"""
+        if not ordinals:
+            return {window: {} for window in windows}
+        start, end = min(ordinals), max(ordinals)
+        _, _, totals = self.rolling(start, end, windows)
+        return {window: {ordinal: totals[window][ordinal - start] / window for ordinal in ordinals}
+                for window in windows}
+
+
+class MonthEndProjection:
+    """按近期日均支出外推的本月月底支出"""
+
+    def __init__(self, today, spent, daily_rate, by_category, budget_cents=None):
+        last_day = days_in_month(today.year, today.month)
+        self.days_left = last_day - today.day  # 今天之后的剩余天数
+        self.spent = spent
+        self.daily_rate = daily_rate  # 近期日均支出（分，浮点）
+        self.projected = spent + round(daily_rate * self.days_left)
+        self.by_category = by_category  # 类别 -> 预计月底支出
+        self.budget = budget_cents
+        self.overrun = self.projected - budget_cents if budget_cents is not None else 0
+        self.over = budget_cents is not None and self.overrun > 0
+
+
+def project_month_end(daily_spend, today=None, budget_cents=None, window=FORECAST_WINDOW):
+    """预测本月月底的支出：本月已支出 + 近 window 天的日均支出 × 剩余天数，所有类别一起计算"""
+    today = today or date.today()
+    ordinal = today.toordinal()
+    first = ordinal - today.day + 1
+    days_left = days_in_month(today.year, today.month) - today.day
+
+    categories, sums, totals = daily_spend.rolling(ordinal, ordinal, (window,))
+    _, rows = daily_spend.matrix(first, ordinal)
+    if np is not None and isinstance(rows, np.ndarray) and isinstance(sums[window], np.ndarray):
+        spent_rows = rows.sum(axis=1)
+        projected = spent_rows + np.rint(sums[window][:, 0] / window * days_left).astype(np.int64)
+        by_category = {category: int(cents) for category, cents in zip(categories, projected)}
+    else:
+        by_category = {category: sum(row) + round(window_row[0] / window * days_left)
+                       for category, row, window_row in zip(categories, rows, sums[window])}
+    by_category.pop(ARCHIVED, None)
+
+    spent = sum(column_totals(rows, ordinal - first + 1))
+    return MonthEndProjection(today, spent, totals[window][0] / window, by_category, budget_cents)
@@ -1,33 +1,119 @@
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 
+# 每月天数表，下标为 (是否闰年, 月份-1)
+_DAYS_IN_MONTH = (
+    (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31),
+    (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31),
+)
 
-def validate_date(year, month, day):
-    """验证日期是否合法"""
+
+def is_leap_year(year):
+    """判断是否为闰年"""
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def days_in_month(year, month):
+    """返回指定年月的天数"""
+    return _DAYS_IN_MONTH[is_leap_year(year)][month - 1]
+
+
+@lru_cache(maxsize=4096)
+def _check_date(year, month, day):
+    """检查日期格式与范围（不含未来日期检查），结果带缓存
+
+    返回 (错误信息, None) 或 (None, (年, 月, 日))
+    """
     try:
         # 检查是否为数字
         year_int = int(year)
         month_int = int(month)
         day_int = int(day)
+    except ValueError:
+        return "日期必须为数字", None
 
-        # 检查范围
-        if not (1900 <= year_int <= 2100):
-            return False, "年份必须在1900-2100之间"
-        if not (1 <= month_int <= 12):
-            return False, "月份必须在1-12之间"
+    # 检查范围
+    if not (1900 <= year_int <= 2100):
+        return "年份必须在1900-2100之间", None
+    if not (1 <= month_int <= 12):
+        return "月份必须在1-12之间", None
 
-        # 检查每月天数
-        days_in_month = [31, 29 if year_int % 4 == 0 and (year_int % 100 != 0 or year_int % 400 == 0) else 28,
-                         31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+    # 检查每月天数
+    if not (1 <= day_int <= days_in_month(year_int, month_int)):
+        return f"{month_int}月没有{day_int}号", None
 
-        if not (1 <= day_int <= days_in_month[month_int - 1]):
-            return False, f"{month_int}月没有{day_int}号"
+    return None, (year_int, month_int, day_int)
 
-        # 检查是否为未来日期
-        input_date = datetime(year_int, month_int, day_int)
-        if input_date > datetime.now():
-            return False, "不能选择未来日期"
 
-        return True, "日期有效"
+def _today():
+    now = datetime.now()
+    return now.year, now.month, now.day
 
-    except ValueError:
-        return False, "日期必须为数字"
+
+def validate_date(year, month, day):
+    """验证日期是否合法"""
+    error, ymd = _check_date(year, month, day)
+    if error is not None:
+        return False, error
+
+    # 检查是否为未来日期
+    if ymd > _today():
+        return False, "不能选择未来日期"
+
+    return True, "日期有效"
+
+
+def validate_dates(dates):
+    """批量验证日期，dates 为 (年, 月, 日) 的可迭代对象
+
+    整批共用同一个"今天"，返回与 validate_date 相同格式的结果列表
+    """
+    today = _today()
+    results = []
+    for year, month, day in dates:
+        error, ymd = _check_date(year, month, day)
+        if error is not None:
+            results.append((False, error))
+        elif ymd > today:
+            results.append((False, "不能选择未来日期"))
+        else:
+            results.append((True, "日期有效"))
+    return results
+
+
+@lru_cache(maxsize=65536)
+def parse_date(date_str):
+    """解析 "YYYY-MM-DD" 字符串，返回 (序数日, 月序号)，无法解析时返回 (None, None)
+
+    序数日即 date.toordinal()，月序号为 年*12 + 月-1，二者都可以直接做整数比较和分组
+    """
+    try:
+        year, month, day = date_str.split("-")
+        ordinal = date(int(year), int(month), int(day)).toordinal()
+    except (ValueError, TypeError, AttributeError):
+        return None, None
+    return ordinal, int(year) * 12 + int(month) - 1
+
+
+def current_month_index():
+    """返回当前月份的月序号"""
+    now = datetime.now()
+    return now.year * 12 + now.month - 1
+
+
+def ordinal_month_index(ordinal):
+    """序数日所在月份的月序号"""
+    day = date.fromordinal(ordinal)
+    return day.year * 12 + day.month - 1
+
+
+@lru_cache(maxsize=4096)
+def month_key(month_index):
+    """把月序号转换为 "YYYY-MM" 形式"""
+    return f"{month_index // 12}-{month_index % 12 + 1:02d}"
+
+
+@lru_cache(maxsize=65536)
+def ordinal_to_str(ordinal):
+    """把序数日转换为 "YYYY-MM-DD" 形式"""
+    return date.fromordinal(ordinal).isoformat()
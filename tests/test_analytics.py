@@ -0,0 +1,98 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import bisect
+import math
+import random
+from analytics import TOP_K, CategoryAnalytics, KLLSketch
+from models import DataManager, Transaction
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
+
+
+def rank_error(values, estimate, q):
+    ordered = sorted(values)
+    return abs(bisect.bisect_left(ordered, estimate) / len(ordered) - q)
+
+
+class TestKLLSketch:
+    def test_exact_when_small(self):
+        sketch = KLLSketch(k=200)
+        values = list(range(1, 151))
+        random.Random(1).shuffle(values)
+        for value in values:
+            sketch.update(value)
+        for q in (0.1, 0.5, 0.9, 1.0):
+            assert sketch.quantile(q) == exact_quantile(values, q)
+        assert KLLSketch().quantile(0.5) is None
+
+    def test_accuracy_and_memory(self):
+        rng = random.Random(2)
+        values = [rng.randint(1, 10 ** 6) for _ in range(50000)]
+        sketch = KLLSketch(k=200)
+        for value in values:
+            sketch.update(value)
+        assert sketch.count == 50000
+        assert sketch.size < 1000
+        for q in (0.5, 0.9, 0.99):
+            assert rank_error(values, sketch.quantile(q), q) < 0.02
+
+    def test_merge(self):
+        rng = random.Random(3)
+        values = [rng.expovariate(1 / 5000) for _ in range(30000)]
+        parts = [KLLSketch(seed=i) for i in range(30)]
+        for i, value in enumerate(values):
+            parts[i % 30].update(value)
+        merged = KLLSketch()
+        for part in parts:
+            merged.merge(part)
+        assert merged.count == 30000
+        for q in (0.5, 0.9):
+            assert rank_error(values, merged.quantile(q), q) < 0.02
+
+
+def expense(amount, category, date):
+    return Transaction(amount, category, date, "支出")
+
+
+class TestCategoryAnalytics:
+    def test_top_k_and_quantiles(self):
+        rng = random.Random(4)
+        rows = [expense(rng.randint(1, 1000), rng.choice(["餐饮", "交通"]),
+                        f"2024-0{rng.randint(1, 3)}-01") for _ in range(500)]
+        rows.append(Transaction(99999, "工资", "2024-01-01", "收入"))
+        analytics = CategoryAnalytics()
+        for tx in rows:
+            analytics.add(tx)
+
+        expenses = [tx for tx in rows if tx.type == "支出"]
+        top = analytics.top_expenses(10)
+        assert [tx.amount_cents for tx in top] == sorted((tx.amount_cents for tx in expenses), reverse=True)[:10]
+
+        food_feb = [tx.amount_cents for tx in expenses if tx.category == "餐饮" and tx.month_index == 2024 * 12 + 1]
+        result = analytics.quantiles((0.5, 0.9), category="餐饮", month_index=2024 * 12 + 1)
+        assert result == {0.5: exact_quantile(food_feb, 0.5), 0.9: exact_quantile(food_feb, 0.9)}
+        assert len(analytics.top_expenses(100)) == TOP_K
+        assert analytics.months() == [2024 * 12 + 2, 2024 * 12 + 1, 2024 * 12]
+
+        summary = {row["category"]: row for row in analytics.summary()}
+        assert set(summary) == {"餐饮", "交通"}
+        assert summary["交通"]["count"] == sum(1 for tx in expenses if tx.category == "交通")
+        assert summary["交通"]["max"] == max(tx.amount_cents for tx in expenses if tx.category == "交通")
+
+    def test_delete_via_data_manager(self, tmp_path):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        big = expense(500, "餐饮", "2024-01-02")
+        dm.add_transactions([expense(10, "餐饮", "2024-01-01"), big, expense(20, "交通", "2024-01-01")])
+        assert dm.category_analytics().top_expenses(1) == [big]
+
+        dm.delete_transactions([big.transaction_id])
+        analytics = dm.category_analytics()
+        assert not analytics.dirty
+        assert [tx.amount_cents for tx in analytics.top_expenses(5)] == [2000, 1000]
+        assert analytics.quantiles((1.0,), category="餐饮") == {1.0: 1000}
@@ -0,0 +1,156 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import json
+import pytest
+import archive
+from archive import ArchiveStore
+from backends import MemoryBackend
+from models import DataManager, Transaction
+from queries import aggregate_transactions, merge_aggregates
+from utils import parse_date
+
+
+def ordinal(s):
+    return parse_date(s)[0]
+
+
+@pytest.fixture
+def rows():
+    return [
+        Transaction(10, "餐饮", "2019-03-05", "支出", "a"),
+        Transaction(20.5, "交通", "2019-03-06", "支出", "b"),
+        Transaction(1000, "工资", "2019-03-10", "收入", "salary"),
+        Transaction(30, "餐饮", "2019-05-01", "支出", "c"),
+    ]
+
+
+class TestArchiveStore:
+    def test_summary_without_decompress(self, tmp_path, rows, monkeypatch):
+        store = ArchiveStore(str(tmp_path))
+        store.archive(rows, ordinal("2019-06-01"))
+
+        # 重新打开后统计只读取索引
+        reopened = ArchiveStore(str(tmp_path))
+        monkeypatch.setitem(archive.CODECS, "lzma", (".json.xz", None, None))
+        categories = ["餐饮", "交通", "工资"]
+        for daily in (True, False):
+            expected = aggregate_transactions(rows, daily, categories)
+            expected[2].pop("工资")
+            assert reopened.summary(daily) == expected
+        assert reopened._rows == {}
+
+    def test_read_rows_by_range(self, tmp_path, rows):
+        store = ArchiveStore(str(tmp_path))
+        store.archive(rows, ordinal("2019-06-01"))
+
+        assert [tx.note for tx in store.read_rows(ordinal("2019-05-01"), None)] == ["c"]
+        assert len(store.read_rows(None, ordinal("2019-03-31"))) == 3
+        assert list(store._rows) == ["2019-05.1.json.xz", "2019-03.1.json.xz"]
+        assert store.read_rows(ordinal("2019-03-01"))[1].amount_cents == 2050
+
+    def test_needed_for(self, tmp_path, rows):
+        store = ArchiveStore(str(tmp_path))
+        assert not store.needed_for(None, ordinal("2019-03-31"))
+        store.archive(rows, ordinal("2019-06-01"))
+        assert not store.needed_for(None, None)
+        assert store.needed_for(None, ordinal("2025-01-01"))
+        assert store.needed_for(ordinal("2019-01-01"), None)
+        assert not store.needed_for(ordinal("2019-06-01"), None)
+
+    def test_zlib_codec(self, tmp_path, rows):
+        store = ArchiveStore(str(tmp_path), codec="zlib")
+        store.archive(rows, ordinal("2019-06-01"))
+        assert os.path.exists(tmp_path / "2019-03.1.json.zz")
+        assert len(ArchiveStore(str(tmp_path)).read_rows()) == 4
+
+    def test_unknown_codec(self, tmp_path):
+        with pytest.raises(ValueError):
+            ArchiveStore(str(tmp_path), codec="gzip")
+
+    def test_segments_immutable(self, tmp_path, rows):
+        store = ArchiveStore(str(tmp_path))
+        store.archive(rows[:2], ordinal("2019-03-07"))
+        first = (tmp_path / "2019-03.1.json.xz").read_bytes()
+
+        store.archive(rows[2:], ordinal("2019-06-01"))
+        assert (tmp_path / "2019-03.1.json.xz").read_bytes() == first
+        assert os.path.exists(tmp_path / "2019-03.2.json.xz")
+        assert store.cutoff == ordinal("2019-06-01")
+        assert len(store.read_rows()) == 4
+
+        with open(tmp_path / "index.json", encoding='utf-8') as f:
+            assert len(json.load(f)['segments']) == 3
+
+    def test_failed_segment_write_leaves_index_unchanged(self, tmp_path, rows, monkeypatch):
+        store = ArchiveStore(str(tmp_path))
+        store.archive(rows[:1], ordinal("2019-03-06"))
+        calls = []
+
+        def compress(data):
+            calls.append(data)
+            if len(calls) == 2:
+                raise OSError("磁盘已满")
+            return data
+
+        monkeypatch.setitem(archive.CODECS, "lzma", (".json.xz", compress, lambda data: data))
+        with pytest.raises(OSError):
+            store.archive(rows[1:], ordinal("2019-06-01"))
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+        reopened = ArchiveStore(str(tmp_path))
+        assert reopened.cutoff == store.cutoff == ordinal("2019-03-06")
+        assert len(reopened.index['segments']) == 1 and reopened.pending == store.pending
+
+
+class TestArchiveBefore:
+    def test_archive_before(self, tmp_path, rows):
+        dm = DataManager(archive=ArchiveStore(str(tmp_path / "archive")))
+        dm.data_file = str(tmp_path / "data.json")
+        recent = Transaction(50, "餐饮", "2024-01-01", "支出", "recent")
+        dm.transactions = rows + [recent]
+        dm.budget_tracker.rebuild(dm.transactions)
+        events = []
+        dm.add_listener(events.append)
+
+        assert dm.archive_before(ordinal("2020-01-01")) == 4
+        assert dm.transactions == [recent]
+        assert events[-1].removed == [tx.transaction_id for tx in rows]
+        assert dm.budget_tracker.month_totals(2019 * 12 + 2) == (0, 0)
+
+        # 统计结果与归档前一致
+        before = aggregate_transactions(rows + [recent], False, dm.categories)
+        after = merge_aggregates(aggregate_transactions(dm.transactions, False, dm.categories),
+                                 dm.archive.summary(False))
+        assert after == before
+
+    def test_archive_before_without_store(self):
+        with pytest.raises(ValueError):
+            DataManager().archive_before(ordinal("2020-01-01"))
+
+    def test_interrupted_archive_is_finished_on_load(self, tmp_path, rows, monkeypatch):
+        backend = MemoryBackend()
+        dm = DataManager(backend=backend, archive=ArchiveStore(str(tmp_path / "archive")))
+        dm.data_file = "data.json"
+        recent = Transaction(50, "餐饮", "2024-01-01", "支出", "recent")
+        dm.add_transactions(rows + [recent])
+
+        # 索引已写入，随后在保存账本之前中断：记录仍在账本文件中，归档保持 pending
+        monkeypatch.setattr(dm, "save_data", lambda partitions=None: False)
+        dm.archive_before(ordinal("2020-01-01"))
+        assert ArchiveStore(str(tmp_path / "archive")).pending == [tx.transaction_id for tx in rows]
+
+        loaded = DataManager(backend=backend, archive=ArchiveStore(str(tmp_path / "archive")))
+        loaded.data_file = "data.json"
+        loaded.load_data()
+        assert [tx.note for tx in loaded.transactions] == ["recent"]
+        assert loaded.archive.pending == []
+        assert ArchiveStore(str(tmp_path / "archive")).pending == []
+        assert len(loaded.archive.read_rows()) == 4
+        assert loaded.budget_tracker.balance.balance_as_of(ordinal("2024-12-31")) == \
+            sum(tx.amount_cents if tx.type == "收入" else -tx.amount_cents for tx in rows + [recent])
+
+        reloaded = DataManager(backend=backend, archive=ArchiveStore(str(tmp_path / "archive")))
+        reloaded.data_file = "data.json"
+        reloaded.load_data()
+        assert [tx.note for tx in reloaded.transactions] == ["recent"]
@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import json
+import subprocess
+import pytest
+from backends import FileBackend, MemoryBackend
+from category_registry import DEFAULT_CATEGORIES
+from models import DataManager, Transaction
+
+APP_DIR = os.path.join(os.path.dirname(__file__), 'budget_app')
+
+
+def make_dm(backend):
+    dm = DataManager(backend=backend)
+    dm.data_file = "ledger.json"
+    return dm
+
+
+class TestFileBackend:
+    def test_round_trip_and_remove(self, tmp_path):
+        backend = FileBackend()
+        path = str(tmp_path / "data.json")
+        assert not backend.exists(path)
+        backend.write(path, "账本".encode('utf-8'))
+        assert backend.read(path).decode('utf-8') == "账本"
+        assert os.listdir(tmp_path) == ["data.json"]  # 不留下临时文件
+        backend.remove(path)
+        assert not backend.exists(path)
+        with pytest.raises(FileNotFoundError):
+            backend.read(path)
+
+
+class TestMemoryBackend:
+    def test_missing_name(self):
+        with pytest.raises(FileNotFoundError):
+            MemoryBackend().read("missing.json")
+
+    def test_corrupt(self):
+        backend = MemoryBackend({"a": b"abcdef"})
+        backend.corrupt("a")
+        assert backend.files["a"] == b"abc\xffef"
+        backend.corrupt("a", position=0, garbage=b"XY")
+        assert backend.files["a"] == b"XYc\xffef"
+
+    def test_short_write(self):
+        backend = MemoryBackend()
+        backend.fail_next_write(keep_bytes=3)
+        with pytest.raises(OSError):
+            backend.write("a", b"abcdef")
+        assert backend.files["a"] == b"abc"
+        backend.write("a", b"abcdef")  # 只影响下一次写入
+        assert backend.files["a"] == b"abcdef"
+
+
+class TestDataManagerFaults:
+    def test_round_trip_without_disk(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        backend = MemoryBackend()
+        dm = make_dm(backend)
+        dm.load_data()  # 不存在时创建初始文件
+        assert backend.exists("ledger.json")
+        dm.add_transaction(Transaction(12.5, "餐饮", "2024-03-01", "支出", "午饭"))
+
+        loaded = make_dm(backend)
+        loaded.load_data()
+        assert [(tx.amount_cents, tx.note) for tx in loaded.transactions] == [(1250, "午饭")]
+        assert os.listdir(tmp_path) == []
+
+    def test_corrupt_bytes_fall_back_to_defaults(self):
+        backend = MemoryBackend()
+        dm = make_dm(backend)
+        dm.add_transaction(Transaction(10, "餐饮", "2024-03-01", "支出"))
+        original = backend.files["ledger.json"]
+        backend.corrupt("ledger.json", position=0, garbage=b"\x80")
+
+        loaded = make_dm(backend)
+        loaded.load_data()
+        assert len(loaded.transactions) == 0
+        assert loaded.budgets[0].amount == 5000
+        # 损坏的内容另存一份，之后的保存不会让它丢失
+        assert backend.files["ledger.json.corrupt"][1:] == original[1:]
+
+    def test_short_write_then_reload(self):
+        backend = MemoryBackend()
+        dm = make_dm(backend)
+        dm.add_transaction(Transaction(10, "餐饮", "2024-03-01", "支出"))
+        backend.fail_next_write(keep_bytes=40)
+        dm.add_transaction(Transaction(20, "餐饮", "2024-03-02", "支出"))  # 保存失败只打印提示
+        assert len(dm.transactions) == 2
+
+        loaded = make_dm(backend)
+        loaded.load_data()
+        assert len(loaded.transactions) == 0
+        assert len(backend.files["ledger.json.corrupt"]) == 40
+
+    def test_wrong_structure_keeps_state_consistent(self):
+        backend = MemoryBackend({"ledger.json": json.dumps(
+            {'transactions': [{'amount': 1}], 'categories': ["餐饮"]}).encode('utf-8')})
+        dm = make_dm(backend)
+        dm.load_data()
+        assert len(dm.transactions) == 0
+        assert dm.categories == list(DEFAULT_CATEGORIES)  # 没有采用解析到一半的类别列表
+
+
+class TestImportModels:
+    def test_import_does_not_read_data_file(self, tmp_path):
+        (tmp_path / "accounting_data.json").write_text("not json", encoding='utf-8')
+        script = "import models; print(len(models.transactions))"
+        env = dict(os.environ, PYTHONPATH=APP_DIR)
+        result = subprocess.run([sys.executable, "-c", script], cwd=str(tmp_path), env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "0"
+        assert sorted(os.listdir(tmp_path)) == ["accounting_data.json"]
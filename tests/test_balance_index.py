@@ -0,0 +1,121 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import random
+from datetime import date
+from archive import ArchiveStore
+from balance_index import BalanceIndex, FenwickTree, FIRST_ORDINAL, LAST_ORDINAL
+from charts import period_end_ordinal
+from models import DataManager, Transaction
+from utils import parse_date
+
+
+def ordinal(s):
+    return parse_date(s)[0]
+
+
+def brute_balance(rows, through):
+    return sum((-1 if tx.type == "支出" else 1) * tx.amount_cents
+               for tx in rows if tx.date_ordinal is not None and tx.date_ordinal <= through)
+
+
+def random_rows(rng, n):
+    start = date(2020, 1, 1).toordinal()
+    return [Transaction(rng.randint(1, 500), "餐饮", date.fromordinal(start + rng.randrange(1500)).isoformat(),
+                        rng.choice(["支出", "收入"])) for _ in range(n)]
+
+
+class TestFenwickTree:
+    def test_matches_prefix_sums(self):
+        rng = random.Random(3)
+        values = [0] + [rng.randint(-50, 50) for _ in range(100)]
+        tree = FenwickTree.from_values(values)
+        for i in range(101):
+            assert tree.prefix(i) == sum(values[1:i + 1])
+        tree.add(10, 7)
+        values[10] += 7
+        assert tree.prefix(50) == sum(values[1:51])
+
+
+class TestBalanceIndex:
+    def test_random_against_brute_force(self):
+        rng = random.Random(7)
+        rows = random_rows(rng, 300)
+        index = BalanceIndex()
+        index.rebuild(rows[:200])
+        # 补记和删除历史交易
+        for tx in rows[200:]:
+            index.add(tx)
+        for tx in rows[:50]:
+            index.remove(tx)
+        live = rows[50:]
+        for _ in range(50):
+            day = ordinal("2019-12-01") + rng.randrange(1600)
+            assert index.balance_as_of(day) == brute_balance(live, day)
+            start, end = sorted([day, day + rng.randrange(-200, 200)])
+            assert index.spend_between(start, end) == sum(
+                tx.amount_cents for tx in live if tx.type == "支出" and start <= tx.date_ordinal <= end)
+
+    def test_small_and_large_rebuild_agree(self):
+        # 小账本逐条加入，大账本线性建树，两种方式结果一致
+        rows = random_rows(random.Random(11), 6000)
+        small, large = BalanceIndex(), BalanceIndex()
+        small.rebuild(rows[:100])
+        large.rebuild(rows)
+        for tx in rows[100:]:
+            small.add(tx)
+        assert small.expense.tree == large.expense.tree
+        assert small.income.tree == large.income.tree
+
+    def test_running_balance_and_bounds(self):
+        index = BalanceIndex()
+        index.rebuild([Transaction(100, "工资", "2024-01-01", "收入"),
+                       Transaction(30, "餐饮", "2024-01-02", "支出"),
+                       Transaction(1, "餐饮", "bad", "支出")])
+        days = [ordinal("2023-12-31"), ordinal("2024-01-01"), ordinal("2024-01-02")]
+        assert index.running_balance(days) == [0, 10000, 7000]
+        assert index.balance_as_of(FIRST_ORDINAL - 10) == 0
+        assert index.balance_as_of(LAST_ORDINAL + 10) == 7000
+        assert index.spend_between(days[2], days[0]) == 0
+
+    def test_copy_is_independent(self):
+        index = BalanceIndex()
+        copy = index.copy()
+        index.add(Transaction(5, "餐饮", "2024-01-01", "支出"))
+        assert copy.balance_as_of(ordinal("2024-12-31")) == 0
+
+    def test_period_end_ordinal(self):
+        assert period_end_ordinal("2024-02") == ordinal("2024-02-29")
+        assert period_end_ordinal("2024-02-10") == ordinal("2024-02-10")
+
+
+class TestDataManagerBalance:
+    def test_incremental_updates(self, tmp_path):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        dm.add_transaction(Transaction(1000, "工资", "2024-01-01", "收入"))
+        late = Transaction(200, "餐饮", "2023-06-01", "支出")
+        dm.add_transaction(late)
+        assert dm.balance_as_of(ordinal("2023-12-31")) == -20000
+        assert dm.balance_as_of(ordinal("2024-01-01")) == 80000
+        dm.delete_transactions([late.transaction_id])
+        assert dm.balance_as_of(ordinal("2024-01-01")) == 100000
+        assert dm.spend_between(ordinal("2023-01-01"), ordinal("2024-12-31")) == 0
+
+    def test_archive_included(self, tmp_path):
+        dm = DataManager(archive=ArchiveStore(str(tmp_path / "archive")))
+        dm.data_file = str(tmp_path / "data.json")
+        dm.transactions = [Transaction(50, "餐饮", "2019-03-01", "支出"),
+                           Transaction(500, "工资", "2024-01-01", "收入")]
+        dm.budget_tracker.rebuild(dm.transactions)
+        dm.save_data()
+        dm.archive_before(ordinal("2020-01-01"))
+        assert dm.balance_as_of(ordinal("2024-01-01")) == 45000
+
+        # 重新加载后仍然包含归档部分
+        reloaded = DataManager(archive=ArchiveStore(str(tmp_path / "archive")))
+        reloaded.data_file = dm.data_file
+        reloaded.load_data()
+        assert reloaded.balance_as_of(ordinal("2019-12-31")) == -5000
+        assert reloaded.spend_between(ordinal("2019-01-01"), ordinal("2019-12-31")) == 5000
@@ -0,0 +1,126 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+from datetime import date
+import pytest
+from models import Transaction, Budget, DataManager
+from budget_engine import BudgetTracker, period_index, period_bounds
+
+
+TODAY = date(2023, 10, 18)  # 周三
+
+
+def tx(amount, category, day, type_="支出"):
+    return Transaction(amount, category, day, type_)
+
+
+class TestPeriods:
+
+    def test_week_starts_on_monday(self):
+        monday = date(2023, 10, 16).toordinal()
+        sunday = date(2023, 10, 22).toordinal()
+        assert period_index("weekly", monday, 0) == period_index("weekly", sunday, 0)
+        assert period_index("weekly", monday - 1, 0) != period_index("weekly", monday, 0)
+
+    def test_bounds(self):
+        assert period_bounds("monthly", 2024 * 12 + 1) == (date(2024, 2, 1).toordinal(), 29)
+        assert period_bounds("yearly", 2024) == (date(2024, 1, 1).toordinal(), 366)
+        start, length = period_bounds("weekly", period_index("weekly", TODAY.toordinal(), 0))
+        assert date.fromordinal(start) == date(2023, 10, 16) and length == 7
+
+    def test_unknown_period(self):
+        with pytest.raises(ValueError):
+            period_index("daily", 1, 1)
+
+
+class TestBudgetTracker:
+
+    @pytest.fixture
+    def tracker(self):
+        tracker = BudgetTracker()
+        tracker.rebuild([
+            tx(100, "餐饮", "2023-10-17"),
+            tx(50, "餐饮", "2023-10-02"),
+            tx(30, "交通", "2023-10-18"),
+            tx(400, "餐饮", "2023-03-01"),
+            tx(1000, "工资", "2023-10-05", "收入"),
+        ])
+        return tracker
+
+    def test_spent_per_period_and_category(self, tracker):
+        assert tracker.status(Budget(120, "weekly", "餐饮"), TODAY).spent == 10000
+        assert tracker.status(Budget(120, "monthly", "餐饮"), TODAY).spent == 15000
+        assert tracker.status(Budget(120, "yearly", "餐饮"), TODAY).spent == 55000
+        assert tracker.status(Budget(120, "monthly"), TODAY).spent == 18000
+
+    def test_month_totals(self, tracker):
+        assert tracker.month_totals(2023 * 12 + 9) == (18000, 100000)
+
+    def test_incremental_add_and_remove(self, tracker):
+        t = tx(25, "交通", "2023-10-18")
+        tracker.add(t)
+        assert tracker.status(Budget(0, "weekly", "交通"), TODAY).spent == 5500
+        tracker.remove(t)
+        assert tracker.status(Budget(0, "weekly", "交通"), TODAY).spent == 3000
+
+    def test_over_budgets(self, tracker):
+        budgets = [Budget(120, "weekly", "餐饮"), Budget(200, "monthly", "餐饮"),
+                   Budget(20, "monthly", "交通")]
+        over = tracker.over_budgets(budgets, TODAY)
+        assert [status.budget for status in over] == [budgets[2]]
+        assert over[0].remaining == -1000
+
+    def test_burn_down(self, tracker):
+        status = tracker.status(Budget(310, "monthly", "餐饮"), TODAY)
+        assert status.days_elapsed == 18
+        assert status.days_left == 14
+        assert status.daily_allowance == (31000 - 15000) // 14
+
+    def test_invalid_dates_are_ignored(self):
+        tracker = BudgetTracker()
+        tracker.add(tx(10, "餐饮", "bad"))
+        assert tracker.status(Budget(1, "monthly"), TODAY).spent == 0
+
+
+class TestDataManagerBudgets:
+
+    @pytest.fixture
+    def dm(self, tmp_path):
+        d = DataManager()
+        d.data_file = str(tmp_path / "budget_data.json")
+        d.transactions = []
+        return d
+
+    def test_tracker_follows_add_and_delete(self, dm):
+        month = date.today().strftime("%Y-%m")
+        t = tx(80, "餐饮", f"{month}-01")
+        dm.add_transaction(t)
+        assert dm.budget_tracker.status(Budget(100, "monthly", "餐饮")).spent == 8000
+        dm.delete_transactions([t.transaction_id])
+        assert dm.budget_tracker.status(Budget(100, "monthly", "餐饮")).spent == 0
+
+    def test_set_budget_persists(self, dm):
+        budget = dm.set_budget(300, "weekly", "交通")
+        assert budget.budget_id != dm.budgets[0].budget_id
+        assert dm.set_budget(400, "weekly", "交通") is budget
+
+        loaded = DataManager()
+        loaded.data_file = dm.data_file
+        loaded.load_data()
+        assert [(b.amount, b.period, b.category) for b in loaded.budgets[1:]] == [(400, "weekly", "交通")]
+
+        loaded.remove_budget(budget.budget_id)
+        assert len(loaded.budgets) == 1
+
+    def test_zero_budget_is_deleted_with_one_save(self, dm, monkeypatch):
+        budget = dm.set_budget(300, "weekly", "交通")
+        saves = []
+        save_data = dm.save_data
+        monkeypatch.setattr(dm, "save_data", lambda **kwargs: saves.append(kwargs) or save_data(**kwargs))
+        assert dm.set_budget(0, "weekly", "交通") is None
+        assert budget not in dm.budgets and len(saves) == 1
+        # 没有对应的预算或是总预算时不删除也不保存
+        assert dm.set_budget(None, "weekly", "交通") is None
+        assert dm.set_budget(0) is None
+        assert len(dm.budgets) == 1 and len(saves) == 1
@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import json
+import pytest
+from category_registry import DEFAULT_CATEGORIES, CategoryRegistry, registry
+from models import DataManager, Transaction
+from queries import TransactionFilter, aggregate_transactions, filter_transactions
+from storage import PartitionedStorage
+
+
+class TestCategoryRegistry:
+    def test_codes_are_stable(self):
+        reg = CategoryRegistry(["a", "b"])
+        assert reg.code("a") == 0 and reg.code("b") == 1
+        assert reg.code("c") == 2 and reg.code("a") == 0
+        assert reg.name(2) == "c" and len(reg) == 3
+        assert reg.lookup("d") is None and "d" not in reg
+
+    def test_defaults_first(self):
+        assert [registry.code(name) for name in DEFAULT_CATEGORIES] == list(range(len(DEFAULT_CATEGORIES)))
+
+    def test_transaction_code_follows_category(self):
+        tx = Transaction(1, "餐饮", "2024-01-01", "支出")
+        assert tx.category_code == registry.code("餐饮")
+        tx.category = "交通"
+        assert tx.category_code == registry.code("交通")
+
+    def test_transaction_does_not_register_category(self):
+        size = len(registry)
+        tx = Transaction(1, "随手改的类别", "2024-01-01", "支出")
+        assert tx.category_code is None
+        assert len(registry) == size and "随手改的类别" not in registry
+        assert filter_transactions([tx], TransactionFilter(category_filter="随手改的类别")) == [tx]
+        assert filter_transactions([tx], TransactionFilter(category_filter="另一个类别")) == []
+
+
+class TestCategoryQueries:
+    def test_aggregate_unknown_category(self):
+        rows = [Transaction(10, "餐饮", "2024-01-01", "支出"), Transaction(5, "宠物用品", "2024-01-02", "支出")]
+        _, _, category = aggregate_transactions(rows, False, ["餐饮", "交通"])
+        assert category == {"餐饮": 1000, "交通": 0, "宠物用品": 500}
+
+    def test_filter_by_code(self):
+        rows = [Transaction(10, "旅行", "2024-01-01", "支出"), Transaction(5, "餐饮", "2024-01-02", "支出")]
+        assert filter_transactions(rows, TransactionFilter(category_filter="旅行")) == [rows[0]]
+        assert filter_transactions(rows, TransactionFilter(category_filter="不存在的类别")) == []
+
+    def test_filter_does_not_register_typed_text(self):
+        size = len(registry)
+        TransactionFilter(category_filter="随手输入的类别")
+        assert len(registry) == size and registry.lookup("随手输入的类别") is None
+
+
+class TestDataManagerCategories:
+    def test_add_category_persists(self, tmp_path):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        dm.add_category(" 宠物 ")
+        with pytest.raises(ValueError):
+            dm.add_category("宠物")
+        with pytest.raises(ValueError):
+            dm.add_category("  ")
+        assert json.load(open(dm.data_file, encoding="utf-8"))["categories"][-1] == "宠物"
+
+        reloaded = DataManager()
+        reloaded.data_file = dm.data_file
+        reloaded.load_data()
+        assert reloaded.categories == list(DEFAULT_CATEGORIES) + ["宠物"]
+
+    def test_partitions_keep_categories(self, tmp_path):
+        dm = DataManager(partitions=PartitionedStorage(str(tmp_path)))
+        dm.load_data()
+        dm.add_category("旅行")
+        dm.add_transaction(Transaction(100, "旅行", "2024-05-01", "支出"))
+
+        reloaded = DataManager(partitions=PartitionedStorage(str(tmp_path)))
+        reloaded.load_data()
+        reloaded.ensure_loaded()
+        assert "旅行" in reloaded.categories
+        assert reloaded.aggregate(False)[2]["旅行"] == 10000
+
+    def test_unlisted_categories_are_adopted(self, tmp_path):
+        path = tmp_path / "data.json"
+        path.write_text(json.dumps({"transactions": [
+            {"transaction_id": "t1", "amount": 3, "category": "旧类别", "date": "2024-01-01", "type": "支出"}],
+            "budgets": []}, ensure_ascii=False), encoding="utf-8")
+        dm = DataManager()
+        dm.data_file = str(path)
+        dm.load_data()
+        assert dm.categories[-1] == "旧类别"
+        assert dm.aggregate(True)[2]["旧类别"] == 300
@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import threading
+import pytest
+import charts
+from charts import ChartRenderer, render_chart
+
+
+@pytest.fixture
+def real_matplotlib(monkeypatch):
+    """test_integration 会把 matplotlib 替换为 MagicMock，这里临时换回真实模块"""
+    pytest.importorskip("matplotlib")
+    saved = {name: module for name, module in sys.modules.items()
+             if name == "matplotlib" or name.startswith("matplotlib.")}
+    for name in saved:
+        del sys.modules[name]
+    monkeypatch.setattr(charts, "Figure", None)
+    monkeypatch.setattr(charts, "FigureCanvasAgg", None)
+    yield
+    for name in [n for n in sys.modules if n == "matplotlib" or n.startswith("matplotlib.")]:
+        del sys.modules[name]
+    sys.modules.update(saved)
+
+
+class TestRenderChart:
+    def test_png(self, real_matplotlib):
+        png = render_chart({"2024-01": 1000}, {"2024-02": 5000}, {"餐饮": 1000, "交通": 0}, False,
+                           width=400, height=200)
+        assert png.startswith(b"\x89PNG")
+        # 宽高写在 IHDR 中
+        assert int.from_bytes(png[16:20], "big") == 400
+        assert int.from_bytes(png[20:24], "big") == 200
+
+    def test_daily_with_trend(self, real_matplotlib):
+        from trends import DailySpend
+        trend = DailySpend()
+        for day in range(1, 20):
+            trend.add_amount(739000 + day, "餐饮", 1000 * day)
+        expense = {f"2024-01-{day:02d}": 1000 * day for day in range(1, 20)}
+        png = render_chart(expense, {}, {"餐饮": 1}, True, width=300, height=200, trend=trend)
+        assert png.startswith(b"\x89PNG")
+
+    def test_empty(self, real_matplotlib):
+        assert render_chart({}, {}, {"餐饮": 0}, True, width=300, height=200).startswith(b"\x89PNG")
+
+    def test_stale(self, real_matplotlib):
+        assert render_chart({"2024-01": 1}, {}, {}, False, is_stale=lambda: True) is None
+
+
+class TestChartRenderer:
+    def test_newer_request_invalidates_older(self):
+        renderer = ChartRenderer()
+        started = threading.Event()
+        release = threading.Event()
+        seen = []
+
+        def slow(name, is_stale):
+            started.set()
+            release.wait(5)
+            seen.append((name, is_stale()))
+            return name
+
+        first, running = renderer.submit(slow, "first")
+        started.wait(5)
+        second, queued = renderer.submit(slow, "second")
+        third, latest = renderer.submit(slow, "third")
+        release.set()
+
+        assert latest.result(5) == "third"
+        assert queued.cancelled()
+        assert running.result(5) == "first"
+        # 正在运行的旧任务能看到自己已经作废
+        assert seen == [("first", True), ("third", False)]
+        assert not renderer.is_current(first) and renderer.is_current(third)
+        renderer.shutdown()
@@ -0,0 +1,134 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import io
+import json
+import subprocess
+import pytest
+import cli
+from models import DataManager, Transaction
+from queries import TransactionFilter, filter_transactions
+
+APP_DIR = os.path.join(os.path.dirname(__file__), 'budget_app')
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    rows = [
+        Transaction(10, "餐饮", "2024-01-05", "支出", "午饭"),
+        Transaction(25, "交通", "2024-01-06", "支出", "地铁"),
+        Transaction(3000, "其他", "2024-02-01", "收入", "工资"),
+    ]
+    path = tmp_path / "data.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'transactions': [t.to_dict() for t in rows],
+                   'budgets': [{'budget_id': 'budget_1', 'amount': 50, 'period': 'monthly'}]}, f)
+    return str(path)
+
+
+def run(data_file, *argv):
+    out = io.StringIO()
+    code = cli.main(["--data-file", data_file, *argv], out=out)
+    return code, out.getvalue()
+
+
+def load(data_file):
+    dm = DataManager()
+    dm.data_file = data_file
+    dm.load_data()
+    return dm
+
+
+class TestCli:
+    def test_add(self, data_file):
+        code, out = run(data_file, "add", "12.5", "餐饮", "2024-3-1", "--note", "早饭")
+        assert code == 0
+        added = load(data_file).transactions[-1]
+        assert out.strip() == added.transaction_id
+        assert (added.date, added.amount_cents, added.note) == ("2024-03-01", 1250, "早饭")
+
+    def test_add_stores_numeric_amount(self, data_file):
+        run(data_file, "add", "12.5", "餐饮", "2024-03-01")
+        run(data_file, "add", "0.105", "餐饮", "2024-03-01")  # 按分四舍五入
+        with open(data_file, encoding='utf-8') as f:
+            stored = json.load(f)['transactions'][-2:]
+        assert [row['amount'] for row in stored] == [12.5, 0.11]
+        assert all(isinstance(row['amount'], float) for row in stored)
+
+    def test_add_invalid(self, data_file):
+        assert run(data_file, "add", "0", "餐饮", "2024-03-01")[0] == 2
+        assert run(data_file, "add", "5", "餐饮", "2024-02-30")[0] == 2
+        assert len(load(data_file).transactions) == 3
+
+    def test_import_csv(self, data_file, tmp_path):
+        path = tmp_path / "import.csv"
+        path.write_text("amount,category,date,type,note\n"
+                        "1,餐饮,2024-03-01,支出,a\n"
+                        "2,工资,2024-03-02,收入,b\n"
+                        "x,餐饮,2024-03-03,支出,bad\n", encoding='utf-8')
+        assert run(data_file, "import", str(path))[0] == 1
+        assert len(load(data_file).transactions) == 3
+
+        code, out = run(data_file, "import", str(path), "--skip-invalid")
+        assert code == 0 and "已导入 1 条记录" in out
+        assert load(data_file).transactions[-1].note == "a"
+
+    def test_import_json(self, data_file, tmp_path):
+        path = tmp_path / "import.json"
+        path.write_text(json.dumps([{"amount": 3, "category": "购物", "date": "2024-03-01"}]),
+                        encoding='utf-8')
+        assert run(data_file, "import", str(path))[0] == 0
+        assert load(data_file).transactions[-1].category == "购物"
+
+    def test_import_json_non_object_rows(self, data_file, tmp_path):
+        path = tmp_path / "import.json"
+        path.write_text(json.dumps([{"amount": 3, "category": "购物", "date": "2024-03-01"},
+                                    5, "text", [1, 2]]), encoding='utf-8')
+        assert run(data_file, "import", str(path))[0] == 1
+        assert len(load(data_file).transactions) == 3
+        code, out = run(data_file, "import", str(path), "--skip-invalid")
+        assert code == 0 and "已导入 1 条记录" in out
+
+        path.write_text("5", encoding='utf-8')
+        assert run(data_file, "import", str(path))[0] == 2
+
+    def test_import_skips_duplicates(self, data_file, tmp_path):
+        path = tmp_path / "statement.csv"
+        path.write_text("amount,category,date,type,note\n"
+                        "10,餐饮,2024-01-05,支出,午饭\n"
+                        "7,餐饮,2024-01-07,支出,晚饭\n", encoding='utf-8')
+        code, out = run(data_file, "import", str(path))
+        assert code == 0 and "已导入 1 条记录，跳过 1 条重复记录" in out
+        assert run(data_file, "import", str(path))[1].startswith("已导入 0 条记录，跳过 2 条")
+        assert "已导入 2 条记录" in run(data_file, "import", str(path), "--allow-duplicates")[1]
+        assert len(load(data_file).transactions) == 6
+
+    def test_search_matches_filter(self, data_file):
+        code, out = run(data_file, "search", "--type", "支出", "--format", "json")
+        expected = filter_transactions(load(data_file).transactions, TransactionFilter(type_filter="支出"))
+        assert [row["transaction_id"] for row in json.loads(out)] == \
+            [tx.transaction_id for tx in expected]
+
+        code, out = run(data_file, "search", "--search", "地铁", "--column", "备注", "--format", "csv")
+        assert out.splitlines() == ["date,type,category,amount,note", "2024-01-06,支出,交通,25.00,地铁"]
+
+    def test_monthly(self, data_file):
+        code, out = run(data_file, "monthly", "--month", "2024-01")
+        assert "支出: 35.00" in out and "余额: 15.00" in out
+        assert run(data_file, "monthly", "--month", "2024-13")[0] == 2
+
+    def test_stats(self, data_file):
+        code, out = run(data_file, "stats", "--format", "json")
+        data = json.loads(out)
+        assert data["expense_cents"] == {"2024-01": 3500}
+        assert data["income_cents"] == {"2024-02": 300000}
+
+    def test_no_gui_imports(self, data_file, tmp_path):
+        script = ("import sys, cli; cli.main(['--data-file', sys.argv[1], 'stats']); "
+                  "print(sorted(m for m in ('tkinter', 'matplotlib') if m in sys.modules))")
+        env = dict(os.environ, PYTHONPATH=APP_DIR)
+        result = subprocess.run([sys.executable, "-c", script, data_file], cwd=str(tmp_path), env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "[]"
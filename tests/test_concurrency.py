@@ -0,0 +1,143 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import threading
+import pytest
+from models import DataManager, Ledger, Transaction, new_transaction_id
+from queries import aggregate_transactions
+
+WRITERS = 4
+ADDS_PER_WRITER = 40
+
+
+@pytest.fixture
+def dm(tmp_path):
+    d = DataManager()
+    d.data_file = str(tmp_path / "data.json")
+    return d
+
+
+def run_threads(targets):
+    errors = []
+
+    def guarded(target):
+        try:
+            target()
+        except BaseException as e:  # 子线程中的异常需要带回主线程
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(t,)) for t in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+class TestLedger:
+    def test_list_like(self):
+        t1 = Transaction(1, "餐饮", "2024-01-01", "支出")
+        t2 = Transaction(2, "餐饮", "2024-01-02", "支出")
+        ledger = Ledger([t1])
+        ledger.append(t2)
+        assert ledger == [t1, t2]
+        assert ledger[-1] is t2
+        assert list(reversed(ledger)) == [t2, t1]
+        assert ledger.version == 1
+        assert ledger.remove_where(lambda tx: tx is t1) == [t1]
+        ledger.clear()
+        assert len(ledger) == 0 and not ledger
+
+    def test_snapshot_unaffected_by_writes(self):
+        t1 = Transaction(1, "餐饮", "2024-01-01", "支出")
+        ledger = Ledger([t1])
+        snapshot = ledger.snapshot()
+        ledger.append(Transaction(2, "餐饮", "2024-01-02", "支出"))
+        ledger.remove_where(lambda tx: tx is t1)
+        assert snapshot.rows == (t1,)
+        assert snapshot.version == 0
+        assert ledger.snapshot().version == 2
+
+    def test_alias_never_stale(self, dm):
+        alias = dm.transactions
+        dm.add_transaction(Transaction(1, "餐饮", "2024-01-01", "支出"))
+        dm.delete_transactions([alias[0].transaction_id])
+        dm.transactions = [Transaction(2, "餐饮", "2024-01-02", "支出")]
+        assert alias is dm.transactions
+        assert len(alias) == 1
+
+
+class TestConcurrentAccess:
+    def test_unique_ids_across_threads(self):
+        ids = []
+        run_threads([lambda: ids.extend(new_transaction_id() for _ in range(500))] * 4)
+        assert len(set(ids)) == len(ids)
+
+    def test_concurrent_writers_and_readers(self, dm):
+        events = []
+        dm.add_listener(events.append)
+        done = threading.Event()
+        seen_versions = []
+
+        def writer(n):
+            def run():
+                for i in range(ADDS_PER_WRITER):
+                    tx = Transaction(i + 1, "餐饮", f"2024-0{n + 1}-{i % 28 + 1:02d}", "支出", f"w{n}")
+                    dm.add_transaction(tx)
+                    if i % 4 == 3:
+                        dm.delete_transactions([tx.transaction_id])
+            return run
+
+        def reader():
+            while not done.is_set():
+                snapshot = dm.snapshot()
+                seen_versions.append(snapshot.version)
+                # 快照在遍历过程中不会变化
+                expense = aggregate_transactions(snapshot.rows, False, dm.categories)[0]
+                assert sum(expense.values()) == sum(tx.amount_cents for tx in snapshot.rows)
+                assert len({tx.transaction_id for tx in snapshot.rows}) == len(snapshot.rows)
+
+        readers = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in readers:
+            thread.start()
+        try:
+            run_threads([writer(n) for n in range(WRITERS)])
+        finally:
+            done.set()
+            for thread in readers:
+                thread.join()
+
+        kept = WRITERS * ADDS_PER_WRITER * 3 // 4
+        assert len(dm.transactions) == kept
+        assert seen_versions == sorted(seen_versions)
+        # 变更事件与写操作一一对应且按版本顺序发出
+        assert [e.version for e in events] == list(range(1, len(events) + 1))
+        assert len(events) == WRITERS * ADDS_PER_WRITER * 5 // 4
+
+        # 增量维护的预算统计与重新计算的结果一致
+        for month in range(WRITERS):
+            expected = sum(tx.amount_cents for tx in dm.transactions if tx.month_index == 2024 * 12 + month)
+            assert dm.budget_tracker.month_totals(2024 * 12 + month)[0] == expected
+
+        reloaded = DataManager()
+        reloaded.data_file = dm.data_file
+        reloaded.load_data()
+        assert {tx.transaction_id for tx in reloaded.transactions} == \
+            {tx.transaction_id for tx in dm.transactions}
+
+    def test_background_save_during_writes(self, dm):
+        def background_save():
+            for _ in range(20):
+                dm.save_data()
+
+        def writer():
+            for i in range(50):
+                dm.add_transaction(Transaction(1, "餐饮", "2024-05-01", "支出"))
+
+        run_threads([background_save, writer])
+        dm.save_data()
+        reloaded = DataManager()
+        reloaded.data_file = dm.data_file
+        reloaded.load_data()
+        assert len(reloaded.transactions) == 50
@@ -0,0 +1,151 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import random
+from datetime import date
+import pytest
+from archive import ArchiveStore
+from dedup import BloomFilter, DuplicateIndex, fingerprint
+from models import DataManager, Transaction
+from storage import PartitionedStorage, partition_key
+from utils import parse_date
+
+
+def copy_of(tx):
+    """模拟重新导入同一条记录：内容相同，交易ID不同"""
+    return Transaction(tx.amount, tx.category, tx.date, tx.type, tx.note)
+
+
+class TestFingerprint:
+    def test_ignores_id_and_note_formatting(self):
+        tx = Transaction(12.5, "餐饮", "2024-01-05", "支出", "Lunch  with Bob")
+        other = Transaction("12.50", "餐饮", "2024-01-05", "支出", " lunch with bob ")
+        assert fingerprint(tx) == fingerprint(other)
+        assert fingerprint(tx) != fingerprint(Transaction(12.5, "餐饮", "2024-01-06", "支出", "Lunch with Bob"))
+        assert fingerprint(tx) != fingerprint(Transaction(12.5, "餐饮", "2024-01-05", "收入", "Lunch with Bob"))
+
+
+class TestBloomFilter:
+    def test_no_false_negatives_and_low_error(self, tmp_path):
+        rng = random.Random(0)
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        members = [rng.randbytes(16) for _ in range(5000)]
+        for digest in members:
+            bloom.add(digest)
+        assert all(digest in bloom for digest in members)
+        false_positives = sum(rng.randbytes(16) in bloom for _ in range(10000))
+        assert false_positives < 300
+
+        path = str(tmp_path / "dedup.bloom")
+        bloom.save(path)
+        loaded = BloomFilter.load(path)
+        assert loaded.count == 5000 and all(digest in loaded for digest in members[:100])
+
+    def test_load_invalid(self, tmp_path):
+        assert BloomFilter.load(str(tmp_path / "missing.bloom")) is None
+        path = tmp_path / "bad.bloom"
+        path.write_bytes(b"not a bloom filter")
+        assert BloomFilter.load(str(path)) is None
+
+
+class TestDuplicateIndex:
+    def test_incremental(self):
+        rows = [Transaction(1, "餐饮", "2024-01-01", "支出") for _ in range(2)]
+        index = DuplicateIndex()
+        index.add(rows[0])  # 尚未建立时忽略
+        index.ensure_built(rows)
+        digest = fingerprint(rows[0])
+        assert index.count(digest) == 2
+        index.remove(rows[0])
+        assert index.count(digest) == 1
+        index.add(copy_of(rows[0]))
+        assert index.count(digest) == 2
+
+
+@pytest.fixture
+def statement():
+    return [
+        Transaction(10, "餐饮", "2024-01-05", "支出", "午饭"),
+        Transaction(10, "餐饮", "2024-01-05", "支出", "午饭"),  # 同一天两笔相同的消费
+        Transaction(25, "交通", "2024-01-06", "支出", "地铁"),
+    ]
+
+
+class TestImport:
+    def test_overlapping_statement(self, tmp_path, statement):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        assert len(dm.import_transactions(statement).added) == 3
+
+        second = [copy_of(tx) for tx in statement] + [Transaction(8, "餐饮", "2024-01-07", "支出")]
+        result = dm.import_transactions(second)
+        assert len(result.duplicates) == 3 and [tx.amount for tx in result.added] == [8]
+        assert len(dm.transactions) == 4
+
+        # 账本中只有两笔，第三笔相同的消费是新记录
+        result = dm.import_transactions([copy_of(statement[0]) for _ in range(3)])
+        assert (len(result.added), len(result.duplicates)) == (1, 2)
+
+        assert len(dm.import_transactions([copy_of(statement[2])], skip_duplicates=False).added) == 1
+
+    def test_deleted_rows_can_be_imported_again(self, tmp_path, statement):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        dm.import_transactions(statement)
+        dm.delete_transactions([statement[2].transaction_id])
+        assert len(dm.import_transactions([copy_of(statement[2])]).added) == 1
+
+    def test_bloom_screens_unloaded_history(self, tmp_path, statement):
+        directory = str(tmp_path / "data")
+        dm = DataManager(partitions=PartitionedStorage(directory))
+        dm.bloom_path = os.path.join(directory, "dedup.bloom")
+        dm.load_data()
+        dm.import_transactions(statement)  # 第一次导入时由全部历史建立过滤器
+        assert os.path.exists(dm.bloom_path)
+        dm.add_transaction(Transaction(40, "购物", "2023-06-01", "支出", "手动添加"))
+
+        reopened = DataManager(partitions=PartitionedStorage(directory))
+        reopened.bloom_path = dm.bloom_path
+        reopened.load_data()
+        assert "2024-01" not in reopened.loaded_partitions
+
+        # 新记录不命中过滤器，不需要加载历史分区
+        result = reopened.import_transactions([Transaction(99, "餐饮", "2024-01-20", "支出", "新记录")])
+        assert len(result.added) == 1 and "2023-06" not in reopened.loaded_partitions
+
+        # 重复记录命中过滤器，只加载对应月份的分区做精确比较
+        duplicates = [copy_of(statement[2]), Transaction(40, "购物", "2023-06-01", "支出", "手动添加")]
+        result = reopened.import_transactions(duplicates)
+        assert len(result.duplicates) == 2 and not result.added
+
+    def test_loaded_rows_missing_from_bloom(self, tmp_path, statement):
+        directory = str(tmp_path / "data")
+        dm = DataManager(partitions=PartitionedStorage(directory))
+        dm.bloom_path = os.path.join(directory, "dedup.bloom")
+        dm.load_data()
+        dm.import_transactions(statement)
+
+        # 绕过 DataManager 写入的近期记录（例如其他进程），不在过滤器中
+        row = Transaction(12, "餐饮", date.today().isoformat(), "支出", "其他进程写入")
+        storage = PartitionedStorage(directory)
+        storage.read_manifest()
+        storage.write({partition_key(row): [row]}, storage.manifest['budgets'])
+
+        reopened = DataManager(partitions=PartitionedStorage(directory))
+        reopened.bloom_path = dm.bloom_path
+        reopened.load_data()
+        assert partition_key(row) in reopened.loaded_partitions
+        result = reopened.import_transactions([copy_of(row)])
+        assert len(result.duplicates) == 1 and not result.added
+
+    def test_archived_duplicates(self, tmp_path, statement):
+        dm = DataManager(archive=ArchiveStore(str(tmp_path / "archive")))
+        dm.data_file = str(tmp_path / "data.json")
+        dm.bloom_path = str(tmp_path / "dedup.bloom")
+        dm.import_transactions(statement)
+        dm.archive_before(parse_date("2024-02-01")[0])
+        assert len(dm.transactions) == 0
+
+        result = dm.import_transactions([copy_of(tx) for tx in statement])
+        assert len(result.duplicates) == 3
@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import json
+import pytest
+import instrumentation
+from instrumentation import span, traced, count
+from models import DataManager, Transaction
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    instrumentation.reset()
+    instrumentation.enable(str(path))
+    yield path
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def read_trace(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestInstrumentation:
+
+    def test_disabled_is_noop(self, tmp_path):
+        assert not instrumentation.is_enabled()
+        with span("x") as s:
+            s.count("rows", 3)
+        count("rows")
+        assert "x" not in instrumentation.summary()
+
+    def test_span_writes_jsonl(self, trace_file):
+        with span("outer", mode="daily") as s:
+            s.count("rows_scanned", 10)
+            with span("inner"):
+                count("rows_rendered", 2)
+                count("rows_rendered", 3)
+
+        records = read_trace(trace_file)
+        assert [r["span"] for r in records] == ["inner", "outer"]
+        assert records[0]["parent"] == "outer"
+        assert records[0]["counters"] == {"rows_rendered": 5}
+        assert records[1]["counters"] == {"rows_scanned": 10}
+        assert records[1]["mode"] == "daily"
+        assert records[1]["depth"] == 0
+
+    def test_traced_records_errors(self, trace_file):
+        @traced("boom")
+        def boom():
+            raise ValueError("x")
+
+        with pytest.raises(ValueError):
+            boom()
+        assert read_trace(trace_file)[-1]["error"] == "ValueError"
+        assert instrumentation.summary()["boom"]["count"] == 1
+
+    def test_data_manager_spans(self, trace_file, tmp_path):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        dm.transactions = []
+        dm.add_transaction(Transaction(1, "餐饮", "2023-01-01", "支出"))
+        dm.load_data()
+
+        records = read_trace(trace_file)
+        assert [r["span"] for r in records] == ["save", "load"]
+        assert records[1]["counters"] == {"rows": 1}
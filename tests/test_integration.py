@@ -1,5 +1,6 @@
 import budget_app.models as models_module
 from budget_app.models import DataManager, Transaction, Budget
+from budget_app.backends import MemoryBackend
 import sys
 import os
 from unittest.mock import MagicMock, patch
@@ -21,10 +22,10 @@ sys.modules['matplotlib.backends.backend_tkagg'] = MagicMock()
 class TestIntegration:
 
     @pytest.fixture
-    def data_manager(self, tmp_path):
-        """Fixture to provide a DataManager with a temporary file"""
-        dm = DataManager()
-        dm.data_file = str(tmp_path / "integration_test_data.json")
+    def data_manager(self):
+        """Fixture to provide a DataManager backed by in-memory storage (no disk access)"""
+        dm = DataManager(backend=MemoryBackend())
+        dm.data_file = "integration_test_data.json"
         # Reset global lists in models module to ensure isolation
         models_module.transactions.clear()
         models_module.budgets.clear()
@@ -55,7 +56,7 @@ class TestIntegration:
         data_manager.save_data()
 
         # 3. Create a NEW DataManager instance pointing to the same file
-        new_dm = DataManager()
+        new_dm = DataManager(backend=data_manager.backend)
         new_dm.data_file = data_manager.data_file
         new_dm.load_data()
 
@@ -71,7 +72,7 @@ class TestIntegration:
         assert len(new_dm.transactions) == 0
 
         # 6. Reload again to verify deletion persisted
-        final_dm = DataManager()
+        final_dm = DataManager(backend=data_manager.backend)
         final_dm.data_file = data_manager.data_file
         final_dm.load_data()
         assert len(final_dm.transactions) == 0
@@ -1,6 +1,7 @@
 from unittest.mock import patch, mock_open
 import pytest
 import json
+from datetime import date
 from models import DataManager, Transaction, Budget, User
 import sys
 import os
@@ -20,6 +21,10 @@ class TestTransaction:
         assert t.note == "Lunch"
         assert t.transaction_id.startswith("txn_")
 
+    def test_transaction_ids_are_unique(self):
+        ids = {Transaction(1, "Food", "2023-01-01", "支出").transaction_id for _ in range(1000)}
+        assert len(ids) == 1000
+
     def test_to_dict(self):
         t = Transaction(100, "Food", "2023-01-01", "支出", "Lunch")
         t.transaction_id = "txn_123"
@@ -42,6 +47,25 @@ class TestTransaction:
         assert t.amount == 100
         assert t.category == 'Food'
 
+    def test_parsed_date(self):
+        t = Transaction(100, "Food", "2023-02-01", "支出")
+        assert t.date_ordinal == date(2023, 2, 1).toordinal()
+        assert t.month_index == 2023 * 12 + 1
+        assert t.month_key == "2023-02"
+
+    def test_parsed_date_follows_assignment(self):
+        t = Transaction(100, "Food", "2023-02-01", "支出")
+        t.date = "2024-12-31"
+        assert t.date_ordinal == date(2024, 12, 31).toordinal()
+        assert t.month_key == "2024-12"
+
+    def test_unparsable_date(self):
+        t = Transaction(100, "Food", "not a date", "支出")
+        assert t.date == "not a date"
+        assert t.date_ordinal is None
+        assert t.month_key is None
+        assert t.to_dict()['date'] == "not a date"
+
 
 class TestBudget:
     def test_budget_creation(self):
@@ -170,3 +194,32 @@ class TestDataManager:
         assert dm.budgets[0].amount == 5000
         # 验证交易记录是否为空
         assert len(dm.transactions) == 0
+
+    def test_change_events(self, dm):
+        changes = []
+        dm.add_listener(changes.append)
+        t = Transaction(100, "Food", "2023-01-01", "支出")
+        dm.add_transaction(t)
+        dm.delete_transactions([t.transaction_id])
+        dm.load_data()
+        dm.remove_listener(changes.append)
+        dm.add_transaction(Transaction(1, "Food", "2023-01-01", "支出"))
+
+        assert [c.added for c in changes] == [[t], [], []]
+        assert [c.removed for c in changes] == [[], [t.transaction_id], []]
+        assert [c.reset for c in changes] == [False, False, True]
+        assert [c.version for c in changes] == [1, 2, 3]
+        assert dm.version == 4
+
+    def test_loading_keeps_list_objects(self, dm):
+        # 模块级别名（models.budgets 等）在加载后仍指向当前数据
+        budgets, users, categories = dm.budgets, dm.users, dm.categories
+        with open(dm.data_file, 'w', encoding='utf-8') as f:
+            json.dump({'transactions': [], 'budgets': [Budget(1234).to_dict()]}, f)
+        dm.load_data()
+        assert dm.budgets is budgets and budgets[0].amount == 1234
+        assert dm.users is users and dm.categories is categories
+        with open(dm.data_file, 'w', encoding='utf-8') as f:
+            f.write("损坏的内容")
+        dm.load_data()
+        assert dm.budgets is budgets and budgets[0].amount == 5000
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import json
+import pytest
+from money import to_cents, format_cents
+from models import Transaction
+
+
+class TestToCents:
+
+    def test_float_uses_shortest_repr(self):
+        assert to_cents(39.8) == 3980
+        assert to_cents(0.1) == 10
+        assert to_cents(199.0) == 19900
+
+    def test_int_and_string(self):
+        assert to_cents(12) == 1200
+        assert to_cents("12.345") == 1235
+        assert to_cents("-0.005") == -1
+
+    def test_invalid(self):
+        for value in ("abc", "", "nan", float("inf"), None):
+            with pytest.raises(ValueError):
+                to_cents(value)
+
+    def test_format_cents(self):
+        assert format_cents(0) == "0.00"
+        assert format_cents(3980) == "39.80"
+        assert format_cents(-5) == "-0.05"
+        assert format_cents(123456789) == "1234567.89"
+
+    def test_format_matches_float_format(self):
+        for amount in (0.0, 1.5, 39.8, 199.0, 12345.67, 0.07):
+            assert format_cents(to_cents(amount)) == f"{amount:.2f}"
+
+
+class TestSummation:
+
+    def test_exact_where_float_drifts(self):
+        amounts = [0.1] * 1000
+        assert sum(amounts) != 100.0
+        assert sum(to_cents(a) for a in amounts) == 10000
+
+
+class TestTransactionAmount:
+
+    def test_cents_and_display(self):
+        t = Transaction(39.8, "医疗", "2023-01-01", "支出")
+        assert t.amount_cents == 3980
+        assert t.amount_text == "39.80"
+        assert t.amount_str == "39.8"
+
+    def test_invalid_amount_counts_as_zero(self):
+        t = Transaction("abc", "医疗", "2023-01-01", "支出")
+        assert t.amount == "abc"
+        assert t.amount_cents == 0
+
+    def test_json_round_trip_is_lossless(self):
+        for amount in (0.1, 39.8, 1e-7, 123456789.12, 7):
+            t = Transaction(amount, "餐饮", "2023-01-01", "支出")
+            loaded = Transaction.from_dict(json.loads(json.dumps(t.to_dict())))
+            assert loaded.amount == amount
+            assert type(loaded.amount) is type(amount)
+            assert loaded.amount_cents == t.amount_cents
+
@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import pytest
+from models import Transaction
+from queries import TransactionFilter, filter_transactions, monthly_totals, aggregate_transactions
+
+
+@pytest.fixture
+def ledger():
+    return [
+        Transaction(100.0, "餐饮", "2023-10-01", "支出", "Lunch"),
+        Transaction(39.8, "医疗", "2023-10-10", "支出", "感冒药"),
+        Transaction(5000, "工资", "2023-10-15", "收入", "Salary"),
+        Transaction(12.0, "交通", "2023-11-02", "支出", "地铁"),
+    ]
+
+
+def notes(rows):
+    return [t.note for t in rows]
+
+
+class TestTransactionFilter:
+
+    def test_no_filter_returns_newest_first(self, ledger):
+        assert notes(filter_transactions(ledger, TransactionFilter())) == ["地铁", "Salary", "感冒药", "Lunch"]
+
+    def test_search_all_columns_is_case_insensitive(self, ledger):
+        assert notes(filter_transactions(ledger, TransactionFilter("LUNCH"))) == ["Lunch"]
+        assert notes(filter_transactions(ledger, TransactionFilter("39.8"))) == ["感冒药"]
+
+    def test_search_single_column(self, ledger):
+        assert notes(filter_transactions(ledger, TransactionFilter("2023-11", "日期"))) == ["地铁"]
+        assert filter_transactions(ledger, TransactionFilter("2023-11", "备注")) == []
+
+    def test_type_and_category(self, ledger):
+        assert notes(filter_transactions(ledger, TransactionFilter(type_filter="收入"))) == ["Salary"]
+        assert notes(filter_transactions(ledger, TransactionFilter(category_filter="医疗"))) == ["感冒药"]
+
+    def test_amount_range(self, ledger):
+        rows = filter_transactions(ledger, TransactionFilter(amount_min="12", amount_max="100"))
+        assert notes(rows) == ["地铁", "感冒药", "Lunch"]
+
+    def test_invalid_amount_is_ignored(self, ledger):
+        assert len(filter_transactions(ledger, TransactionFilter(amount_min="abc", amount_max="1"))) == 4
+
+    def test_date_range(self, ledger):
+        rows = filter_transactions(ledger, TransactionFilter(date_start="2023-10-10", date_end="2023-10-31"))
+        assert notes(rows) == ["Salary", "感冒药"]
+
+    def test_partial_date_falls_back_to_string_compare(self, ledger):
+        assert notes(filter_transactions(ledger, TransactionFilter(date_start="2023-11"))) == ["地铁"]
+
+    def test_key_ignores_column_without_term(self):
+        assert TransactionFilter("", "备注").key() == TransactionFilter().key()
+        assert TransactionFilter("a", "备注").key() != TransactionFilter("a").key()
+
+
+class TestQueries:
+
+    def make(self):
+        return [
+            Transaction(0.1, "餐饮", "2023-10-01", "支出"),
+            Transaction(0.2, "交通", "2023-10-01", "支出"),
+            Transaction(500, "工资", "2023-10-02", "收入"),
+            Transaction(50, "餐饮", "2023-11-02", "支出"),
+            Transaction(1, "餐饮", "bad date", "支出"),
+        ]
+
+    def test_monthly_totals(self):
+        assert monthly_totals(self.make(), 2023 * 12 + 9) == (30, 50000)
+
+    def test_aggregate_daily(self):
+        expense, income, category = aggregate_transactions(self.make(), True, ["餐饮", "交通"])
+        assert expense == {"2023-10-01": 30, "2023-11-02": 5000}
+        assert income == {"2023-10-02": 50000}
+        assert category == {"餐饮": 5010, "交通": 20}
+
+    def test_aggregate_monthly(self):
+        expense, income, _ = aggregate_transactions(self.make(), False, ["餐饮", "交通"])
+        assert expense == {"2023-10": 30, "2023-11": 5000}
+        assert income == {"2023-10": 50000}
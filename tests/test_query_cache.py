@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+from models import DataManager, Transaction
+from queries import QueryCache, TransactionFilter
+
+
+class TestQueryCache:
+    def test_hit_and_miss(self):
+        cache = QueryCache()
+        calls = []
+        compute = lambda: calls.append(1) or "result"
+        assert cache.get("a", 1, compute) == "result"
+        assert cache.get("a", 1, compute) == "result"
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        cache = QueryCache(maxsize=2)
+        cache.get("a", 1, lambda: "a")
+        cache.get("b", 1, lambda: "b")
+        cache.get("a", 1, lambda: "a")  # a 变为最近使用
+        cache.get("c", 1, lambda: "c")  # 淘汰 b
+        assert cache.stats()["evictions"] == 1
+        assert cache.get("a", 1, lambda: "new") == "a"
+        assert cache.get("b", 1, lambda: "new") == "new"
+
+    def test_new_version_invalidates(self):
+        cache = QueryCache()
+        cache.get("a", 1, lambda: "old")
+        assert cache.get("a", 2, lambda: "new") == "new"
+        assert cache.stats()["invalidations"] == 1
+        # 基于旧版本快照的查询不会覆盖新版本的结果
+        assert cache.get("a", 1, lambda: "stale") == "stale"
+        assert cache.get("a", 2, lambda: "other") == "new"
+
+
+class TestDataManagerQueries:
+    def make_dm(self, tmp_path):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        dm.transactions = [
+            Transaction(10, "餐饮", "2024-01-01", "支出", "午饭"),
+            Transaction(20, "交通", "2024-01-02", "支出"),
+            Transaction(100, "其他", "2024-02-01", "收入"),
+        ]
+        dm.budget_tracker.rebuild(dm.transactions)
+        return dm
+
+    def test_toggle_filters_hits_cache(self, tmp_path):
+        dm = self.make_dm(tmp_path)
+        food = TransactionFilter(category_filter="餐饮")
+        expense = TransactionFilter(type_filter="支出")
+        for _ in range(3):
+            dm.search(TransactionFilter(category_filter="餐饮"))
+            dm.search(TransactionFilter(type_filter="支出"))
+            dm.aggregate(True)
+            dm.aggregate(False)
+        stats = dm.query_cache.stats()
+        assert (stats["misses"], stats["hits"]) == (4, 8)
+        _, rows, archived = dm.search(food)
+        assert [tx.note for tx in rows] == ["午饭"] and archived == ()
+        assert len(dm.search(expense)[1]) == 2
+
+    def test_mutation_invalidates(self, tmp_path):
+        dm = self.make_dm(tmp_path)
+        expense = TransactionFilter(type_filter="支出")
+        version, rows, _ = dm.search(expense)
+        assert dm.aggregate(False)[0] == {"2024-01": 3000}
+
+        added = Transaction(5, "餐饮", "2024-01-03", "支出")
+        dm.add_transaction(added)
+        new_version, rows, _ = dm.search(expense)
+        assert new_version > version and added in rows
+        assert dm.aggregate(False)[0] == {"2024-01": 3500}
+
+        dm.delete_transactions([added.transaction_id])
+        assert added not in dm.search(expense)[1]
+        assert dm.aggregate(False)[0] == {"2024-01": 3000}
+
+    def test_aggregate_uses_snapshot_categories(self, tmp_path):
+        dm = self.make_dm(tmp_path)
+        snapshot = dm.snapshot()
+        dm.add_category("宠物")
+        # 后台线程拿到的快照不受之后添加的类别影响
+        assert "宠物" not in dm.aggregate(False, snapshot)[2]
+        assert dm.aggregate(False)[2]["宠物"] == 0
@@ -0,0 +1,198 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'benchmarks'))
+
+import gc
+import json
+import math
+import time
+from datetime import date
+from functools import lru_cache
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import pytest
+from backends import MemoryBackend
+from ledger_gen import generate_ledger
+from models import DataManager
+from queries import TransactionFilter
+from sort_index import SORT_KEYS
+from storage import PartitionedStorage, partition_key
+
+# 复杂度回归测试：在逐渐增大的规模上运行关键操作，用 log-log 最小二乘拟合耗时的增长指数，
+# 超过声明的上界时失败。界面模块在 Tk 和 matplotlib 都被替换为 Mock 的环境中导入。
+SIZES = (1000, 2000, 4000, 8000)
+REPEAT = 3  # 每个规模取最短耗时，减少计时噪声
+TOLERANCE = 0.5  # 计时噪声和 n log n 的余量；O(n^2) 的指数为 2，一定超出线性上界
+
+HEADLESS_MODULES = ('tkinter', 'tkinter.ttk', 'tkinter.messagebox', 'matplotlib',
+                    'matplotlib.pyplot', 'matplotlib.backends.backend_tkagg')
+
+
+def fit_exponent(sizes, times):
+    """拟合 耗时 ∝ n^k，返回 k"""
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+def measure(prepare, operation, sizes=SIZES, repeat=REPEAT):
+    """各规模下 operation(prepare(n)) 的最短耗时，prepare 不计时"""
+    times = []
+    for n in sizes:
+        best = math.inf
+        for _ in range(repeat):
+            state = prepare(n)
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                operation(state)
+                best = min(best, time.perf_counter() - start)
+            finally:
+                gc.enable()
+        times.append(best)
+    return times
+
+
+def assert_scaling(name, prepare, operation, bound, sizes=SIZES, tolerance=TOLERANCE):
+    times = measure(prepare, operation, sizes)
+    exponent = fit_exponent(sizes, times)
+    detail = ", ".join(f"n={n}: {t * 1000:.2f}ms" for n, t in zip(sizes, times))
+    assert exponent <= bound + tolerance, \
+        f"{name} 的增长指数 {exponent:.2f} 超过上界 O(n^{bound})：{detail}"
+
+
+@lru_cache(maxsize=None)
+def ledger_rows(n, seed=0):
+    return generate_ledger(n, seed=seed)
+
+
+@lru_cache(maxsize=None)
+def ledger_bytes(n):
+    data = {'transactions': [tx.to_dict() for tx in ledger_rows(n)],
+            'budgets': [{'budget_id': 'budget_1', 'amount': 5000, 'period': 'monthly'}]}
+    return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+
+def unloaded_dm(n):
+    dm = DataManager(backend=MemoryBackend({"ledger.json": ledger_bytes(n)}))
+    dm.data_file = "ledger.json"
+    return dm
+
+
+def loaded_dm(n):
+    """已加载 n 条交易的 DataManager，直接使用缓存的交易对象，不必每次重新解析"""
+    dm = unloaded_dm(n)
+    dm.transactions = ledger_rows(n)
+    dm._rebuild_totals()
+    return dm
+
+
+@pytest.fixture(scope="module")
+def partitioned_dir(tmp_path_factory):
+    """返回 n -> 保存了 n 条交易的分区目录（每个规模只写一次）"""
+    @lru_cache(maxsize=None)
+    def make(n):
+        directory = str(tmp_path_factory.mktemp(f"partitions_{n}"))
+        rows_by_key = {}
+        for tx in ledger_rows(n):
+            rows_by_key.setdefault(partition_key(tx), []).append(tx)
+        PartitionedStorage(directory).write(rows_by_key, [{'budget_id': 'budget_1', 'amount': 5000}])
+        return directory
+    return make
+
+
+@pytest.fixture(scope="module")
+def statistics_window():
+    """在 Mock 的 Tk/matplotlib 下导入统计页模块，退出时恢复 sys.modules"""
+    with patch.dict(sys.modules, {name: MagicMock() for name in HEADLESS_MODULES}):
+        sys.modules.pop('statistics_window', None)
+        import statistics_window
+        yield statistics_window
+
+
+class TestHarness:
+    def test_fit_exponent(self):
+        sizes = (100, 200, 400, 800)
+        assert fit_exponent(sizes, [n * 1e-6 for n in sizes]) == pytest.approx(1)
+        assert fit_exponent(sizes, [n * n * 1e-9 for n in sizes]) == pytest.approx(2)
+        assert fit_exponent(sizes, [5e-3] * 4) == pytest.approx(0)
+
+    def test_detects_quadratic(self):
+        sizes = (250, 500, 1000, 2000)
+
+        def quadratic(n):
+            items = list(range(n))
+            return [x for x in range(n) if x in items]
+
+        times = measure(lambda n: n, quadratic, sizes)
+        assert fit_exponent(sizes, times) > 1 + TOLERANCE
+        with pytest.raises(AssertionError, match="超过上界"):
+            assert_scaling("quadratic", lambda n: n, quadratic, 1, sizes)
+
+
+class TestDataManagerScaling:
+    def test_load(self):
+        with patch('builtins.print'):
+            assert_scaling("load_data", unloaded_dm, lambda dm: dm.load_data(), 1)
+
+    def test_save(self):
+        assert_scaling("save_data", loaded_dm, lambda dm: dm.save_data(), 1)
+
+    def test_add(self):
+        # 一次添加 n 条：索引逐条 O(log n) 更新，整个文件只保存一次
+        assert_scaling("add_transactions",
+                       lambda n: (loaded_dm(n), ledger_rows(n, seed=1)),
+                       lambda state: state[0].add_transactions(state[1]), 1)
+
+    def test_bulk_delete(self):
+        def prepare(n):
+            dm = loaded_dm(n)
+            return dm, [tx.transaction_id for tx in dm.transactions[::2]]
+
+        assert_scaling("delete_transactions", prepare,
+                       lambda state: state[0].delete_transactions(state[1]), 1)
+
+    def test_search(self):
+        transaction_filter = TransactionFilter(search_term="咖啡", amount_min="10")
+        assert_scaling("search", loaded_dm, lambda dm: dm.search(transaction_filter), 1)
+
+    def test_monthly_aggregate(self):
+        assert_scaling("aggregate(monthly)", loaded_dm, lambda dm: dm.aggregate(daily=False), 1)
+
+    def test_sort(self):
+        # 首次排序建立排序序列，O(n log n)
+        assert_scaling("sort_rows", loaded_dm,
+                       lambda dm: dm.sort_rows(list(dm.transactions), "金额"), 1)
+
+    def test_load_partitions_after_sort(self, partitioned_dir):
+        # 各列的排序序列已建立时加载其余历史分区：整批重建排序序列，逐条插入为 O(n^2)。
+        # 逐条插入移动的内存很便宜，n 较小时被解析的开销掩盖，因此用更大的规模和更小的余量
+        split = date(2020, 1, 1).toordinal()
+
+        def prepare(n):
+            dm = DataManager(partitions=PartitionedStorage(partitioned_dir(n)))
+            dm.load_data()
+            dm.ensure_loaded(start_ordinal=split)
+            for column in SORT_KEYS:
+                dm.sort_rows(list(dm.transactions), column)
+            return dm
+
+        assert_scaling("ensure_loaded", prepare, lambda dm: dm.ensure_loaded(), 1,
+                       sizes=(8000, 16000, 32000), tolerance=0.3)
+
+
+class TestStatisticsScaling:
+    def test_stats_aggregate(self, statistics_window, monkeypatch):
+        window = SimpleNamespace(stats_type=SimpleNamespace(get=lambda: "daily"))
+
+        def prepare(n):
+            dm = loaded_dm(n)
+            monkeypatch.setattr(statistics_window, "data_manager", dm)
+            return dm
+
+        assert_scaling("StatisticsWindow.get_transaction_data", prepare,
+                       lambda dm: statistics_window.StatisticsWindow.get_transaction_data(window), 1)
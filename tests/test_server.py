@@ -0,0 +1,164 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import http.client
+import io
+import json
+import threading
+import pytest
+import cli
+import server as server_module
+from models import DataManager, Transaction
+from server import start_in_thread, stop_thread
+
+
+@pytest.fixture
+def dm(tmp_path):
+    d = DataManager()
+    d.data_file = str(tmp_path / "data.json")
+    d.transactions = [
+        Transaction(10, "餐饮", "2024-01-05", "支出", "午饭"),
+        Transaction(25, "交通", "2024-01-06", "支出", "地铁"),
+        Transaction(3000, "其他", "2024-02-01", "收入", "工资"),
+    ]
+    d.budget_tracker.rebuild(d.transactions)
+    return d
+
+
+@pytest.fixture
+def server(dm):
+    s = start_in_thread(dm, port=0)
+    yield s
+    stop_thread(s)
+
+
+def request(server, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.port, timeout=10)
+    try:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        conn.request(method, path, body=data)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+class TestQueryServer:
+    def test_query(self, server):
+        status, data = request(server, "GET", "/transactions?type=%E6%94%AF%E5%87%BA")
+        assert status == 200
+        assert data["total"] == 2
+        assert [row["note"] for row in data["rows"]] == ["地铁", "午饭"]
+
+        status, data = request(server, "GET", "/transactions?date_start=2024-02-01&limit=0")
+        assert data["total"] == 1 and data["rows"] == []
+
+    def test_query_limit_must_be_non_negative_integer(self, server):
+        status, data = request(server, "GET", "/transactions?limit=-1")
+        assert status == 400 and "limit" in data["error"]
+        status, data = request(server, "GET", "/transactions?limit=abc")
+        assert status == 400 and "limit" in data["error"]
+
+    def test_aggregate_and_monthly(self, server):
+        status, data = request(server, "GET", "/aggregate?mode=monthly")
+        assert data["expense_cents"] == {"2024-01": 3500}
+        assert data["income_cents"] == {"2024-02": 300000}
+        assert data["category_cents"]["交通"] == 2500
+
+        status, data = request(server, "GET", "/monthly?month=2024-01")
+        assert (data["expense_cents"], data["income_cents"]) == (3500, 0)
+
+    def test_add_and_delete(self, server, dm):
+        status, data = request(server, "POST", "/transactions",
+                               {"amount": "12.5", "category": "餐饮", "date": "2024-3-1"})
+        assert status == 200
+        [new_id] = data["added"]
+        assert dm.transactions[-1].date == "2024-03-01"
+        assert dm.transactions[-1].amount_cents == 1250
+
+        status, data = request(server, "DELETE", "/transactions", {"ids": [new_id]})
+        assert data == {"deleted": 1}
+        assert len(dm.transactions) == 3
+
+        # 写入已保存到文件
+        reloaded = DataManager()
+        reloaded.data_file = dm.data_file
+        reloaded.load_data()
+        assert len(reloaded.transactions) == 3
+
+    def test_errors(self, server):
+        assert request(server, "GET", "/nope")[0] == 404
+        assert request(server, "PUT", "/transactions")[0] == 405
+        assert request(server, "GET", "/aggregate?mode=yearly")[0] == 400
+        status, data = request(server, "POST", "/transactions", {"amount": -1, "category": "餐饮",
+                                                                  "date": "2024-01-01"})
+        assert status == 400 and "金额" in data["error"]
+        assert request(server, "POST", "/transactions", {"amount": 1, "category": "不存在",
+                                                         "date": "2024-01-01"})[0] == 400
+
+    def test_invalid_deletes(self, server, dm):
+        tid = dm.transactions[0].transaction_id
+        for body in ({"ids": [tid, "missing"]}, {"ids": [tid, 1]}, {"ids": tid}, [tid], "ids"):
+            status, data = request(server, "DELETE", "/transactions", body)
+            assert status == 400, body
+        assert len(dm.transactions) == 3
+
+    def test_batch_errors_stay_with_their_request(self, server, dm):
+        # 同一批中一个请求的ID已不存在，其余请求照常执行
+        first, second, third = (tx.transaction_id for tx in dm.transactions)
+        results = server._apply([("delete", [first]), ("delete", ["missing"]), ("delete", [second])])
+        assert results[0] == results[2] == {first, second}
+        assert isinstance(results[1], ValueError)
+        assert [tx.transaction_id for tx in dm.transactions] == [third]
+
+    def test_concurrent_writes_are_batched(self, server, dm):
+        events = []
+        dm.add_listener(events.append)
+        errors = []
+
+        def client(n):
+            try:
+                for i in range(10):
+                    status, _ = request(server, "POST", "/transactions",
+                                        {"amount": i + 1, "category": "餐饮", "date": "2024-04-01",
+                                         "note": f"c{n}"})
+                    assert status == 200
+            except BaseException as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(dm.transactions) == 3 + 80
+        assert server.batches == len(events) <= 80
+        assert sum(len(e.added) for e in events) == 80
+
+
+class TestMain:
+    def test_write_visible_through_cli(self, tmp_path, monkeypatch):
+        # 与命令行工具使用同一套存储设置：BUDGET_DATA_DIR 指定的分区目录
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("BUDGET_DATA_DIR", str(tmp_path / "ledger"))
+
+        def run_server(data_manager, host, port):
+            s = start_in_thread(data_manager, port=0)
+            try:
+                status, _ = request(s, "POST", "/transactions",
+                                    {"amount": 12.5, "category": "餐饮", "date": "2024-03-01",
+                                     "note": "服务写入"})
+                assert status == 200
+            finally:
+                stop_thread(s)
+
+        monkeypatch.setattr(server_module, "run_server", run_server)
+        server_module.main(["--port", "0"])
+        assert (tmp_path / "ledger" / "partitions" / "2024-03.json").exists()
+
+        out = io.StringIO()
+        assert cli.main(["search", "--date-start", "2024-03-01", "--format", "csv"], out=out) == 0
+        assert out.getvalue().splitlines()[1:] == ["2024-03-01,支出,餐饮,12.50,服务写入"]
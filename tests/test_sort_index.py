@@ -0,0 +1,86 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import random
+import pytest
+from models import DataManager, Transaction
+import sort_index
+from sort_index import SORT_KEYS, SortIndex, merge_sorted, sort_key
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    return [Transaction(rng.randint(1, 50), rng.choice(["餐饮", "交通"]), f"2024-0{rng.randint(1, 3)}-0{rng.randint(1, 9)}",
+                        rng.choice(["支出", "收入"]), rng.choice(["", "午饭", "地铁"])) for _ in range(n)]
+
+
+class TestSortIndex:
+    @pytest.mark.parametrize("column", list(SORT_KEYS))
+    @pytest.mark.parametrize("descending", [False, True])
+    def test_both_strategies_agree(self, column, descending):
+        rows = make_rows(500)
+        index = SortIndex()
+        expected = sorted(rows, key=sort_key(column), reverse=descending)
+        # 全部记录走排序序列，少量记录直接排序
+        assert index.sort(rows, column, rows, descending) == expected
+        few = rows[::100]
+        assert index.sort(few, column, rows, descending) == [tx for tx in expected if tx in few]
+
+    def test_incremental_updates(self):
+        rows = make_rows(300, seed=1)
+        index = SortIndex()
+        index.ordering("金额", rows)
+        extra = make_rows(50, seed=2)
+        for tx in extra:
+            index.add(tx)
+        for tx in rows[:100]:
+            index.remove(tx)
+        current = rows[100:] + extra
+        assert index.ordering("金额", current) == sorted(current, key=sort_key("金额"))
+
+    def test_merge_sorted(self):
+        live, archived = make_rows(40, seed=3), make_rows(40, seed=4)
+        key = sort_key("日期")
+        merged = merge_sorted(sorted(live, key=key, reverse=True), sorted(archived, key=key, reverse=True),
+                              "日期", descending=True)
+        assert merged == sorted(live + archived, key=key, reverse=True)
+
+    def test_unknown_column(self):
+        with pytest.raises(KeyError):
+            sort_key("用户")
+
+
+class TestDataManagerSorting:
+    def test_sort_follows_mutations(self, tmp_path):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        dm.transactions = make_rows(200, seed=5)
+        dm.budget_tracker.rebuild(dm.transactions)
+        assert dm.sort_rows(list(dm.transactions), "类别") == sorted(dm.transactions, key=sort_key("类别"))
+
+        added = make_rows(5, seed=6)
+        dm.add_transactions(added)
+        dm.delete_transactions([dm.transactions[0].transaction_id])
+        expected = sorted(dm.transactions, key=sort_key("类别"), reverse=True)
+        assert dm.sort_rows(list(dm.transactions), "类别", descending=True) == expected
+
+    def test_bulk_add_rebuilds_ordering_once(self, tmp_path, monkeypatch):
+        dm = DataManager()
+        dm.data_file = str(tmp_path / "data.json")
+        dm.transactions = make_rows(200, seed=7)
+        dm.budget_tracker.rebuild(dm.transactions)
+        dm.sort_rows(list(dm.transactions), "金额")
+
+        built, inserted = [], []
+        original_init, original_add = sort_index._Column.__init__, SortIndex.add
+        monkeypatch.setattr(sort_index._Column, "__init__",
+                            lambda self, *args: built.append(1) or original_init(self, *args))
+        monkeypatch.setattr(SortIndex, "add", lambda self, tx: inserted.append(tx) or original_add(self, tx))
+        # 批量添加时不逐条插入排序序列，下次排序时整体重建一次
+        dm.add_transactions(make_rows(300, seed=8))
+        assert inserted == [] and built == []
+        expected = sorted(dm.transactions, key=sort_key("金额"))
+        assert dm.sort_rows(list(dm.transactions), "金额") == expected
+        assert dm.sort_rows(list(dm.transactions), "金额") == expected
+        assert len(built) == 1
@@ -0,0 +1,157 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import time
+import tkinter
+import types
+import pytest
+import stall_watchdog
+from stall_watchdog import StallWatchdog, callback_name
+
+
+class FakeMisc:
+    def after(self, ms, func=None, *args):
+        # 与 tkinter.Misc.after 一样把回调包进 callit
+        def callit():
+            func(*args)
+        self.scheduled.append((ms, callit))
+        return f"after#{len(self.scheduled)}"
+
+
+class FakeRoot(FakeMisc):
+    def __init__(self):
+        self.scheduled = []
+
+    def after_cancel(self, after_id):
+        pass
+
+
+class FakeCallWrapper:
+    def __init__(self, func):
+        self.func = func
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+
+class Window:
+    def search_transactions(self):
+        return "done"
+
+
+class SlowWindow:
+    def refresh(self):
+        time.sleep(0.3)
+
+
+@pytest.fixture
+def fake_tkinter(monkeypatch):
+    monkeypatch.setattr(stall_watchdog, "tkinter", types.SimpleNamespace(
+        CallWrapper=FakeCallWrapper, Misc=FakeMisc, TclError=Exception))
+    monkeypatch.setattr(stall_watchdog, "_original_call", None)
+    monkeypatch.setattr(stall_watchdog, "_original_after", None)
+    monkeypatch.setattr(stall_watchdog, "_active", [])
+    yield
+    FakeCallWrapper.__call__ = stall_watchdog._original_call or FakeCallWrapper.__call__
+    FakeMisc.after = stall_watchdog._original_after or FakeMisc.after
+
+
+@pytest.fixture
+def tk_root(monkeypatch):
+    """真实的 Tk 窗口，没有显示器时跳过；退出时恢复 tkinter 的钩子"""
+    if not isinstance(tkinter.Tk, type) or stall_watchdog.tkinter is not tkinter:
+        pytest.skip("tkinter 已被其他测试替换为 Mock")
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        pytest.skip("没有可用的显示器")
+    root.withdraw()
+    monkeypatch.setattr(tkinter.CallWrapper, "__call__", tkinter.CallWrapper.__call__)
+    monkeypatch.setattr(tkinter.Misc, "after", tkinter.Misc.after)
+    monkeypatch.setattr(stall_watchdog, "_original_call", None)
+    monkeypatch.setattr(stall_watchdog, "_original_after", None)
+    monkeypatch.setattr(stall_watchdog, "_active", [])
+    yield root
+    root.destroy()
+
+
+class TestStallWatchdog:
+
+    def test_callback_name(self):
+        assert callback_name(Window().search_transactions) == "Window.search_transactions"
+
+    def test_stall_attributed_to_slowest_callback(self, fake_tkinter):
+        dog = StallWatchdog(FakeRoot(), threshold_ms=200, interval_ms=100)
+        dog.start()
+        start = dog._expected
+        dog._on_callback(Window().search_transactions, 0.5)
+        dog._on_callback(print, 0.01)
+        dog.check(start + 0.6)
+        dog.check(dog._expected + 0.05)  # 延迟低于阈值
+
+        assert len(dog.stalls) == 1
+        report = dog.report()
+        assert report[0]["callback"] == "Window.search_transactions"
+        assert report[0]["max_callback_ms"] == 500.0
+        assert report[0]["max_stall_ms"] == pytest.approx(600.0, abs=0.2)
+
+    def test_stall_without_python_callback(self, fake_tkinter):
+        dog = StallWatchdog(FakeRoot(), threshold_ms=50)
+        dog.start()
+        dog.check(dog._expected + 0.1)
+        assert dog.report()[0]["callback"] == "<Tk 内部处理>"
+
+    def test_hook_times_tk_callbacks(self, fake_tkinter):
+        root = FakeRoot()
+        dog = StallWatchdog(root, threshold_ms=0)
+        dog.start()
+        assert FakeCallWrapper(Window().search_transactions)() == "done"
+        assert dog._slowest[0] == "Window.search_transactions"
+
+        # 心跳本身不计入
+        dog.check(dog._expected)
+        FakeCallWrapper(root.scheduled[-1][1])()
+        assert dog._slowest is None
+
+        # after 的回调按原始函数命名，而不是 tkinter 内部的 callit
+        root.after(0, Window().search_transactions)
+        FakeCallWrapper(root.scheduled[-1][1])()
+        assert dog._slowest[0] == "Window.search_transactions"
+
+        dog.check(dog._expected)
+        dog.stop()
+        FakeCallWrapper(print)()
+        assert dog._slowest is None
+
+    def test_report_ranking_and_format(self, fake_tkinter, tmp_path):
+        dog = StallWatchdog(FakeRoot(), threshold_ms=100)
+        dog.stalls = [("a", 0.2, 0.1), ("b", 0.9, 0.8), ("a", 0.3, 0.25)]
+        report = dog.report()
+        assert [e["callback"] for e in report] == ["b", "a"]
+        assert report[1]["stalls"] == 2
+        assert "检测到 3 次卡顿" in dog.format_report()
+        dog.dump(str(tmp_path / "report.json"))
+        assert (tmp_path / "report.json").exists()
+
+    def test_from_env(self, fake_tkinter, monkeypatch):
+        monkeypatch.delenv("BUDGET_WATCHDOG", raising=False)
+        assert StallWatchdog.from_env(FakeRoot()) is None
+        monkeypatch.setenv("BUDGET_WATCHDOG", "300")
+        dog = StallWatchdog.from_env(FakeRoot())
+        assert dog.threshold == 0.3
+        dog.stop()
+
+
+class TestRealTk:
+    def test_after_callbacks_named_and_heartbeat_recognised(self, tk_root):
+        dog = StallWatchdog(tk_root, threshold_ms=100, interval_ms=20)
+        dog.start()
+        tk_root.after(50, SlowWindow().refresh)
+        tk_root.after(600, tk_root.quit)
+        tk_root.mainloop()
+        dog.stop()
+
+        names = [entry["callback"] for entry in dog.report()]
+        assert names[0] == "SlowWindow.refresh"
+        assert not any("callit" in name or "_heartbeat" in name for name in names)
@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import json
+from datetime import date
+import pytest
+import storage
+from storage import PartitionedStorage, migrate_json_file
+from models import DataManager, Transaction
+from utils import month_key, current_month_index
+
+
+def month(offset):
+    """距本月 offset 个月的 "YYYY-MM" """
+    return month_key(current_month_index() + offset)
+
+
+@pytest.fixture
+def ledger_file(tmp_path):
+    rows = [
+        Transaction(10, "餐饮", f"{month(-30)}-05", "支出", "old"),
+        Transaction(20, "交通", f"{month(-30)}-06", "支出", "old2"),
+        Transaction(30, "餐饮", f"{month(-14)}-01", "支出", "older"),
+        Transaction(40, "餐饮", f"{month(0)}-01", "支出", "now"),
+        Transaction(500, "工资", f"{month(0)}-01", "收入", "salary"),
+        Transaction(1, "其他", "bad", "支出", "bad date"),
+    ]
+    path = tmp_path / "accounting_data.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'transactions': [t.to_dict() for t in rows],
+                   'budgets': [{'budget_id': 'budget_1', 'amount': 3000, 'period': 'monthly'}]}, f)
+    return path
+
+
+@pytest.fixture
+def dm(ledger_file, tmp_path):
+    migrate_json_file(str(ledger_file), str(tmp_path / "parts"))
+    d = DataManager(partitions=PartitionedStorage(str(tmp_path / "parts")))
+    d.load_data()
+    return d
+
+
+class TestPartitionedStorage:
+
+    def test_migrate_writes_manifest(self, dm):
+        manifest = dm.partitions.manifest
+        assert set(manifest['partitions']) == {month(-30), month(-14), month(0), "unknown"}
+        entry = manifest['partitions'][month(0)]
+        assert {k: entry[k] for k in ('rows', 'expense_cents', 'income_cents')} == \
+            {'rows': 2, 'expense_cents': 4000, 'income_cents': 50000}
+        assert entry['hash'] == storage.chunk_digest(dm.partitions.read_partition(month(0)))
+        assert manifest['budgets'][0]['amount'] == 3000
+
+    def test_startup_loads_only_recent_partitions(self, dm):
+        assert sorted(t.note for t in dm.transactions) == ["bad date", "now", "salary"]
+        assert dm.budgets[0].amount == 3000
+        assert dm.budget_tracker.month_totals(current_month_index()) == (4000, 50000)
+
+    def test_ensure_loaded_by_date_range(self, dm):
+        start = date.fromisoformat(f"{month(-15)}-01").toordinal()
+        assert dm.ensure_loaded(start_ordinal=start)
+        assert "older" in {t.note for t in dm.transactions}
+        assert "old" not in {t.note for t in dm.transactions}
+        assert not dm.ensure_loaded(start_ordinal=start)
+
+        dm.ensure_loaded()
+        assert len(dm.transactions) == 6
+        # 历史记录排在前面
+        assert dm.transactions[0].note == "old"
+
+    def test_add_touches_only_affected_partition(self, dm, monkeypatch):
+        written = []
+        original = storage.write_json_atomic
+        monkeypatch.setattr(storage, "write_json_atomic",
+                            lambda path, data, indent=None: (written.append(os.path.basename(path)),
+                                                             original(path, data, indent)))
+        dm.add_transaction(Transaction(5, "餐饮", f"{month(0)}-02", "支出", "new"))
+        assert written == [f"{month(0)}.json", "manifest.json"]
+
+    def test_back_dated_add_keeps_existing_rows(self, dm):
+        dm.add_transaction(Transaction(5, "餐饮", f"{month(-30)}-07", "支出", "late"))
+        rows = dm.partitions.read_partition(month(-30))
+        assert sorted(r['note'] for r in rows) == ["late", "old", "old2"]
+
+    def test_delete_and_reload(self, dm):
+        dm.ensure_loaded()
+        ids = [t.transaction_id for t in dm.transactions if t.note in ("old", "old2")]
+        dm.delete_transactions(ids)
+        assert month(-30) not in dm.partitions.manifest['partitions']
+        assert not os.path.exists(dm.partitions.partition_path(month(-30)))
+
+        reloaded = DataManager(partitions=PartitionedStorage(dm.partitions.directory))
+        reloaded.load_data()
+        reloaded.ensure_loaded()
+        assert sorted(t.note for t in reloaded.transactions) == ["bad date", "now", "older", "salary"]
+
+    def test_budget_changes_do_not_rewrite_partitions(self, dm, monkeypatch):
+        written = []
+        original = storage.write_json_atomic
+        monkeypatch.setattr(storage, "write_json_atomic",
+                            lambda path, data, indent=None: (written.append(os.path.basename(path)),
+                                                             original(path, data, indent)))
+        dm.set_budget(100, "weekly", "餐饮")
+        assert written == ["manifest.json"]
+
+    def test_new_storage_is_created(self, tmp_path):
+        d = DataManager(partitions=PartitionedStorage(str(tmp_path / "empty")))
+        d.load_data()
+        assert d.partitions.exists()
+        assert d.transactions == []
@@ -0,0 +1,202 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+import cli
+from dedup import bloom_path
+from models import DataManager, Transaction
+from storage import PartitionedStorage, chunk_digest, migrate_json_file
+from sync import JsonLedger, PartitionedLedger, sync
+
+
+def write_ledger(path, rows, categories=None):
+    data = {'transactions': [tx.to_dict() for tx in rows], 'budgets': []}
+    if categories:
+        data['categories'] = categories
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    return str(path)
+
+
+def ids(path):
+    ledger = JsonLedger(path) if os.path.isfile(path) else PartitionedLedger(path)
+    return sorted(row['transaction_id'] for key in ledger.keys() for row in ledger.read_chunk(key))
+
+
+@pytest.fixture
+def shared():
+    return [Transaction(10 + i, "餐饮", f"2024-0{i % 3 + 1}-05", "支出") for i in range(6)]
+
+
+class TestChunkDigest:
+    def test_order_independent(self, shared):
+        rows = [tx.to_dict() for tx in shared]
+        assert chunk_digest(rows) == chunk_digest(rows[::-1])
+        changed = [dict(rows[0], note="x")] + rows[1:]
+        assert chunk_digest(changed) != chunk_digest(rows)
+
+
+class TestSync:
+    def test_first_sync_is_union(self, tmp_path, shared):
+        extra_local = Transaction(1, "交通", "2024-01-09", "支出")
+        extra_remote = Transaction(2, "购物", "2024-04-01", "支出")
+        local = write_ledger(tmp_path / "local.json", shared + [extra_local], ["餐饮", "交通"])
+        remote = write_ledger(tmp_path / "remote.json", shared + [extra_remote], ["餐饮", "旅行"])
+        result = sync(local, remote)
+        assert (result.added_local, result.added_remote) == (1, 1)
+        assert ids(local) == ids(remote) == sorted(tx.transaction_id for tx in shared + [extra_local, extra_remote])
+        assert JsonLedger(remote).categories() == ["餐饮", "交通", "旅行"]
+
+        # 已经一致时不比较任何月份
+        assert sync(local, remote).months_compared == 0
+
+    def test_deletions_use_base(self, tmp_path, shared):
+        local = write_ledger(tmp_path / "local.json", shared)
+        remote = write_ledger(tmp_path / "remote.json", shared)
+        sync(local, remote)
+
+        # 本地删除一条、远端在同一个月新增一条，另一个月远端删除一条
+        added = Transaction(99, "餐饮", "2024-01-20", "支出")
+        write_ledger(local, shared[1:])
+        write_ledger(remote, [tx for tx in shared if tx is not shared[2]] + [added])
+        result = sync(local, remote)
+        expected = sorted(tx.transaction_id for tx in shared[1:] + [added] if tx is not shared[2])
+        assert ids(local) == ids(remote) == expected
+        assert (result.deleted_local, result.deleted_remote) == (1, 1)
+        assert result.added_local == 1 and not result.conflicts
+
+    def test_local_order_is_kept(self, tmp_path, shared):
+        local = write_ledger(tmp_path / "local.json", shared)
+        remote = write_ledger(tmp_path / "remote.json", shared + [Transaction(5, "交通", "2024-01-30", "支出")])
+        sync(local, remote)
+        rows = JsonLedger(local).data['transactions']
+        assert [row['transaction_id'] for row in rows[:6]] == [tx.transaction_id for tx in shared]
+
+    def test_conflicts_prefer_changed_side(self, tmp_path, shared):
+        local = write_ledger(tmp_path / "local.json", shared)
+        remote = write_ledger(tmp_path / "remote.json", shared)
+        sync(local, remote)
+
+        edited = shared[0].to_dict()
+        edited['note'] = "远端修改"
+        data = json.load(open(remote, encoding='utf-8'))
+        data['transactions'][0] = edited
+        data['transactions'].append(Transaction(7, "餐饮", "2024-01-21", "支出").to_dict())
+        json.dump(data, open(remote, 'w', encoding='utf-8'), ensure_ascii=False)
+        write_ledger(local, shared + [Transaction(8, "餐饮", "2024-01-22", "支出")])
+
+        result = sync(local, remote)
+        notes = {row['transaction_id']: row['note'] for row in JsonLedger(local).data['transactions']}
+        assert notes[shared[0].transaction_id] == "远端修改" and not result.conflicts
+
+    def test_two_writers_with_same_id_keep_both(self, tmp_path, shared):
+        # 两台设备在同一毫秒各自记了一笔（旧版本的交易ID只有时间戳，会重复）
+        mine = Transaction(30, "餐饮", "2024-02-10", "支出", "本机")
+        theirs = Transaction(45, "交通", "2024-02-10", "支出", "另一台")
+        mine.transaction_id = theirs.transaction_id = "txn_1707550000000"
+        local = write_ledger(tmp_path / "local.json", shared + [mine])
+        remote = write_ledger(tmp_path / "remote.json", shared + [theirs])
+
+        result = sync(local, remote)
+        assert not result.conflicts
+        for path in (local, remote):
+            notes = sorted(row['note'] for row in JsonLedger(path).data['transactions'] if row['note'])
+            assert notes == ["另一台", "本机"]
+        assert ids(local) == ids(remote) and len(set(ids(local))) == len(shared) + 2
+        assert sync(local, remote).months_compared == 0
+
+    def test_duplicate_ids_within_a_month_are_kept(self, tmp_path, shared):
+        # 旧版本导入的记录：同一月份中两条不同的记录、两条完全相同的记录各共用一个ID
+        lunch = Transaction(30, "餐饮", "2024-02-10", "支出", "午饭")
+        taxi = Transaction(45, "交通", "2024-02-10", "支出", "打车")
+        coffee = [Transaction(12, "餐饮", "2024-02-11", "支出", "咖啡") for _ in range(2)]
+        lunch.transaction_id = taxi.transaction_id = "txn_1707550000000"
+        coffee[0].transaction_id = coffee[1].transaction_id = "txn_1707550000001"
+        local = write_ledger(tmp_path / "local.json", shared + [lunch, taxi] + coffee)
+        remote = write_ledger(tmp_path / "remote.json", shared)
+
+        sync(local, remote)
+        for path in (local, remote):
+            notes = sorted(row['note'] for row in JsonLedger(path).data['transactions'] if row['note'])
+            assert notes == ["午饭", "咖啡", "咖啡", "打车"]
+        assert ids(local) == ids(remote) and len(set(ids(local))) == len(shared) + 4
+
+        # 远端再改动同一个月，按基准逐条合并时也不丢失
+        data = json.load(open(remote, encoding='utf-8'))
+        data['transactions'].append(Transaction(5, "交通", "2024-02-12", "支出", "公交").to_dict())
+        json.dump(data, open(remote, 'w', encoding='utf-8'), ensure_ascii=False)
+        sync(local, remote)
+        assert ids(local) == ids(remote) and len(set(ids(local))) == len(shared) + 5
+
+    def test_two_writers_ids_do_not_collide(self, tmp_path, monkeypatch):
+        # 两个进程的时钟相同、各自从头计数时生成的ID也不重复
+        import models
+        now = datetime(2024, 3, 1, 12, 0)
+        monkeypatch.setattr(models, "datetime", SimpleNamespace(now=lambda: now))
+        local = str(tmp_path / "local.json")
+        remote = str(tmp_path / "remote.json")
+        for path, note in ((local, "本机"), (remote, "另一台")):
+            monkeypatch.setattr(models, "_last_transaction_ms", 0)
+            dm = DataManager()
+            dm.data_file = path
+            dm.add_transactions([Transaction(i + 1, "餐饮", "2024-03-01", "支出", note) for i in range(50)])
+
+        result = sync(local, remote)
+        assert not result.conflicts and result.added_local == result.added_remote == 50
+        assert len(ids(local)) == len(set(ids(local))) == 100
+
+    def test_partitioned_reads_only_differing_months(self, tmp_path, shared, monkeypatch):
+        local_dir, remote_dir = str(tmp_path / "local"), str(tmp_path / "remote")
+        migrate_json_file(write_ledger(tmp_path / "a.json", shared), local_dir)
+        migrate_json_file(write_ledger(tmp_path / "b.json", shared), remote_dir)
+        sync(local_dir, remote_dir)
+
+        storage = PartitionedStorage(remote_dir)
+        storage.read_manifest()
+        new = Transaction(3, "交通", "2024-02-11", "支出")
+        storage.write({"2024-02": [tx for tx in shared if tx.month_key == "2024-02"] + [new]}, [])
+
+        reads = []
+        original = PartitionedStorage.read_partition
+        monkeypatch.setattr(PartitionedStorage, "read_partition",
+                            lambda self, key: reads.append(key) or original(self, key))
+        result = sync(local_dir, remote_dir)
+        assert result.months_compared == 1 and set(reads) == {"2024-02"}
+        assert new.transaction_id in ids(local_dir)
+
+    def test_json_with_partitioned(self, tmp_path, shared):
+        local = write_ledger(tmp_path / "local.json", shared[:3])
+        remote_dir = str(tmp_path / "remote")
+        migrate_json_file(write_ledger(tmp_path / "b.json", shared[3:]), remote_dir)
+        sync(local, remote_dir)
+        assert ids(local) == ids(remote_dir) == sorted(tx.transaction_id for tx in shared)
+
+    def test_invalidates_bloom_of_written_side(self, tmp_path, shared):
+        local = write_ledger(tmp_path / "local.json", shared[:4])
+        remote = write_ledger(tmp_path / "remote.json", shared)
+        cli.open_data_manager(local).import_transactions([])  # 建立本地的布隆过滤器
+        open(bloom_path(remote), 'wb').close()
+        assert os.path.exists(bloom_path(local))
+
+        # 只有本地被写入：删除本地的过滤器，远端的保持不变
+        result = sync(local, remote)
+        assert result.local_written and not result.remote_written
+        assert not os.path.exists(bloom_path(local))
+        assert os.path.exists(bloom_path(remote))
+
+        # 重新建立的过滤器覆盖同步进来的记录
+        copies = [Transaction(tx.amount, tx.category, tx.date, tx.type, tx.note) for tx in shared[4:]]
+        assert len(cli.open_data_manager(local).import_transactions(copies).duplicates) == 2
+
+    def test_cli(self, tmp_path, shared):
+        local = write_ledger(tmp_path / "local.json", shared[:4])
+        remote = write_ledger(tmp_path / "remote.json", shared)
+        out = io.StringIO()
+        assert cli.main(["--data-file", local, "sync", remote], out=out) == 0
+        assert "本地: 新增 2 条" in out.getvalue()
+        assert ids(local) == ids(remote)
@@ -0,0 +1,118 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'budget_app'))
+
+import random
+from datetime import date
+import pytest
+import trends
+from archive import ArchiveStore
+from backends import MemoryBackend
+from models import Budget, DataManager, Transaction
+from trends import DailySpend, project_month_end, window_sums
+
+
+def ordinal(s):
+    return date.fromisoformat(s).toordinal()
+
+
+def expense(amount, category, day):
+    return Transaction(amount, category, day, "支出")
+
+
+def brute_average(rows, day, window):
+    return sum(tx.amount_cents for tx in rows
+               if tx.type == "支出" and day - window < tx.date_ordinal <= day) / window
+
+
+def make_dm(rows=()):
+    dm = DataManager(backend=MemoryBackend())
+    dm.data_file = "ledger.json"
+    dm.add_transactions(list(rows))
+    return dm
+
+
+@pytest.fixture(params=["numpy", "python"])
+def vectorized(request, monkeypatch):
+    """numpy 和纯 Python 两种实现都要测试"""
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(trends, "np", None)
+    return request.param
+
+
+class TestWindowSums:
+    def test_matches_direct_sums(self, vectorized):
+        rng = random.Random(1)
+        rows = [[rng.randint(0, 100) for _ in range(40)] for _ in range(3)]
+        spend = DailySpend()
+        for category, row in enumerate(rows):
+            for day, cents in enumerate(row):
+                spend.add_amount(1000 + day, category, cents)
+        _, matrix = spend.matrix(1000, 1039)
+        sums = window_sums(matrix, 7)
+        for category, row in enumerate(rows):
+            assert [int(value) for value in sums[category]] == \
+                [sum(row[i - 6:i + 1]) for i in range(6, 40)]
+
+
+class TestMovingAverages:
+    def test_against_brute_force_with_updates(self, vectorized):
+        rng = random.Random(5)
+        start = ordinal("2024-01-01")
+        rows = [expense(rng.randint(1, 200), rng.choice(["餐饮", "交通", "购物"]),
+                        date.fromordinal(start + rng.randrange(90)).isoformat()) for _ in range(300)]
+        rows.append(Transaction(5000, "工资", "2024-02-01", "收入"))  # 收入不计入
+        dm = make_dm(rows[:250])
+        dm.add_transactions(rows[250:])
+        dm.delete_transactions([tx.transaction_id for tx in rows[:40]])
+        live = rows[40:]
+
+        days = [start + offset for offset in range(0, 100, 3)]
+        averages = dm.moving_averages(days)
+        for window in (7, 30):
+            for day in days:
+                assert averages[window][day] == pytest.approx(brute_average(live, day, window))
+
+    def test_archive_included(self, tmp_path):
+        rows = [expense(10, "餐饮", "2019-12-30"), expense(20, "交通", "2020-01-02")]
+        dm = DataManager(archive=ArchiveStore(str(tmp_path / "archive")))
+        dm.data_file = str(tmp_path / "data.json")
+        dm.add_transactions(rows)
+        day = ordinal("2020-01-05")
+        before = dm.moving_averages([day])
+        dm.archive_before(ordinal("2020-01-01"))
+        assert dm.moving_averages([day]) == before
+
+        reloaded = DataManager(archive=ArchiveStore(str(tmp_path / "archive")))
+        reloaded.data_file = dm.data_file
+        reloaded.load_data()
+        assert reloaded.moving_averages([day]) == before
+        assert before[7][day] == pytest.approx(3000 / 7)
+
+
+class TestProjection:
+    def test_projection_by_category(self, vectorized):
+        rows = [expense(10, "餐饮", f"2024-10-{day:02d}") for day in range(1, 20)]
+        rows.append(expense(300, "交通", "2024-09-25"))
+        dm = make_dm(rows)
+        dm.budgets = [Budget(300)]
+        projection = dm.month_end_projection(date(2024, 10, 19))
+        # 近 30 天（9-20 至 10-19）日均 49000 / 30 分，剩余 12 天
+        assert projection.spent == 19000
+        assert projection.daily_rate == pytest.approx(49000 / 30)
+        assert projection.days_left == 12
+        assert projection.projected == 38600
+        assert projection.by_category == {"餐饮": 26600, "交通": 12000}
+        assert projection.over and projection.overrun == 8600
+
+    def test_within_budget_and_empty(self, vectorized):
+        empty = project_month_end(DailySpend(), date(2024, 2, 10), 100)
+        assert (empty.spent, empty.projected, empty.by_category, empty.over) == (0, 0, {}, False)
+
+        dm = make_dm([expense(1, "餐饮", "2024-02-01")])
+        projection = dm.month_end_projection(date(2024, 2, 29))
+        assert projection.days_left == 0
+        assert projection.projected == 100
+        assert not projection.over
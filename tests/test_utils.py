@@ -81,3 +81,93 @@ class TestValidateDate:
         now = datetime.now()
         assert validate_date(str(now.year), str(now.month),
                              str(now.day)) == (True, "日期有效")
+
+
+def reference_validate_date(year, month, day):
+    """validate_date 优化前的实现，用于等价性对比"""
+    try:
+        year_int = int(year)
+        month_int = int(month)
+        day_int = int(day)
+
+        if not (1900 <= year_int <= 2100):
+            return False, "年份必须在1900-2100之间"
+        if not (1 <= month_int <= 12):
+            return False, "月份必须在1-12之间"
+
+        days_in_month = [31, 29 if year_int % 4 == 0 and (year_int % 100 != 0 or year_int % 400 == 0) else 28,
+                         31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+
+        if not (1 <= day_int <= days_in_month[month_int - 1]):
+            return False, f"{month_int}月没有{day_int}号"
+
+        input_date = datetime(year_int, month_int, day_int)
+        if input_date > datetime.now():
+            return False, "不能选择未来日期"
+
+        return True, "日期有效"
+
+    except ValueError:
+        return False, "日期必须为数字"
+
+
+class TestValidateDates:
+
+    SAMPLES = [
+        (str(y), str(m), str(d))
+        for y in ("1899", "1900", "2000", "2020", "2021", "2100", "2101", "abc", " 2020 ")
+        for m in ("0", "1", "2", "4", "12", "13", "x")
+        for d in ("0", "1", "28", "29", "30", "31", "32", "")
+    ]
+
+    def test_matches_reference(self):
+        for year, month, day in self.SAMPLES:
+            assert validate_date(year, month, day) == reference_validate_date(year, month, day)
+
+    def test_batch_matches_single(self):
+        from utils import validate_dates
+        expected = [reference_validate_date(*ymd) for ymd in self.SAMPLES]
+        assert validate_dates(self.SAMPLES) == expected
+
+    def test_batch_today_and_future(self):
+        from utils import validate_dates
+        now = datetime.now()
+        today = (str(now.year), str(now.month), str(now.day))
+        assert validate_dates([today, ("2099", "1", "1")]) == [
+            (True, "日期有效"), (False, "不能选择未来日期")]
+
+    def test_repeated_dates_are_cached(self):
+        from utils import _check_date
+        validate_date("2019", "6", "15")
+        hits = _check_date.cache_info().hits
+        validate_date("2019", "6", "15")
+        assert _check_date.cache_info().hits == hits + 1
+
+    def test_batch_empty(self):
+        from utils import validate_dates
+        assert validate_dates([]) == []
+
+
+class TestParseDate:
+
+    def test_valid(self):
+        from utils import parse_date
+        from datetime import date
+        assert parse_date("2023-10-05") == (date(2023, 10, 5).toordinal(), 2023 * 12 + 9)
+
+    def test_ordinal_order_matches_string_order(self):
+        from utils import parse_date
+        dates = ["2023-09-30", "2023-10-01", "2024-01-01", "2024-02-29"]
+        ordinals = [parse_date(d)[0] for d in dates]
+        assert ordinals == sorted(ordinals)
+
+    def test_invalid(self):
+        from utils import parse_date
+        for value in ("", "2023-02-30", "2023/01/01", "abc", "2023-01"):
+            assert parse_date(value) == (None, None)
+
+    def test_month_key_and_ordinal_to_str(self):
+        from utils import parse_date, month_key, ordinal_to_str
+        ordinal, month_index = parse_date("2023-01-09")
+        assert month_key(month_index) == "2023-01"
+        assert ordinal_to_str(ordinal) == "2023-01-09"